@@ -7,13 +7,20 @@ raise exceptions when access is denied.
 """
 from __future__ import annotations
 
-from typing import Annotated
+from typing import Annotated, AsyncIterator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.principals import principal_cache
+from app.core.revocation import token_denylist
 from app.core.security import verify_jwt
-from app.db.session import get_session
+from app.db.session import (
+    async_session,
+    get_read_session,
+    get_session,
+    wrote_recently,
+)
 from app.db.models.customer import Customer
 from app.db.models.support_staff import SupportStaff
 
@@ -30,16 +37,47 @@ async def get_db_session() -> AsyncSession:
         return session
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db_session)
-) -> dict:
-    """Retrieve the current user based on a JWT bearer token.
+async def get_catalog_session(request: Request) -> AsyncIterator[Optional[AsyncSession]]:
+    """Yield None when the catalog snapshot can answer, else a read session.
+
+    Requests served from the shared catalog snapshot do not take a database
+    connection.  Clients that just wrote read the database so that they see
+    their own changes before the snapshot is republished.
+    """
+    from app.services.catalog_snapshot import catalog_snapshot
+
+    if catalog_snapshot.current is not None and not wrote_recently(request):
+        yield None
+        return
+    async for session in get_read_session(request):
+        yield session
+
 
-    Decodes the JWT using ``verify_jwt`` and then loads the user from either
-    the customers or support_staff tables. Raises HTTPException if the
-    token is invalid or if the user no longer exists.
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
+    """Decode the bearer token and reject it if it has been revoked.
+
+    The revocation check is answered from the in-memory denylist for
+    tokens that were never revoked, so it costs no database access.
     """
     payload = verify_jwt(token)
+    if await token_denylist.is_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+async def get_current_user(payload: dict = Depends(get_token_payload)) -> dict:
+    """Retrieve the current user based on a JWT bearer token.
+
+    Decodes the JWT using ``verify_jwt``, rejects revoked tokens and then
+    loads the user from either the customers or support_staff tables.
+    Raises HTTPException if the token is invalid or if the user no longer
+    exists.  Users found are cached (see ``app.core.principals``), so most
+    requests take no database connection here.
+    """
     user_id: str = payload.get("sub")  # subject contains UUID string
     role: str = payload.get("role")
     if not user_id or not role:
@@ -47,17 +85,30 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload",
         )
-    # Attempt to load the user from the appropriate table
-    if role == "customer":
-        result = await db.get(Customer, uuid.UUID(user_id))
-        user_obj = result
-    else:
-        result = await db.get(SupportStaff, uuid.UUID(user_id))
-        user_obj = result
-    if user_obj is None:
+    model = Customer if role == "customer" else SupportStaff
+    table = model.__tablename__
+    if principal_cache.get(table, user_id) is None:
+        generation = principal_cache.generation
+        # Attempt to load the user from the appropriate table
+        async with async_session() as db:
+            user_obj = await db.get(model, uuid.UUID(user_id))
+        if user_obj is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        principal_cache.put(table, user_id, True, generation)
+    return {"id": user_id, "role": role, "client_id": payload.get("client_id")}
+
+
+async def get_current_staff(user: dict = Depends(get_current_user)) -> dict:
+    """Retrieve the current user and require a support staff or admin account.
+
+    Customers get HTTP 403.
+    """
+    if user["role"] == "customer":
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Staff account required",
         )
-    return {"id": user_id, "role": role}
-
+    return user
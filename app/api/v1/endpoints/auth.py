@@ -2,9 +2,8 @@
     Authentication endpoints.
 
     Handles user login, registration and logout. Registration creates a
-    new customer, login issues a JWT, and logout simply instructs the client
-    to discard its token (stateless JWTs cannot be revoked server‑side without
-    additional infrastructure).
+    new customer, login issues a JWT, and logout revokes the presented token
+    by adding its ``jti`` to the denylist (see ``app.core.revocation``).
 """
 from __future__ import annotations
 
@@ -21,6 +20,8 @@ from app.services.auth_service import (
     login as login_service,
     register_user as register_service,
 )
+from app.api.v1.deps import get_token_payload
+from app.core.revocation import token_denylist
 from app.db.session import get_session
 
 router = APIRouter()
@@ -57,6 +58,7 @@ async def register(
     return RegisterResponse(**result)
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Logout current user")
-async def logout() -> Response:
-    """Logout endpoint. Clients should delete their JWT on logout."""
+async def logout(payload: dict = Depends(get_token_payload)) -> Response:
+    """Revoke the current access token for every worker until it expires."""
+    await token_denylist.revoke(payload)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,51 +1,50 @@
 """
 Endpoint for demonstrating database queries.
 
-This module provides a GET endpoint that returns basic information
-about the connected PostgreSQL database.  It queries the
-``information_schema.tables`` view to list the names of tables in the
-public schema.  This is a simple way to prove that the backend can
-run SQL queries against the database and return the results as JSON.
-
-You can extend this endpoint or create additional ones to perform
-custom queries.  Be careful to avoid SQL injection if you accept
-parameters from the client; use parameterised queries and avoid
-concatenating raw input into SQL strings.
+This module provides endpoints returning information about the tables of
+the connected PostgreSQL database: names, relation kind, the planner's
+row estimate, on-disk size and index definitions.  The data comes from
+the in-memory ``schema_cache`` (see ``app.db.introspection``), which is
+loaded at startup and refreshed on a TTL, so these endpoints do not query
+the catalog on every call.  ``POST /dbinfo/refresh`` reloads it on demand,
+for example right after a migration; it queries the catalog and so is
+restricted to staff accounts.
 """
 from __future__ import annotations
 
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.v1.deps import get_current_staff
+from app.db.introspection import schema_cache
 
 
 router = APIRouter()
 
 
 @router.get("/tables", summary="List tables", response_model=List[dict])
-async def list_tables(db: AsyncSession = Depends(get_db)) -> List[dict]:
-    """Return a list of table names in the public schema.
+async def list_tables() -> List[dict]:
+    """Return the cached metadata of every table and view in the public schema.
 
-    Executes a query against ``information_schema.tables`` to fetch
-    table names and returns them as a list of objects.  If the query
-    fails, raises an HTTP 500 error.
+    If the metadata has never been loaded and the query fails, raises an
+    HTTP 500 error.
     """
-    query = text(
-        """
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema = 'public'
-        ORDER BY table_name
-        """
-    )
     try:
-        result = await db.execute(query)
+        tables = await schema_cache.get()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Database query error: {exc}") from exc
-    # Convert the result to a list of dicts for JSON serialisation.
-    table_names = [row._asdict() for row in result.all()]
-    return table_names
\ No newline at end of file
+    return [table.as_dict() for table in tables]
+
+
+@router.post("/refresh", summary="Reload table metadata", response_model=List[dict])
+async def refresh_tables(staff: dict = Depends(get_current_staff)) -> List[dict]:
+    """Reload the schema metadata from the database and return it.
+
+    Requires a support staff or admin account.
+    """
+    try:
+        tables = await schema_cache.refresh()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Database query error: {exc}") from exc
+    return [table.as_dict() for table in tables]
@@ -1,32 +1,54 @@
 """
-Endpoint for health checks.
-
-This module exposes a simple GET endpoint that attempts to execute a
-lightweight SQL statement against the database.  If the query
-succeeds, the endpoint responds with ``{"status": "ok"}``.  If it
-fails, a 500 error is returned with details of the exception.
+Endpoints for health checks.
+
+The handlers never touch the database themselves.  They serve the status
+cached by the ``HealthProber`` that the application's lifespan handler
+starts (see ``app.core.health``):
+
+* ``GET /health/live`` answers 200 while the worker's event loop and
+  prober are running.
+* ``GET /health/ready`` answers 200 when the last probe found the
+  database reachable and no admission queue backed up, 503 otherwise.
+* ``GET /health/`` is kept for existing probes and behaves like
+  ``/health/ready``.
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Request, Response, status
 
-from app.db.session import get_db
+from app.core.health import HealthProber
 
 
 router = APIRouter()
 
 
+def _prober(request: Request) -> HealthProber | None:
+    return getattr(request.app.state, "health_prober", None)
+
+
+@router.get("/live", summary="Liveness probe", response_model=dict)
+async def liveness(request: Request, response: Response) -> dict:
+    """Report whether this worker is alive."""
+    prober = _prober(request)
+    if prober is None or not prober.is_live():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable"}
+    return {"status": "ok"}
+
+
+@router.get("/ready", summary="Readiness probe", response_model=dict)
+async def readiness(request: Request, response: Response) -> dict:
+    """Report whether this worker should receive traffic."""
+    prober = _prober(request)
+    if prober is None:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "failures": ["prober not running"]}
+    if not prober.status.ready or not prober.is_live():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return prober.status.as_dict()
+
+
 @router.get("/", summary="Health check", response_model=dict)
-async def health_check(db: AsyncSession = Depends(get_db)) -> dict[str, str]:
-    """Verify that the database connection is alive.
-
-    Tries to execute ``SELECT 1`` using the provided ``db`` session.
-    If any exception occurs, return a 500 error with details.
-    """
-    try:
-        await db.execute(text("SELECT 1"))
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Database connection error: {exc}") from exc
-    return {"status": "ok"}
\ No newline at end of file
+async def health_check(request: Request, response: Response) -> dict:
+    """Backwards-compatible alias of the readiness probe."""
+    return await readiness(request, response)
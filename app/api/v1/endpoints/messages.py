@@ -6,21 +6,30 @@
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
-from app.schemas.message import MessageOut, MessageCreate
+from app.db.session import get_read_session, get_session
+from app.schemas.message import MessageCreate, MessageOut, MessagePage
 from app.services.message_service import get_messages, create_message
 
 router = APIRouter()
 
 
-@router.get("/", summary="List messages", response_model=list[MessageOut])
-async def list_messages(db: AsyncSession = Depends(get_session)) -> list[MessageOut]:
-    """List messages available to the current actor."""
-    messages = await get_messages(db)
-    return [MessageOut.model_validate(m) for m in messages]
+@router.get("/", summary="List messages", response_model=MessagePage)
+async def list_messages(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_session),
+) -> MessagePage:
+    """List messages available to the current actor, newest first.
+
+    Pass ``next_cursor`` of a page as ``cursor`` to get the following page.
+    """
+    messages, next_cursor = await get_messages(db, cursor=cursor, limit=limit)
+    return MessagePage(items=[MessageOut.model_validate(m) for m in messages], next_cursor=next_cursor)
 
 
 @router.post(
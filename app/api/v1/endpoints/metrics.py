@@ -0,0 +1,29 @@
+"""
+Endpoint exposing Prometheus metrics.
+
+The ``/metrics`` route renders every collector declared in
+``app.core.metrics`` in the Prometheus text exposition format.  It is
+mounted at the application root rather than under ``/api/v1`` because
+that is where scrapers look by default.
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from app.core.metrics import render_latest
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Return the current metric samples for scraping."""
+    try:
+        payload, content_type = render_latest()
+    except ImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(exc),
+        ) from exc
+    return Response(content=payload, media_type=content_type)
@@ -6,33 +6,86 @@
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
-from app.schemas.order import OrderOut, OrderCreate
-from app.services.order_service import get_orders, create_order
+from app.api.v1.deps import get_current_user
+from app.db.session import get_read_session, get_session
+from app.schemas.order import (
+    CheckoutOut,
+    CurrencySpend,
+    OrderCreate,
+    OrderItemOut,
+    OrderOut,
+    OrderPage,
+    OrderSummaryOut,
+)
+from app.services.order_service import create_order, get_order_summaries, get_orders
 
 router = APIRouter()
 
 
-@router.get("/", summary="List orders", response_model=list[OrderOut])
-async def list_orders(db: AsyncSession = Depends(get_session)) -> list[OrderOut]:
-    """Return a list of orders visible to the current user."""
-    orders = await get_orders(db)
-    return [OrderOut.model_validate(o) for o in orders]
+def _client_id(user: dict) -> uuid.UUID:
+    if not user.get("client_id"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a customer account")
+    return uuid.UUID(str(user["client_id"]))
+
+
+@router.get("/", summary="List my orders", response_model=OrderPage)
+async def list_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+) -> OrderPage:
+    """Return a page of the current customer's orders, newest first.
+
+    Pass ``next_cursor`` of a page as ``cursor`` to get the following page.
+    """
+    orders, next_cursor = await get_orders(db, _client_id(user), cursor=cursor, limit=limit)
+    return OrderPage(items=[OrderOut.model_validate(o) for o in orders], next_cursor=next_cursor)
+
+
+@router.get("/summary", summary="My order summary", response_model=OrderSummaryOut)
+async def order_summary(
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_session),
+) -> OrderSummaryOut:
+    """Return the current customer's order count, spend per currency and last order."""
+    summaries = await get_order_summaries(db, _client_id(user))
+    last = max(
+        (s for s in summaries if s.last_order_at is not None),
+        key=lambda s: s.last_order_at,
+        default=None,
+    )
+    return OrderSummaryOut(
+        order_count=sum(s.order_count for s in summaries),
+        spend=[CurrencySpend.model_validate(s) for s in summaries if s.order_count],
+        last_order_id=last.last_order_id if last else None,
+        last_order_at=last.last_order_at if last else None,
+    )
 
 
 @router.post(
     "/",
     summary="Create order",
-    response_model=OrderOut,
+    response_model=CheckoutOut,
     status_code=status.HTTP_201_CREATED,
 )
 async def add_order(
     order_in: OrderCreate,
+    user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
-) -> OrderOut:
-    """Create a new order."""
-    order = await create_order(db, order_in)
-    return OrderOut.model_validate(order)
+) -> CheckoutOut:
+    """Create an order for the current customer from SKUs and quantities.
+
+    Totals are computed server-side.
+    """
+    order, lines = await create_order(db, _client_id(user), order_in)
+    return CheckoutOut(
+        **OrderOut.model_validate(order).model_dump(),
+        items=[OrderItemOut.model_validate(line) for line in lines],
+    )
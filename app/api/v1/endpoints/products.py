@@ -1,28 +1,157 @@
 """
     Product endpoints.
 
-    Handles creation, update and listing of products.  Access controls depend on
-    actor role.
+    Handles creation, update, listing and search of products.  Access controls
+    depend on actor role.
+
+    Catalog reads carry edge cache headers and surrogate keys (see
+    ``app.services.edge_cache``).
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, status
+import uuid
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
-from app.schemas.product import ProductOut, ProductCreate
-from app.services.product_service import get_products, create_product
+from app.api.v1.deps import get_catalog_session
+from app.db.session import get_read_session, get_session
+from app.schemas.product import (
+    FacetValue,
+    ProductBrowseResponse,
+    ProductCreate,
+    ProductOut,
+    ProductSuggestion,
+)
+from app.services.product_service import (
+    browse_products,
+    create_product,
+    get_facet_counts,
+    get_products,
+)
+from app.db.models.product import Product
+from app.services import edge_cache
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.product_search import product_name_index, search_products
 
 router = APIRouter()
 
 
 @router.get("/", summary="List products", response_model=list[ProductOut])
-async def list_products(db: AsyncSession = Depends(get_session)) -> list[ProductOut]:
-    """Return a list of products."""
+async def list_products(
+    response: Response,
+    db: Optional[AsyncSession] = Depends(get_catalog_session),
+) -> list[ProductOut]:
+    """Return a list of products.
+
+    Served from the shared catalog snapshot when it is available.
+    """
+    # Too many products to key individually; any product write purges it.
+    keys = (edge_cache.CATALOG_KEY, edge_cache.PRODUCT_LIST_KEY)
+    if db is None:
+        response = Response(content=catalog_snapshot.current.list_json(), media_type="application/json")
+        edge_cache.set_cache_headers(response, "catalog", keys)
+        return response
     products = await get_products(db)
+    edge_cache.set_cache_headers(response, "catalog", keys)
     return [ProductOut.model_validate(p) for p in products]
 
 
+@router.get("/browse", summary="Browse products with facets", response_model=ProductBrowseResponse)
+async def browse(
+    category_id: Optional[uuid.UUID] = None,
+    price: Optional[Literal["under_30", "30_60", "60_100", "100_plus"]] = None,
+    featured: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+    limit: int = Query(24, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),
+) -> ProductBrowseResponse:
+    """Return a filtered page of products and the facet counts.
+
+    Facet counts cover the whole active catalog (they are precomputed, not
+    narrowed by the current filters).
+    """
+    products, has_more = await browse_products(
+        db,
+        category_id=category_id,
+        price=price,
+        featured=featured,
+        in_stock=in_stock,
+        limit=limit,
+        offset=offset,
+    )
+    facets = await get_facet_counts(db)
+    edge_cache.set_cache_headers(response, "catalog", edge_cache.product_keys(products))
+    return ProductBrowseResponse(
+        items=[ProductOut.model_validate(p) for p in products],
+        facets={
+            facet: [FacetValue(value=value, count=count) for value, count in values]
+            for facet, values in facets.items()
+        },
+        limit=limit,
+        offset=offset,
+        has_more=has_more,
+    )
+
+
+@router.get("/search", summary="Search products", response_model=list[ProductOut])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    *,
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),
+) -> list[ProductOut]:
+    """Full-text product search over name and description, tolerant of typos."""
+    products = await search_products(db, q, limit)
+    edge_cache.set_cache_headers(response, "search", edge_cache.product_keys(products))
+    return [ProductOut.model_validate(p) for p in products]
+
+
+@router.get(
+    "/autocomplete", summary="Autocomplete product names", response_model=list[ProductSuggestion]
+)
+async def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    *,
+    response: Response,
+) -> list[ProductSuggestion]:
+    """Suggest products whose name has a word starting with ``prefix``.
+
+    Served from the in-memory name index without a database query.
+    """
+    edge_cache.set_cache_headers(
+        response, "search", (edge_cache.CATALOG_KEY, edge_cache.PRODUCT_LIST_KEY)
+    )
+    return [ProductSuggestion(**s) for s in product_name_index.suggest(prefix, limit)]
+
+
+@router.get("/{product_id}", summary="Get a product", response_model=ProductOut)
+async def get_product(
+    product_id: uuid.UUID,
+    response: Response,
+    db: Optional[AsyncSession] = Depends(get_catalog_session),
+) -> ProductOut:
+    """Return one active product.
+
+    Served from the shared catalog snapshot when it is available.
+    """
+    if db is None:
+        product = catalog_snapshot.current.get(product_id)
+    else:
+        found = await db.get(Product, product_id)
+        product = ProductOut.model_validate(found).model_dump() if found is not None and found.is_active else None
+    if product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    edge_cache.set_cache_headers(response, "catalog", edge_cache.product_keys([product], listing=False))
+    return product
+
+
 @router.post(
     "/",
     summary="Create product",
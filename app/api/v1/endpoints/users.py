@@ -3,24 +3,53 @@ User management endpoints.
 
 Provides CRUD operations for users (customers and support staff). All
 handlers should enforce appropriate row‑level security via the database.
+The user directory is an admin tool: every endpoint requires a support
+staff or admin account.
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
-from app.schemas.user import User as UserSchema
-from app.services.user_service import get_users
+from app.api.v1.deps import get_current_staff
+from app.db.session import get_read_session
+from app.schemas.user import User as UserSchema, UserPage
+from app.services.user_service import get_user, get_users
 
 
 router = APIRouter()
 
 
-@router.get("/", summary="List users", response_model=list[UserSchema])
-async def list_users(db: AsyncSession = Depends(get_session)) -> list[UserSchema]:
-    """Return a list of users visible to the current actor."""
-    users = await get_users(db)
-    # Use model_validate instead of from_orm for Pydantic v2
-    return [UserSchema.model_validate(u) for u in users]
+@router.get("/", summary="List users", response_model=UserPage)
+async def list_users(
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    staff: dict = Depends(get_current_staff),
+    db: AsyncSession = Depends(get_read_session),
+) -> UserPage:
+    """Return a page of the users visible to the current actor, newest first.
+
+    Pass ``next_cursor`` of a page as ``cursor`` to get the following page.
+    """
+    users, next_cursor = await get_users(db, role=role, is_active=is_active, cursor=cursor, limit=limit)
+    # Use model_validate instead of from_orm for Pydantic v2
+    return UserPage(items=[UserSchema.model_validate(u) for u in users], next_cursor=next_cursor)
+
+
+@router.get("/{user_id}", summary="Get a user", response_model=UserSchema)
+async def read_user(
+    user_id: uuid.UUID,
+    staff: dict = Depends(get_current_staff),
+    db: AsyncSession = Depends(get_read_session),
+) -> UserSchema:
+    """Return one user by id."""
+    user = await get_user(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return UserSchema.model_validate(user)
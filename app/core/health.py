@@ -0,0 +1,168 @@
+"""
+Background health prober.
+
+Orchestrators probe every pod every few seconds.  Running ``SELECT 1`` on a
+fresh connection for each probe costs a connection handshake per probe, so
+instead a single background task per worker checks the database, the
+connection pool, event loop lag and the admission queues on a fixed
+interval and caches the outcome.  The liveness and readiness endpoints
+only read that cached status.
+
+* **Liveness** fails only when the worker itself is wedged: the prober task
+  died or has not completed a cycle for several intervals (a blocked event
+  loop).  Database outages do not fail liveness, since restarting the pod
+  would not fix them.
+* **Readiness** additionally fails when the database probe fails, the pool
+  is saturated, the event loop lags, or the crypto executor queue or the
+  number of in-flight requests exceeds its limit, so that load balancers
+  stop sending traffic until the backlog drains.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from app.core import metrics
+from app.core.settings import settings
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Event loop lag is sampled more often than the full probe runs so that
+# short stalls between two probes are still seen.
+LAG_SAMPLE_INTERVAL = 0.25
+
+
+@dataclass
+class HealthStatus:
+    """Outcome of the most recent probe cycle."""
+
+    ready: bool = False
+    checks: dict[str, Any] = field(default_factory=dict)
+    failures: list[str] = field(default_factory=lambda: ["not probed yet"])
+    checked_at: Optional[datetime] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": "ok" if self.ready else "unavailable",
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "failures": self.failures,
+            "checks": self.checks,
+        }
+
+
+class HealthProber:
+    """Runs the health checks periodically and caches the result."""
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval or settings.health_probe_interval
+        self.status = HealthStatus()
+        self._task: Optional[asyncio.Task] = None
+        self._last_cycle = time.monotonic()
+        self._max_lag = 0.0
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Run a first probe so readiness is known, then probe in the background."""
+        await self.probe()
+        self._task = asyncio.create_task(self._run(), name="health-prober")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_live(self) -> bool:
+        if self._task is None or self._task.done():
+            return False
+        return time.monotonic() - self._last_cycle < 3 * self.interval + LAG_SAMPLE_INTERVAL
+
+    # -- probing -------------------------------------------------------------
+
+    async def _run(self) -> None:
+        next_probe = time.monotonic() + self.interval
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            lag = time.monotonic() - before - LAG_SAMPLE_INTERVAL
+            self._max_lag = max(self._max_lag, lag)
+            if time.monotonic() >= next_probe:
+                try:
+                    await self.probe()
+                except Exception:  # pragma: no cover - keep probing regardless
+                    logger.exception("Health probe failed unexpectedly")
+                next_probe = time.monotonic() + self.interval
+
+    async def probe(self) -> HealthStatus:
+        """Run all checks once and replace the cached status."""
+        checks: dict[str, Any] = {}
+        failures: list[str] = []
+
+        database_ok, detail = await self._probe_database()
+        checks["database"] = detail
+        if not database_ok:
+            failures.append("database")
+
+        saturation = self._pool_saturation()
+        checks["pool_saturation"] = saturation
+        if saturation >= settings.health_max_pool_saturation:
+            failures.append("pool_saturation")
+
+        lag_ms = self._max_lag * 1000
+        self._max_lag = 0.0
+        metrics.EVENT_LOOP_LAG.set(lag_ms / 1000)
+        checks["event_loop_lag_ms"] = round(lag_ms, 1)
+        if lag_ms > settings.health_max_loop_lag_ms:
+            failures.append("event_loop_lag")
+
+        queued = metrics.CRYPTO_QUEUED.value
+        checks["crypto_queue_depth"] = queued
+        if queued > settings.health_max_crypto_queue:
+            failures.append("crypto_queue")
+
+        in_flight = metrics.IN_FLIGHT_REQUESTS.value
+        checks["in_flight_requests"] = in_flight
+        if settings.health_max_in_flight and in_flight > settings.health_max_in_flight:
+            failures.append("in_flight_requests")
+
+        self.status = HealthStatus(
+            ready=not failures, checks=checks, failures=failures, checked_at=utcnow()
+        )
+        self._last_cycle = time.monotonic()
+        return self.status
+
+    async def _probe_database(self) -> tuple[bool, dict[str, Any]]:
+        from sqlalchemy import text
+
+        from app.db.session import async_session
+
+        start = time.perf_counter()
+        try:
+            async with async_session() as session:
+                await asyncio.wait_for(
+                    session.execute(text("SELECT 1")), timeout=settings.health_probe_timeout
+                )
+        except Exception as exc:
+            return False, {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+        return True, {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    @staticmethod
+    def _pool_saturation() -> float:
+        """Fraction of pool capacity checked out (0 when unpooled)."""
+        if settings.db_pool_size <= 0:
+            return 0.0
+        from app.db.session import get_engine
+
+        pool = get_engine().sync_engine.pool
+        capacity = settings.db_pool_size + max(settings.db_max_overflow, 0)
+        return round(pool.checkedout() / capacity, 3)
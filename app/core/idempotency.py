@@ -0,0 +1,262 @@
+"""
+Idempotency keys for retried POST requests.
+
+Clients may send an ``Idempotency-Key`` header (a UUID, see
+``app.utils.helpers.generate_uuid``) with a POST so that retrying it after
+a timeout or a dropped connection does not create a second order or
+message.  The first request with a key runs normally and its response is
+stored with a fingerprint of the request; a retry with the same key gets
+the stored response back without reaching the endpoint.
+
+* Keys belong to a scope, the authenticated caller, so that callers can
+  neither collide with nor read each other's responses.
+* Keys and responses are kept in the ``idempotency_keys`` table, shared by
+  all workers: a retry is recognised whichever worker it reaches.  A key
+  is claimed with ``INSERT ... ON CONFLICT DO NOTHING``, so exactly one
+  request runs for it.
+* A duplicate that arrives while the original is still running waits for
+  it and then gets its response.  Duplicates reaching the worker running
+  the original wait on an in-process future; the others poll the table.
+* Reusing a key for a different request (another body or path) is
+  rejected, since replaying the first response would be wrong.
+* Server errors (5xx) are not stored: the key is released and the next
+  retry runs the request again.  A key whose worker died while running
+  the request is claimed again after ``IDEMPOTENCY_LEASE_SECONDS``.
+* Responses are replayed for ``IDEMPOTENCY_TTL`` seconds after they were
+  stored; expired rows are deleted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 300.0
+POLL_MIN = 0.05
+POLL_MAX = 1.0
+
+DELETE_EXPIRED_KEY_SQL = text(
+    "DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key AND expires_at <= now()"
+)
+
+CLAIM_SQL = text(
+    """
+    INSERT INTO idempotency_keys (scope, key, fingerprint, status, expires_at)
+    VALUES (:scope, :key, :fingerprint, 'pending', now() + make_interval(secs => :lease))
+    ON CONFLICT (scope, key) DO NOTHING
+    RETURNING key
+    """
+)
+
+GET_SQL = text(
+    """
+    SELECT fingerprint, status, response_status, response_headers, response_body
+    FROM idempotency_keys WHERE scope = :scope AND key = :key
+    """
+)
+
+FINISH_SQL = text(
+    """
+    UPDATE idempotency_keys
+    SET status = 'done', response_status = :status, response_headers = CAST(:headers AS jsonb),
+        response_body = :body, expires_at = now() + make_interval(secs => :ttl)
+    WHERE scope = :scope AND key = :key AND status = 'pending'
+    """
+)
+
+RELEASE_SQL = text(
+    "DELETE FROM idempotency_keys WHERE scope = :scope AND key = :key AND status = 'pending'"
+)
+
+PURGE_SQL = text("DELETE FROM idempotency_keys WHERE expires_at <= now()")
+
+
+@dataclass
+class StoredResponse:
+    """A serialized response: status, raw headers and body."""
+
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+    def encode_headers(self) -> str:
+        return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers])
+
+    @classmethod
+    def from_row(cls, row: Any) -> "StoredResponse":
+        return cls(
+            status=row.response_status,
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.response_headers],
+            body=bytes(row.response_body),
+        )
+
+
+@dataclass
+class _Running:
+    """A request running in this worker for a key it claimed."""
+
+    fingerprint: str
+    done: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+def fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    """Return a digest identifying a request."""
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyTimeout(Exception):
+    """The original request with this key did not finish in time."""
+
+
+class IdempotencyStore:
+    """Idempotency keys and their responses, stored in ``idempotency_keys``."""
+
+    def __init__(self, ttl: Optional[float] = None, lease: Optional[float] = None) -> None:
+        self._ttl = ttl
+        self._lease = lease
+        # Keys claimed by requests running in this worker.  Duplicates that
+        # reach this worker wait for the future instead of polling.
+        self._running: dict[tuple[str, str], _Running] = {}
+        self._purged_at = 0.0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl or settings.idempotency_ttl
+
+    @property
+    def lease(self) -> float:
+        return self._lease or settings.idempotency_lease_seconds
+
+    def __len__(self) -> int:
+        return len(self._running)
+
+    async def _claim(self, scope: str, key: str, fp: str) -> tuple[bool, Any]:
+        """Claim the key, or return its row when it is already taken."""
+        from app.db.session import get_engine
+
+        params = {"scope": scope, "key": key}
+        async with get_engine().begin() as conn:
+            await conn.execute(DELETE_EXPIRED_KEY_SQL, params)
+            claimed = await conn.scalar(CLAIM_SQL, {**params, "fingerprint": fp, "lease": self.lease})
+            if claimed is not None:
+                return True, None
+            return False, (await conn.execute(GET_SQL, params)).one_or_none()
+
+    async def _purge(self) -> None:
+        from app.db.session import get_engine
+
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        try:
+            async with get_engine().begin() as conn:
+                await conn.execute(PURGE_SQL)
+        except Exception:
+            logger.exception("Could not delete expired idempotency keys")
+
+    async def begin(self, scope: str, key: str, fp: str, timeout: float) -> Optional[StoredResponse]:
+        """Claim ``key`` of ``scope`` for a request with fingerprint ``fp``.
+
+        Returns the stored response when the request was already answered
+        (waiting up to ``timeout`` seconds for a request still in flight),
+        or None when the caller now owns the key and must run the request
+        and then call ``finish`` or ``release``.
+        """
+        await self._purge()
+        deadline = time.monotonic() + timeout
+        delay = POLL_MIN
+        while True:
+            running = self._running.get((scope, key))
+            if running is not None:
+                if running.fingerprint != fp:
+                    raise IdempotencyConflict(key)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise IdempotencyTimeout(key)
+                try:
+                    # shield: a waiter giving up must not cancel the original.
+                    response = await asyncio.wait_for(asyncio.shield(running.done), remaining)
+                except asyncio.TimeoutError:
+                    raise IdempotencyTimeout(key) from None
+                if response is not None:
+                    return response
+                continue  # released: one of the waiters claims it
+
+            claimed, row = await self._claim(scope, key, fp)
+            if claimed:
+                self._running[(scope, key)] = _Running(fingerprint=fp)
+                return None
+            if row is None:
+                continue  # released or expired meanwhile
+            if row.fingerprint != fp:
+                raise IdempotencyConflict(key)
+            if row.status == "done":
+                return StoredResponse.from_row(row)
+            # Running in another worker.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyTimeout(key)
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX)
+
+    def _resolve(self, scope: str, key: str, response: Optional[StoredResponse]) -> None:
+        running = self._running.pop((scope, key), None)
+        if running is not None and not running.done.done():
+            running.done.set_result(response)
+
+    async def finish(self, scope: str, key: str, response: StoredResponse) -> None:
+        """Store the response of the request owning ``key``."""
+        from app.db.session import get_engine
+
+        try:
+            async with get_engine().begin() as conn:
+                await conn.execute(
+                    FINISH_SQL,
+                    {
+                        "scope": scope,
+                        "key": key,
+                        "status": response.status,
+                        "headers": response.encode_headers(),
+                        "body": response.body,
+                        "ttl": self.ttl,
+                    },
+                )
+        except Exception:
+            # The key is claimed again once its lease runs out.
+            logger.exception("Could not store the response for idempotency key %s", key)
+        finally:
+            self._resolve(scope, key, response)
+
+    async def release(self, scope: str, key: str) -> None:
+        """Forget ``key`` without a response, e.g. after a server error."""
+        from app.db.session import get_engine
+
+        try:
+            async with get_engine().begin() as conn:
+                await conn.execute(RELEASE_SQL, {"scope": scope, "key": key})
+        except Exception:
+            logger.exception("Could not release idempotency key %s", key)
+        finally:
+            self._resolve(scope, key, None)
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,207 @@
+"""
+Cross-worker cache invalidation.
+
+Triggers on ``products``, ``customers`` and ``support_staff`` (see
+``app/db/sql/0006_change_notifications.sql``) send a ``NOTIFY`` on the
+``row_changes`` channel for every committed write, carrying the table,
+the operation and the row's id and version.  Each worker holds one
+long-lived connection that ``LISTEN``s on the channel and hands every
+change to the handlers subscribed to its table, which drop exactly the
+cached entries of that row.  Caches can therefore keep entries for a long
+time and still never serve data that another worker has changed.
+
+Notifications sent while the listener is disconnected are lost, so after
+every (re)connect the handlers receive a ``RESET`` change for each table,
+meaning "drop everything"; bulk loads that disable the triggers send one
+as well.  While the listener is down, caches that rely on it bypass their
+long-lived entries or fall back to polling.
+
+``LISTEN`` needs a session-level connection, so the listener connects
+directly rather than through a transaction-mode pooler: set
+``INVALIDATION_DSN`` when ``DB_HOST`` points at one.  Behind such a pooler
+``LISTEN`` succeeds but notifications never arrive, so after connecting
+the listener sends itself a probe notification and only reports itself
+connected once the probe comes back; otherwise it logs an error, the
+caches stay bypassed and it tries again later.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "row_changes"
+RECONNECT_DELAYS = (1.0, 2.0, 5.0, 10.0, 30.0)
+PROBE_OP = "PROBE"
+PROBE_TIMEOUT = 5.0
+
+
+@dataclass(frozen=True)
+class RowChange:
+    """A committed change to one row, or a ``RESET`` of a whole table."""
+
+    table: str
+    op: str  # INSERT, UPDATE, DELETE or RESET
+    id: Optional[str] = None
+    version: Optional[int] = None
+
+
+Handler = Callable[[RowChange], None]
+
+
+class ChangeListener:
+    """Listens for row changes and dispatches them to cache handlers.
+
+    Handlers run on the event loop and must not block; those that need
+    the database schedule their own task.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[Handler]] = {}
+        self._conn = None  # asyncpg connection
+        self._lost: Optional[asyncio.Future] = None
+        self._probes: dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        # True while changes are being received; caches relying on them
+        # must not serve long-lived entries otherwise.
+        self.connected = False
+
+    def subscribe(self, table: str, handler: Handler) -> None:
+        self._handlers.setdefault(table, []).append(handler)
+
+    def dispatch(self, change: RowChange) -> None:
+        for handler in self._handlers.get(change.table, ()):
+            try:
+                handler(change)
+            except Exception:
+                logger.exception("Cache invalidation handler failed for %s", change)
+
+    def _reset_all(self) -> None:
+        for table in list(self._handlers):
+            self.dispatch(RowChange(table, "RESET"))
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:  # noqa: ANN001
+        try:
+            data = json.loads(payload)
+            change = RowChange(data["table"], data["op"], data.get("id"), data.get("version"))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed %s notification: %r", CHANNEL, payload)
+            return
+        if change.op == PROBE_OP:
+            probe = self._probes.get(change.id)
+            if probe is not None and not probe.done():
+                probe.set_result(None)
+            return
+        self.dispatch(change)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="change-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    async def _close(self) -> None:
+        self.connected = False
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close(timeout=5)
+            except Exception:
+                conn.terminate()
+
+    @staticmethod
+    def _dsn_host() -> str:
+        from sqlalchemy.engine import make_url
+
+        url = make_url(settings.session_dsn)
+        return f"{url.host}:{url.port}"
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        dsn = settings.session_dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        conn = await asyncpg.connect(dsn)
+        lost = asyncio.get_running_loop().create_future()
+        conn.add_termination_listener(lambda _conn: lost.done() or lost.set_result(None))
+        await conn.add_listener(CHANNEL, self._on_notify)
+        self._conn, self._lost = conn, lost
+
+    async def _probe(self) -> bool:
+        """Notify ourselves and return whether the notification arrives."""
+        probe_id = uuid.uuid4().hex
+        probe = self._probes[probe_id] = asyncio.get_running_loop().create_future()
+        try:
+            payload = json.dumps({"table": "", "op": PROBE_OP, "id": probe_id})
+            await self._conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload, timeout=PROBE_TIMEOUT)
+            await asyncio.wait_for(probe, PROBE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            del self._probes[probe_id]
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                await self._connect()
+            except Exception:
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                logger.warning("Change listener could not connect; retrying in %.0fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                continue
+            try:
+                received = await self._probe()
+            except Exception:
+                received = False
+            if not received:
+                await self._close()
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                logger.error(
+                    "Change listener receives no notifications (is %s a transaction-mode pooler? "
+                    "set INVALIDATION_DSN to a direct or session-mode DSN); caches stay bypassed, "
+                    "retrying in %.0fs",
+                    self._dsn_host(), delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+            attempt = 0
+            # Changes made while disconnected were not seen.
+            self._reset_all()
+            self.connected = True
+            interval = settings.invalidation_ping_interval
+            try:
+                # Wake up now and then: a silently dropped TCP connection
+                # only shows when it is used.
+                while True:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(self._lost), interval)
+                        break
+                    except asyncio.TimeoutError:
+                        await self._conn.execute("SELECT 1", timeout=interval)
+            except Exception:
+                pass
+            logger.warning("Change listener connection lost; reconnecting")
+            await self._close()
+
+
+change_listener = ChangeListener()
@@ -0,0 +1,195 @@
+"""
+Prometheus metrics collectors.
+
+All collectors used by the application are declared here so that the
+middleware, the database layer and the services share a single set of
+metric names.  Collectors from ``prometheus_client`` only take a short
+per-metric lock when updated, so they are cheap enough to use on the
+request path.
+
+When the ``PROMETHEUS_MULTIPROC_DIR`` environment variable points to a
+writable directory, ``prometheus_client`` stores samples in memory-mapped
+files in that directory and :func:`render_latest` aggregates the files of
+every uvicorn worker.  The directory must be emptied before the server
+starts.  Without the variable, each worker only reports its own samples.
+
+If the ``prometheus_client`` package is not installed the collectors are
+replaced with no-op stand-ins and :func:`render_latest` raises ImportError.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        REGISTRY,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:  # pragma: no cover - prometheus_client is optional
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    CollectorRegistry = None  # type: ignore
+    REGISTRY = None  # type: ignore
+    generate_latest = None  # type: ignore
+    multiprocess = None  # type: ignore
+
+    class _NoopMetric:
+        """Stand-in used when prometheus_client is not installed."""
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            pass
+
+        def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+            return self
+
+        def inc(self, amount: float = 1) -> None:
+            pass
+
+        def dec(self, amount: float = 1) -> None:
+            pass
+
+        def set(self, value: float) -> None:
+            pass
+
+        def observe(self, value: float) -> None:
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric  # type: ignore
+
+
+# Latency buckets (seconds) tuned for an API whose typical response is a
+# few milliseconds and whose slow path is a pbkdf2 hash.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Total HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+DB_CHECKOUT_DURATION = Histogram(
+    "db_connection_checkout_seconds",
+    "Time spent acquiring a database connection for a session.",
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Sessions of read-only requests by target: replica, or primary when no "
+    "replica is configured or healthy or the client wrote recently.",
+    ["target"],
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured size of the database connection pool (0 means unpooled).",
+    multiprocess_mode="livemax",
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "In-process cache lookups by cache name and result (hit or miss).",
+    ["cache", "result"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced reads by flight group and role: a leader runs the query, "
+    "followers share its result.",
+    ["group", "role"],
+)
+OUTBOX_MESSAGES = Counter(
+    "outbox_messages_total",
+    "Outbox deliveries by kind and outcome: sent, retry (failed, will be "
+    "retried) or failed (gave up after OUTBOX_MAX_ATTEMPTS).",
+    ["kind", "outcome"],
+)
+
+CRYPTO_QUEUE_DEPTH = Gauge(
+    "crypto_executor_queue_depth",
+    "Password hashing jobs waiting for a crypto executor thread.",
+    multiprocess_mode="livesum",
+)
+CRYPTO_DURATION = Histogram(
+    "crypto_executor_job_seconds",
+    "Time spent running a job on the crypto executor.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Largest event loop scheduling delay seen in the last health probe window.",
+    multiprocess_mode="max",
+)
+
+
+class LocalGauge:
+    """Process-local integer gauge that can be read back cheaply.
+
+    Prometheus collectors may be aggregated across workers and are not
+    meant to be read by the application; the health prober needs the
+    values of this process only.  Updates happen on the event loop or
+    under the GIL, so no lock is taken.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        self.value -= amount
+
+
+IN_FLIGHT_REQUESTS = LocalGauge()
+CRYPTO_QUEUED = LocalGauge()
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup so the hit ratio can be derived per cache."""
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Return the exposition payload and its content type.
+
+    In multiprocess mode a fresh registry is built for every scrape so the
+    samples of all workers are merged; otherwise the default registry of
+    the current process is rendered.
+    """
+    if generate_latest is None:
+        raise ImportError("prometheus_client is required to expose metrics")
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
@@ -6,9 +6,27 @@ controls. Use these middlewares to centralize cross‑cutting concerns.
 """
 from __future__ import annotations
 
-from typing import Callable
+import asyncio
+import json
+import re
+import time
+from typing import Callable, Optional
 
 from fastapi import Request, Response
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    IdempotencyTimeout,
+    StoredResponse,
+    fingerprint,
+    idempotency_store,
+)
+from app.core.settings import settings
+from app.db.session import write_cookie
 
 
 class RLSMiddleware:
@@ -26,3 +44,257 @@ class RLSMiddleware:
         # TODO: extract user information from request/session and set RLS variables.
         response = await self.app(request)
         return response
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and in-flight requests.
+
+    Requests are labelled with the route template (``/api/v1/orders/{id}``)
+    rather than the raw path so that path parameters do not explode the
+    label cardinality.  The template is rebuilt from the matched path
+    parameters once the router has run, and remembered so that later
+    requests can be attributed to it before routing, which is what the
+    in-flight gauge needs.
+    """
+
+    def __init__(self, app: ASGIApp, *, exclude_paths: tuple[str, ...] = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude_paths = exclude_paths
+        self._static: dict[str, str] = {}
+        self._patterns: dict[str, re.Pattern[str]] = {}
+
+    def _known_template(self, path: str) -> str:
+        template = self._static.get(path)
+        if template is not None:
+            return template
+        for template, pattern in self._patterns.items():
+            if pattern.match(path):
+                return template
+        return "unmatched"
+
+    def _learn_template(self, scope: Scope) -> str:
+        path = scope["path"]
+        if scope.get("route") is None:
+            return "unmatched"
+        params = scope.get("path_params") or {}
+        if not params:
+            self._static[path] = path
+            return path
+        segments = path.split("/")
+        for name, value in params.items():
+            value = str(value)
+            for index in range(len(segments) - 1, -1, -1):
+                if segments[index] == value:
+                    segments[index] = "{" + name + "}"
+                    break
+        template = "/".join(segments)
+        if template not in self._patterns:
+            self._patterns[template] = compile_path(template)[0]
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = metrics.HTTP_REQUESTS_IN_PROGRESS.labels(
+            method=method, route=self._known_template(scope["path"])
+        )
+        in_progress.inc()
+        metrics.IN_FLIGHT_REQUESTS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            metrics.IN_FLIGHT_REQUESTS.dec()
+            route = self._learn_template(scope)
+            metrics.HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(elapsed)
+            metrics.HTTP_REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware replaying responses of retried POST requests.
+
+    Requests to ``paths`` carrying an ``Idempotency-Key`` header go through
+    ``idempotency_store`` (see ``app.core.idempotency``).  The key is scoped
+    to the caller authenticated by the bearer token, so that clients cannot
+    read each other's responses; a key sent without valid credentials is
+    rejected with 401.  Replayed responses carry
+    ``Idempotent-Replayed: true``.
+    """
+
+    HEADER = b"idempotency-key"
+    MAX_KEY_LENGTH = 255
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        paths: tuple[str, ...] = ("/api/v1/orders/", "/api/v1/messages/"),
+        store: Optional[IdempotencyStore] = None,
+    ) -> None:
+        self.app = app
+        self.paths = paths
+        self.store = store or idempotency_store
+
+    @staticmethod
+    async def _send_json(
+        send: Send, status_code: int, detail: str, headers: Optional[list[tuple[bytes, bytes]]] = None
+    ) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode())] + (headers or []),
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _caller(authorization: Optional[bytes]) -> Optional[str]:
+        """Return the scope of the caller's keys, or None when unauthenticated."""
+        from fastapi import HTTPException
+
+        from app.core.revocation import token_denylist
+        from app.core.security import verify_jwt
+
+        scheme, _, token = (authorization or b"").decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            payload = verify_jwt(token)
+        except HTTPException:
+            return None
+        if not payload.get("sub") or await token_denylist.is_revoked(payload):
+            return None
+        return f"{payload.get('role')}:{payload['sub']}"
+
+    @staticmethod
+    async def _replay(send: Send, response: StoredResponse) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        raw_key = headers.get(self.HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > self.MAX_KEY_LENGTH:
+            await self._send_json(send, 400, "Invalid Idempotency-Key header")
+            return
+
+        # The body is part of the fingerprint, so it is read up front and
+        # handed to the application from memory.
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        caller = await self._caller(headers.get(b"authorization"))
+        if caller is None:
+            await self._send_json(
+                send, 401, "Idempotency-Key requires an authenticated request",
+                [(b"www-authenticate", b"Bearer")],
+            )
+            return
+        key = raw_key.decode("latin-1")
+        fp = fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        try:
+            stored = await self.store.begin(caller, key, fp, settings.idempotency_wait_timeout)
+        except IdempotencyConflict:
+            await self._send_json(send, 422, "Idempotency-Key was already used for a different request")
+            return
+        except IdempotencyTimeout:
+            await self._send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+            return
+        metrics.record_cache_lookup("idempotency", hit=stored is not None)
+        if stored is not None:
+            await self._replay(send, stored)
+            return
+
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = StoredResponse(status=500, headers=[], body=b"")
+        response_body = []
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_wrapper)
+        except BaseException:
+            # shield: release the key even when the request was cancelled.
+            await asyncio.shield(self.store.release(caller, key))
+            raise
+        if response.status >= 500:
+            await self.store.release(caller, key)
+        else:
+            response.body = b"".join(response_body)
+            await self.store.finish(caller, key, response)
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware marking clients that just wrote.
+
+    A successful response to a method other than GET, HEAD or OPTIONS sets
+    a signed cookie (see ``app.db.session.write_cookie``) that sends the
+    client's reads to the primary database for a short while (see
+    ``get_read_session``), so they are not served from a replica that has
+    not replayed the write yet, and past the catalog snapshot (see
+    ``get_catalog_session``), which is republished shortly after a write.
+    The cookie comes back with the client's requests, so this works
+    whichever worker serves them.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", write_cookie())]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
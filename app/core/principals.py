@@ -0,0 +1,69 @@
+"""
+Cache of authenticated principals.
+
+``get_current_user`` checks that the customer or staff member named by a
+token still exists, which would otherwise cost a primary-key lookup on
+every authenticated request.  Found principals are cached per worker for
+``PRINCIPAL_CACHE_TTL`` seconds and dropped as soon as their row changes,
+through the change notifications of ``app.core.invalidation``.  While the
+change listener is disconnected the cache is bypassed, since changes made
+elsewhere would go unnoticed.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from app.core import metrics
+from app.core.invalidation import RowChange, change_listener
+from app.core.settings import settings
+
+TABLES = ("customers", "support_staff")
+
+
+class PrincipalCache:
+    """``(table, id) -> principal`` with TTL and change-driven eviction."""
+
+    def __init__(self, max_entries: int = 50_000) -> None:
+        self.max_entries = max_entries
+        self._entries: dict[tuple[str, str], tuple[float, Any]] = {}
+        # Bumped on every invalidation: a value loaded before a change must
+        # not be cached after the change was seen.
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return change_listener.connected and settings.principal_cache_ttl > 0
+
+    def get(self, table: str, principal_id: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get((table, principal_id))
+        hit = entry is not None and entry[0] > time.monotonic()
+        metrics.record_cache_lookup("principals", hit=hit)
+        return entry[1] if hit else None
+
+    def put(self, table: str, principal_id: str, principal: Any, generation: int) -> None:
+        """Cache a principal loaded when ``generation`` was current."""
+        if not self.enabled or generation != self.generation:
+            return
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[(table, principal_id)] = (time.monotonic() + settings.principal_cache_ttl, principal)
+
+    def invalidate(self, change: RowChange) -> None:
+        self.generation += 1
+        if change.op == "RESET" or change.id is None:
+            for key in [key for key in self._entries if key[0] == change.table]:
+                del self._entries[key]
+        else:
+            self._entries.pop((change.table, str(change.id)), None)
+
+
+principal_cache = PrincipalCache()
+for _table in TABLES:
+    change_listener.subscribe(_table, principal_cache.invalidate)
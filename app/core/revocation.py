@@ -0,0 +1,217 @@
+"""
+Access token revocation.
+
+Access tokens are stateless JWTs, so revoking one before it expires (on
+logout) needs a denylist of token ids (``jti``).  The ``revoked_tokens``
+table is the source of truth shared by all workers; each worker keeps a
+compact in-memory front for it:
+
+* Revocations are grouped into time buckets by token expiry.  A bucket is
+  dropped as soon as every token in it has expired, so the denylist only
+  ever covers tokens that could still be presented.
+* Each bucket is a Bloom filter.  A token that is not in the filter is
+  certainly not revoked, which is the answer for nearly every request and
+  costs no database access.  A filter hit (a revoked token or a rare false
+  positive) is confirmed with a primary-key lookup.
+* A background task polls ``revoked_tokens`` for rows added by other
+  workers every ``TOKEN_REVOCATION_POLL_INTERVAL`` seconds and deletes the
+  expired ones, so a logout takes effect everywhere within one interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from app.core import metrics
+from app.core.settings import settings
+from app.utils.time import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Rows are re-read for this long after the last poll, so that revocations
+# committed late by a slow transaction are not missed.  Adding a token
+# twice is harmless.
+SYNC_OVERLAP = timedelta(seconds=60)
+CLEANUP_INTERVAL = 300.0
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    __slots__ = ("size", "hashes", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: k positions derived from two 64-bit halves.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+class TokenDenylist:
+    """Bloom-filter front for ``revoked_tokens``, bucketed by token expiry."""
+
+    def __init__(
+        self,
+        bucket_seconds: Optional[float] = None,
+        capacity: Optional[int] = None,
+        error_rate: float = 0.01,
+    ) -> None:
+        self._bucket_seconds = bucket_seconds
+        self._capacity = capacity
+        self.error_rate = error_rate
+        self._buckets: dict[int, list[BloomFilter]] = {}
+        self._since: Optional[datetime] = None
+        self._last_cleanup = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def bucket_seconds(self) -> float:
+        return self._bucket_seconds or settings.token_denylist_bucket_seconds
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity or settings.token_denylist_capacity
+
+    # -- in-memory filter ----------------------------------------------------
+
+    def add(self, jti: str, expires_at: Any) -> None:
+        """Record a revoked token in the local filter only."""
+        exp = _timestamp(expires_at)
+        if exp <= time.time():
+            return
+        filters = self._buckets.setdefault(int(exp // self.bucket_seconds), [])
+        # A full filter is not grown; a new one is chained so the false
+        # positive rate stays at ``error_rate``.
+        if not filters or filters[-1].count >= self.capacity:
+            filters.append(BloomFilter(self.capacity, self.error_rate))
+        filters[-1].add(jti)
+
+    def might_be_revoked(self, jti: str, expires_at: Any) -> bool:
+        filters = self._buckets.get(int(_timestamp(expires_at) // self.bucket_seconds), ())
+        return any(jti in bloom for bloom in filters)
+
+    def prune(self) -> None:
+        """Drop the buckets whose tokens have all expired."""
+        current = int(time.time() // self.bucket_seconds)
+        for key in [key for key in self._buckets if key < current]:
+            del self._buckets[key]
+
+    # -- database ------------------------------------------------------------
+
+    async def is_revoked(self, payload: dict[str, Any]) -> bool:
+        """Return True if the token with this decoded payload was revoked."""
+        jti, exp = payload.get("jti"), payload.get("exp")
+        if not jti or exp is None:
+            return False
+        if not self.might_be_revoked(jti, exp):
+            metrics.record_cache_lookup("token_denylist", hit=True)
+            return False
+        metrics.record_cache_lookup("token_denylist", hit=False)
+
+        from sqlalchemy import select
+
+        from app.db.models.revoked_token import RevokedToken
+        from app.db.session import async_session
+
+        async with async_session() as session:
+            found = await session.scalar(select(RevokedToken.jti).where(RevokedToken.jti == jti))
+        return found is not None
+
+    async def revoke(self, payload: dict[str, Any]) -> None:
+        """Revoke the token with this decoded payload for every worker."""
+        from sqlalchemy.dialects.postgresql import insert
+
+        from app.db.models.revoked_token import RevokedToken
+        from app.db.session import async_session
+
+        expires_at = datetime.fromtimestamp(_timestamp(payload["exp"]), tz=timezone.utc)
+        async with async_session() as session:
+            await session.execute(
+                insert(RevokedToken)
+                .values(jti=payload["jti"], client_id=payload.get("client_id"), expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            )
+            await session.commit()
+        self.add(payload["jti"], expires_at)
+
+    async def sync(self) -> int:
+        """Load revocations made since the last sync; return how many were read."""
+        from sqlalchemy import delete, select
+
+        from app.db.models.revoked_token import RevokedToken
+        from app.db.session import async_session
+
+        started = utcnow()
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > started
+        )
+        if self._since is not None:
+            query = query.where(RevokedToken.revoked_at > self._since)
+        async with async_session() as session:
+            rows = (await session.execute(query)).all()
+            if time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL:
+                await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= started))
+                await session.commit()
+                self._last_cleanup = time.monotonic()
+        for row in rows:
+            self.add(row.jti, row.expires_at)
+        self._since = started - SYNC_OVERLAP
+        self.prune()
+        return len(rows)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Load the current denylist, then keep it in sync in the background."""
+        try:
+            await self.sync()
+        except Exception:
+            logger.exception("Could not load revoked tokens; retrying in the background")
+        self._task = asyncio.create_task(self._run(), name="token-denylist-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.token_revocation_poll_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Revoked token sync failed")
+
+
+token_denylist = TokenDenylist()
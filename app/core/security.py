@@ -1,29 +1,194 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, TypeVar, Union, Optional
 
-from jose import jwt
-from passlib.context import CryptContext
 import hashlib
 import base64
-from cryptography.fernet import Fernet
+import uuid
 
-from app.core.config import settings
+from app.core import metrics
+from app.core.settings import settings
 
-# Используем pbkdf2_sha256 вместо bcrypt_sha256: нет ограничения 72 байта и
-# исключается баг wrap‑detector в bcrypt:contentReference[oaicite:2]{index=2}.
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+    from passlib.context import CryptContext
+
+# jose, passlib и cryptography импортируются при первом использовании,
+# чтобы не замедлять старт приложения.
+
+T = TypeVar("T")
+
+
+PASSWORD_SCHEME = "pbkdf2_sha256"
+
+# Допуск вокруг откалиброванного числа раундов: хеши в этих пределах не
+# пересчитываются, иначе шум калибровки вызывал бы rehash после каждого
+# рестарта.
+ROUNDS_TOLERANCE = 0.25
+
+_pwd_context: Optional["CryptContext"] = None
+
+
+def _build_pwd_context(rounds: Optional[int] = None) -> "CryptContext":
+    from passlib.context import CryptContext
+
+    # Используем pbkdf2_sha256 вместо bcrypt_sha256: нет ограничения 72 байта и
+    # исключается баг wrap‑detector в bcrypt:contentReference[oaicite:2]{index=2}.
+    # bcrypt оставлен как устаревшая схема, чтобы старые хеши проверялись и
+    # заменялись при входе.
+    options: dict[str, Any] = {}
+    if rounds:
+        options = {
+            "pbkdf2_sha256__default_rounds": rounds,
+            "pbkdf2_sha256__min_rounds": int(rounds * (1 - ROUNDS_TOLERANCE)),
+            "pbkdf2_sha256__max_rounds": int(rounds * (1 + ROUNDS_TOLERANCE)),
+        }
+    return CryptContext(
+        schemes=[PASSWORD_SCHEME, "bcrypt"], deprecated=["bcrypt"], **options
+    )
+
+
+def get_pwd_context() -> "CryptContext":
+    """Возвращает CryptContext, создавая его при первом обращении."""
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = _build_pwd_context(settings.password_hash_rounds or None)
+    return _pwd_context
+
+
+def calibrate_password_rounds(
+    budget_ms: Optional[float] = None, min_rounds: Optional[int] = None
+) -> int:
+    """
+    Подбирает число раундов pbkdf2, при котором один хеш занимает около
+    budget_ms на текущем CPU (но не меньше min_rounds), и настраивает
+    CryptContext на это значение. Результат округляется до двух значащих
+    цифр, чтобы воркеры на одинаковом железе получали одно и то же число.
+    """
+    from passlib.hash import pbkdf2_sha256
+
+    budget_ms = budget_ms if budget_ms is not None else settings.password_hash_budget_ms
+    min_rounds = min_rounds if min_rounds is not None else settings.password_hash_min_rounds
+
+    sample_rounds = 20000
+    hasher = pbkdf2_sha256.using(rounds=sample_rounds)
+    best = min(_timed(hasher.hash, "calibration") for _ in range(3))
+    rounds = int(budget_ms / 1000 / best * sample_rounds)
+    rounds = max(int(float(f"{rounds:.2g}")), min_rounds)
+    configure_password_rounds(rounds)
+    return rounds
+
+
+def host_calibrated_password_rounds(path: Optional[str] = None) -> int:
+    """
+    Калибрует число раундов один раз на хост: результат сохраняется в файле
+    во временном каталоге, и остальные воркеры (и последующие рестарты)
+    читают его вместо повторной калибровки. Файл пересчитывается, только
+    если изменились PASSWORD_HASH_BUDGET_MS или PASSWORD_HASH_MIN_ROUNDS.
+    """
+    import fcntl
+    import json
+    import os
+    import tempfile
+
+    path = path or os.path.join(tempfile.gettempdir(), "flowerstore-pbkdf2-rounds.json")
+    params = {
+        "budget_ms": settings.password_hash_budget_ms,
+        "min_rounds": settings.password_hash_min_rounds,
+    }
+    with open(path, "a+") as f:
+        # Воркеры, стартующие одновременно, ждут первого, а не калибруют параллельно
+        # (параллельные замеры к тому же мешали бы друг другу).
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            try:
+                cached = json.loads(f.read() or "{}")
+            except ValueError:
+                cached = {}
+            if cached.get("params") == params and cached.get("rounds"):
+                rounds = int(cached["rounds"])
+                configure_password_rounds(rounds)
+                return rounds
+            rounds = calibrate_password_rounds()
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"params": params, "rounds": rounds}))
+            f.flush()
+            return rounds
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def password_rounds() -> int:
+    """
+    Возвращает число раундов pbkdf2 для новых хешей и настраивает на него
+    CryptContext: PASSWORD_HASH_ROUNDS, если задано; иначе, если задан
+    PASSWORD_HASH_BUDGET_MS, значение, откалиброванное для этого хоста;
+    иначе PASSWORD_HASH_MIN_ROUNDS.
+    """
+    if settings.password_hash_rounds:
+        rounds = settings.password_hash_rounds
+    elif settings.password_hash_budget_ms:
+        return host_calibrated_password_rounds()
+    else:
+        rounds = settings.password_hash_min_rounds
+    configure_password_rounds(rounds)
+    return rounds
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def configure_password_rounds(rounds: int) -> None:
+    """Задаёт число раундов для новых хешей и для проверки needs_update."""
+    global _pwd_context
+    _pwd_context = _build_pwd_context(rounds)
+
+
+def password_needs_rehash(hashed_password_bytes: bytes, password_algo: Optional[str] = None) -> bool:
+    """
+    True, если хеш создан другой схемой или с числом раундов вне допуска
+    текущей калибровки. Вызывать только после успешной проверки пароля.
+    """
+    if password_algo is not None and password_algo != PASSWORD_SCHEME:
+        return True
+    try:
+        return get_pwd_context().needs_update(hashed_password_bytes.decode("utf-8"))
+    except Exception:
+        return False
+
+
+def __getattr__(name: str) -> Any:
+    # Совместимость: раньше pwd_context создавался при импорте модуля.
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # --- Хелпер для шифрования (Fernet) ---
-def _get_fernet() -> Fernet:
+@lru_cache(maxsize=4)
+def _fernet_for(encryption_key: str) -> "Fernet":
+    from cryptography.fernet import Fernet
+
+    secure_key = base64.urlsafe_b64encode(hashlib.sha256(encryption_key.encode("utf-8")).digest())
+    return Fernet(secure_key)
+
+
+def _get_fernet() -> "Fernet":
     """
     Генерирует валидный ключ Fernet на основе ENCRYPTION_KEY из .env.
     Fernet требует 32 url‑safe base64 байта. Мы хешируем ключ, чтобы
-    получить нужную длину.
+    получить нужную длину. Экземпляр кешируется для каждого ключа.
     """
-    key_bytes = settings.ENCRYPTION_KEY.encode("utf-8")
-    secure_key = base64.urlsafe_b64encode(hashlib.sha256(key_bytes).digest())
-    return Fernet(secure_key)
+    return _fernet_for(settings.encryption_key)
 
 
 def encrypt_data(data: Optional[str]) -> Optional[bytes]:
@@ -50,7 +215,7 @@ def decrypt_data(data: Optional[bytes]) -> Optional[str]:
 def hash_email(email: str) -> bytes:
     """Хеширует email с солью (pepper) для безопасного поиска. Возвращает bytes."""
     clean_email = email.lower().strip()
-    payload = (clean_email + settings.EMAIL_PEPPER).encode("utf-8")
+    payload = (clean_email + settings.email_pepper).encode("utf-8")
     return hashlib.sha256(payload).digest()
 
 
@@ -58,31 +223,122 @@ def verify_password(plain_password: str, hashed_password_bytes: bytes) -> bool:
     """Проверяет пароль. Принимает хеш в байтах, декодирует его для Passlib."""
     try:
         hashed_password_str = hashed_password_bytes.decode("utf-8")
-        return pwd_context.verify(plain_password, hashed_password_str)
+        return get_pwd_context().verify(plain_password, hashed_password_str)
     except Exception:
         return False
 
 
 def get_password_hash(password: str) -> bytes:
     """Хеширует пароль и возвращает bytes для сохранения в BYTEA колонку."""
-    hash_str = pwd_context.hash(password)
+    hash_str = get_pwd_context().hash(password)
     return hash_str.encode("utf-8")
 
 
+# --- Пул потоков для CPU-затратной криптографии ---
+
+_crypto_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_crypto_executor() -> ThreadPoolExecutor:
+    """Лениво создаёт пул потоков для хеширования паролей."""
+    global _crypto_executor
+    if _crypto_executor is None:
+        _crypto_executor = ThreadPoolExecutor(
+            max_workers=settings.crypto_executor_workers,
+            thread_name_prefix="crypto",
+        )
+    return _crypto_executor
+
+
+async def run_crypto(func: Callable[..., T], *args: Any) -> T:
+    """
+    Выполняет func(*args) в пуле потоков, не блокируя event loop.
+    pbkdf2 в hashlib освобождает GIL, поэтому потоки работают параллельно.
+    Глубина очереди (задачи, ещё не взятые потоком) экспортируется в метрики.
+    """
+    metrics.CRYPTO_QUEUE_DEPTH.inc()
+    metrics.CRYPTO_QUEUED.inc()
+    dequeued = threading.Lock()
+
+    def _dequeue() -> None:
+        # Снять задачу с очереди может и поток, и отменённая корутина, причём
+        # одновременно; захватывает блокировку и уменьшает счётчики только одна
+        # сторона.
+        if dequeued.acquire(blocking=False):
+            metrics.CRYPTO_QUEUE_DEPTH.dec()
+            metrics.CRYPTO_QUEUED.dec()
+
+    def _job() -> T:
+        _dequeue()
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            metrics.CRYPTO_DURATION.labels(operation=func.__name__).observe(
+                time.perf_counter() - start
+            )
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_crypto_executor(), _job)
+    finally:
+        # Задача отменена до того, как поток её взял (иначе ничего не делает).
+        _dequeue()
+
+
 # --- JWT Token ---
 
 def create_access_token(
     subject: Union[str, Any],
     expires_delta: timedelta | None = None,
+    *,
+    role: str = "customer",
+    client_id: Union[str, Any, None] = None,
 ) -> str:
-    """Создаёт JWT токен."""
+    """
+    Создаёт JWT токен. Кроме sub и exp токен содержит jti (для отзыва при
+    logout), роль и client_id, чтобы зависимостям не нужен был запрос в БД.
+    """
+    from jose import jwt
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
 
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+        "role": role,
+        "client_id": str(client_id) if client_id is not None else None,
+    }
     encoded_jwt = jwt.encode(
-        to_encode, settings.JWT_SECRET_KEY, algorithm=settings.ALGORITHM
+        to_encode, settings.jwt_secret_key, algorithm=settings.algorithm
     )
     return encoded_jwt
+
+
+def verify_jwt(token: str) -> dict:
+    """
+    Проверяет подпись и срок действия JWT и возвращает payload.
+    При ошибке выбрасывает HTTPException 401. Отзыв токена проверяет
+    app.core.revocation.token_denylist.
+    """
+    from fastapi import HTTPException, status
+    from jose import JWTError, jwt
+
+    try:
+        payload = jwt.decode(
+            token,
+            settings.jwt_secret_key,
+            algorithms=[settings.algorithm],
+            options={"require_exp": True, "require_sub": True, "require_jti": True},
+        )
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
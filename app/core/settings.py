@@ -7,9 +7,15 @@ This module tries to import ``BaseSettings`` from ``pydantic_settings``
 and falls back to importing from ``pydantic`` if necessary.  It also
 defines a ``Settings`` class for loading environment variables and
 constructing a PostgreSQL DSN from individual database parameters.
+
+This is the only settings source of the application; ``app.config`` and
+``app.core.config`` re-export it.  The module-level ``settings`` object is
+a proxy that parses the environment and ``.env`` on first attribute
+access, so importing the application does not require any configuration.
 """
 from __future__ import annotations
 
+import re
 from functools import lru_cache
 
 try:
@@ -34,6 +40,128 @@ class Settings(BaseSettings):
     encryption_key: str = Field(..., env="ENCRYPTION_KEY")
     email_pepper: str = Field(..., env="EMAIL_PEPPER")
     jwt_secret_key: str = Field(..., env="JWT_SECRET_KEY")
+    algorithm: str = Field("HS256", env="ALGORITHM")
+    access_token_expire_minutes: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+
+    # Connection pooling.  0 keeps the default NullPool, which suits an
+    # external pooler such as Supavisor; a positive value enables an
+    # in-process QueuePool of that size.
+    db_pool_size: int = Field(0, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+
+    # Read replicas: comma-separated DSNs for read-only requests (empty sends
+    # everything to the primary).  A replica that fails to connect is
+    # skipped for DB_REPLICA_RETRY_SECONDS, and a client that wrote reads
+    # from the primary for DB_REPLICA_STICKY_SECONDS to see its own writes.
+    db_replica_dsns: str = Field("", env="DB_REPLICA_DSNS")
+    db_replica_retry_seconds: float = Field(30.0, env="DB_REPLICA_RETRY_SECONDS")
+    db_replica_sticky_seconds: float = Field(5.0, env="DB_REPLICA_STICKY_SECONDS")
+
+    # Health prober: how often to probe and when to report "not ready".
+    health_probe_interval: float = Field(5.0, env="HEALTH_PROBE_INTERVAL")
+    health_probe_timeout: float = Field(2.0, env="HEALTH_PROBE_TIMEOUT")
+    health_max_loop_lag_ms: float = Field(500.0, env="HEALTH_MAX_LOOP_LAG_MS")
+    health_max_pool_saturation: float = Field(0.95, env="HEALTH_MAX_POOL_SATURATION")
+    health_max_crypto_queue: int = Field(64, env="HEALTH_MAX_CRYPTO_QUEUE")
+    health_max_in_flight: int = Field(0, env="HEALTH_MAX_IN_FLIGHT")  # 0 disables
+
+    # Token revocation: denylist buckets group tokens by expiry; each bucket's
+    # Bloom filter is sized for this many revocations.  Workers pick up
+    # revocations from other workers every poll interval.
+    token_denylist_bucket_seconds: float = Field(300.0, env="TOKEN_DENYLIST_BUCKET_SECONDS")
+    token_denylist_capacity: int = Field(10000, env="TOKEN_DENYLIST_CAPACITY")
+    token_revocation_poll_interval: float = Field(2.0, env="TOKEN_REVOCATION_POLL_INTERVAL")
+
+    # Change notifications: listener DSN (default: the database DSN; must not
+    # be a transaction-mode pooler, and also serves the other connections
+    # that keep session state, see ``session_dsn``), liveness ping interval,
+    # and how long a principal stays cached (entries are dropped when their
+    # row changes).
+    invalidation_dsn: str = Field("", env="INVALIDATION_DSN")
+    invalidation_ping_interval: float = Field(30.0, env="INVALIDATION_PING_INTERVAL")
+    principal_cache_ttl: float = Field(3600.0, env="PRINCIPAL_CACHE_TTL")
+
+    # Seconds between incremental syncs of the product autocomplete index
+    # (only while change notifications are unavailable).
+    product_index_sync_interval: float = Field(30.0, env="PRODUCT_INDEX_SYNC_INTERVAL")
+
+    # Catalog snapshot shared by the workers of a host: file path (default:
+    # in the temp directory) and seconds between catalog version checks
+    # (changes are also picked up as soon as they are notified).
+    catalog_snapshot_path: str = Field("", env="CATALOG_SNAPSHOT_PATH")
+    catalog_snapshot_interval: float = Field(60.0, env="CATALOG_SNAPSHOT_INTERVAL")
+
+    # Low-stock scanner: seconds between scans and comma-separated alert
+    # recipients (alerts are only logged when empty).
+    low_stock_scan_interval: float = Field(60.0, env="LOW_STOCK_SCAN_INTERVAL")
+    low_stock_alert_recipients: str = Field("", env="LOW_STOCK_ALERT_RECIPIENTS")
+
+    # Edge caching of catalog responses: seconds browsers may keep them,
+    # seconds the CDN keeps catalog and search responses (purged on product
+    # writes), how long stale copies may be served while revalidating or on
+    # errors, and the purger ("local" records purges only, or "fastly").
+    cdn_browser_max_age: int = Field(60, env="CDN_BROWSER_MAX_AGE")
+    cdn_catalog_max_age: int = Field(86400, env="CDN_CATALOG_MAX_AGE")
+    cdn_search_max_age: int = Field(300, env="CDN_SEARCH_MAX_AGE")
+    cdn_stale_while_revalidate: int = Field(60, env="CDN_STALE_WHILE_REVALIDATE")
+    cdn_stale_if_error: int = Field(86400, env="CDN_STALE_IF_ERROR")
+    cdn_purger: str = Field("local", env="CDN_PURGER")
+    fastly_service_id: str = Field("", env="FASTLY_SERVICE_ID")
+    fastly_api_token: str = Field("", env="FASTLY_API_TOKEN")
+
+    # Outbox dispatcher: messages claimed per batch, concurrent sends,
+    # attempts before a message is marked failed, seconds between polls (new
+    # messages are also picked up as soon as they are notified), seconds a
+    # claimed message stays reserved for its dispatcher, and days sent
+    # messages are kept.
+    outbox_batch_size: int = Field(100, env="OUTBOX_BATCH_SIZE")
+    outbox_concurrency: int = Field(10, env="OUTBOX_CONCURRENCY")
+    outbox_max_attempts: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_poll_interval: float = Field(5.0, env="OUTBOX_POLL_INTERVAL")
+    outbox_lease_seconds: float = Field(300.0, env="OUTBOX_LEASE_SECONDS")
+    outbox_retention_days: int = Field(7, env="OUTBOX_RETENTION_DAYS")
+
+    # Monthly partitions of messages and audit_logs: months created ahead,
+    # months of data kept (0 keeps everything), whether expired months are
+    # dropped rather than only detached for archiving, and seconds between
+    # maintenance runs.
+    partition_months_ahead: int = Field(3, env="PARTITION_MONTHS_AHEAD")
+    messages_retention_months: int = Field(0, env="MESSAGES_RETENTION_MONTHS")
+    audit_log_retention_months: int = Field(0, env="AUDIT_LOG_RETENTION_MONTHS")
+    partition_drop_expired: bool = Field(False, env="PARTITION_DROP_EXPIRED")
+    partition_maintenance_interval: float = Field(6 * 3600.0, env="PARTITION_MAINTENANCE_INTERVAL")
+
+    # Order pricing.  Tax is charged on the discounted subtotal, in basis
+    # points; orders from ORDER_DISCOUNT_MIN_SUBTOTAL_CENTS get
+    # ORDER_DISCOUNT_BP off (0 disables the discount).
+    order_tax_bp: int = Field(800, env="ORDER_TAX_BP")
+    order_shipping_cents: int = Field(999, env="ORDER_SHIPPING_CENTS")
+    order_free_shipping_min_cents: int = Field(7500, env="ORDER_FREE_SHIPPING_MIN_CENTS")
+    order_discount_bp: int = Field(0, env="ORDER_DISCOUNT_BP")
+    order_discount_min_subtotal_cents: int = Field(0, env="ORDER_DISCOUNT_MIN_SUBTOTAL_CENTS")
+
+    # Idempotency keys: seconds a stored response is replayed, seconds a key
+    # stays reserved for the request running it (after which a worker that
+    # died is assumed gone), and how long a duplicate waits for the original.
+    idempotency_ttl: float = Field(86400.0, env="IDEMPOTENCY_TTL")
+    idempotency_lease_seconds: float = Field(120.0, env="IDEMPOTENCY_LEASE_SECONDS")
+    idempotency_wait_timeout: float = Field(30.0, env="IDEMPOTENCY_WAIT_TIMEOUT")
+
+    # Seconds before cached schema metadata is refreshed in the background.
+    schema_cache_ttl: float = Field(300.0, env="SCHEMA_CACHE_TTL")
+
+    # Password hashing cost: PASSWORD_HASH_ROUNDS pbkdf2 rounds when set.
+    # Otherwise, with PASSWORD_HASH_BUDGET_MS, the rounds are calibrated once
+    # per host so that one hash takes about that long on its CPU, never below
+    # the minimum; with neither, the minimum (the passlib default) is used.
+    # Every doubling of the cost halves the logins a worker can serve.
+    password_hash_budget_ms: float = Field(0.0, env="PASSWORD_HASH_BUDGET_MS")
+    password_hash_rounds: int = Field(0, env="PASSWORD_HASH_ROUNDS")
+    password_hash_min_rounds: int = Field(29000, env="PASSWORD_HASH_MIN_ROUNDS")
+
+    # Threads used to run password hashing off the event loop.
+    crypto_executor_workers: int = Field(4, env="CRYPTO_EXECUTOR_WORKERS")
 
     @property
     def dsn(self) -> str:
@@ -43,6 +171,24 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def session_dsn(self) -> str:
+        """Return the DSN of connections that keep session state.
+
+        ``LISTEN`` and session-level advisory locks belong to a server
+        connection, which a transaction-mode pooler hands to another client
+        after every transaction.  ``INVALIDATION_DSN`` (a direct or
+        session-mode DSN) is used for them when set.
+        """
+        if not self.invalidation_dsn:
+            return self.dsn
+        return re.sub(r"^postgres(ql)?://", "postgresql+asyncpg://", self.invalidation_dsn)
+
+    @property
+    def replica_dsns(self) -> list[str]:
+        """Return the configured read replica DSNs."""
+        return [dsn.strip() for dsn in self.db_replica_dsns.split(",") if dsn.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -55,5 +201,17 @@ def get_settings() -> Settings:
     return Settings()
 
 
-# Create a module-level settings instance
-settings = get_settings()
\ No newline at end of file
+class _LazySettings:
+    """Proxy that resolves attributes on the cached ``Settings`` instance."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy {get_settings()!r}>"
+
+
+# Module-level settings; the environment is read on first use.
+settings: Settings = _LazySettings()  # type: ignore[assignment]
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When many requests ask for the same thing at the same moment (a traffic
+spike on the catalog, a cold start), running the same query once per
+request wastes database connections on identical work.  ``SingleFlight``
+lets the first caller for a key run the query while every identical
+caller arriving before it finishes awaits the same result.  Nothing is
+kept afterwards: the next caller runs the query again, so results are
+never staler than the query that is still in flight.
+
+Callers share the result object, so it must be treated as read-only.  ORM
+instances in it belong to the leader's session; they are fully loaded
+(apart from deferred columns) and safe to serialize from any request.
+
+``singleflight_calls_total`` counts leaders and followers per flight
+group; the coalescing ratio is ``followers / (leaders + followers)``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from app.core import metrics
+
+T = TypeVar("T")
+
+
+class _Abandoned(Exception):
+    """The leader was cancelled before producing a result."""
+
+
+def statement_key(statement: Any) -> Hashable:
+    """Return a key identifying a SQLAlchemy statement and its parameters.
+
+    Uses SQLAlchemy's statement cache key (as its dogpile caching example
+    does), which is far cheaper than compiling the statement to SQL.
+    """
+    cache_key = statement._generate_cache_key()
+    return cache_key.key, tuple(repr(bind.effective_value) for bind in cache_key.bindparams)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``await fn()``, sharing one call among concurrent callers of ``key``."""
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                break
+            metrics.SINGLEFLIGHT_CALLS.labels(group=self.name, role="follower").inc()
+            try:
+                # shield: a follower going away must not cancel the flight.
+                return await asyncio.shield(flight)
+            except _Abandoned:
+                # The leader was cancelled; run it again, maybe as leader.
+                continue
+
+        metrics.SINGLEFLIGHT_CALLS.labels(group=self.name, role="leader").inc()
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except Exception as exc:
+            flight.set_exception(exc)
+            raise
+        except BaseException:
+            flight.set_exception(_Abandoned())
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+            # Mark the exception as retrieved when nobody was waiting.
+            if flight.done() and not flight.cancelled():
+                flight.exception()
@@ -0,0 +1,147 @@
+"""
+Cached schema metadata.
+
+Queries against ``information_schema`` are slow on busy catalogs, and the
+endpoints exposing the schema (``/`` and ``/dbinfo/tables``) are hit by
+load balancers and scanners.  The metadata is therefore loaded once at
+startup into ``schema_cache`` and served from memory.  When the data is
+older than ``SCHEMA_CACHE_TTL`` seconds the stale copy is still served
+while a single background refresh runs; ``refresh()`` reloads it on
+demand.
+
+Besides table names, each entry carries the planner's row estimate from
+``pg_class.reltuples``, the on-disk size and the index definitions, which
+is what capacity planning needs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+RELKINDS = {"r": "table", "p": "partitioned table", "v": "view", "m": "materialized view", "f": "foreign table"}
+
+TABLES_SQL = text(
+    """
+    SELECT c.relname AS table_name,
+           c.relkind AS relkind,
+           GREATEST(c.reltuples, 0)::bigint AS row_estimate,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    ORDER BY c.relname
+    """
+)
+
+INDEXES_SQL = text(
+    """
+    SELECT tablename, indexname, indexdef
+    FROM pg_indexes
+    WHERE schemaname = 'public'
+    ORDER BY tablename, indexname
+    """
+)
+
+
+@dataclass
+class TableInfo:
+    """Metadata of one relation in the public schema."""
+
+    table_name: str
+    kind: str
+    row_estimate: int
+    total_bytes: int
+    indexes: list[dict[str, str]] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class SchemaCache:
+    """In-memory copy of the public schema metadata with TTL refresh."""
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        self._ttl = ttl
+        self._tables: Optional[list[TableInfo]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else settings.schema_cache_ttl
+
+    @property
+    def loaded_at(self) -> float:
+        return self._loaded_at
+
+    async def get(self) -> list[TableInfo]:
+        """Return the cached metadata, loading it if it was never loaded."""
+        if self._tables is None:
+            metrics.record_cache_lookup("schema", hit=False)
+            return await self.refresh()
+        metrics.record_cache_lookup("schema", hit=True)
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self._schedule_refresh()
+        return self._tables
+
+    async def table_names(self) -> list[str]:
+        return [table.table_name for table in await self.get()]
+
+    async def refresh(self) -> list[TableInfo]:
+        """Reload the metadata now; concurrent callers share one query."""
+        started = time.monotonic()
+        async with self._lock:
+            # Another caller refreshed while we waited for the lock.
+            if self._tables is not None and self._loaded_at >= started:
+                return self._tables
+            self._tables = await self._load()
+            self._loaded_at = time.monotonic()
+            return self._tables
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Schema metadata refresh failed; serving stale data")
+
+    @staticmethod
+    async def _load() -> list[TableInfo]:
+        from app.db.session import async_session
+
+        async with async_session() as session:
+            tables = (await session.execute(TABLES_SQL)).all()
+            indexes = (await session.execute(INDEXES_SQL)).all()
+        by_table: dict[str, list[dict[str, str]]] = {}
+        for row in indexes:
+            by_table.setdefault(row.tablename, []).append(
+                {"name": row.indexname, "definition": row.indexdef}
+            )
+        return [
+            TableInfo(
+                table_name=row.table_name,
+                kind=RELKINDS.get(row.relkind, row.relkind),
+                row_estimate=row.row_estimate,
+                total_bytes=row.total_bytes,
+                indexes=by_table.get(row.table_name, []),
+            )
+            for row in tables
+        ]
+
+
+schema_cache = SchemaCache()
@@ -5,8 +5,14 @@ Import all ORM models so that metadata can be accessed by Alembic or during star
 from .customer import Customer  # noqa: F401
 from .support_staff import SupportStaff  # noqa: F401
 from .product import Product  # noqa: F401
+from .product_facet import ProductFacetCount  # noqa: F401
 from .order import Order  # noqa: F401
+from .order_item import OrderItem  # noqa: F401
+from .customer_order_summary import CustomerOrderSummary  # noqa: F401
 from .message import Message  # noqa: F401
 from .user import User  # noqa: F401
+from .revoked_token import RevokedToken  # noqa: F401
+from .outbox_message import OutboxMessage  # noqa: F401
+from .idempotency_key import IdempotencyKey  # noqa: F401
 from .customer import Customer
 
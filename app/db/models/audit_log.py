@@ -1,7 +1,11 @@
 """
 AuditLog model definition.
 
-This model records changes to other tables. It maps to the audit_logs table.
+This model records changes to other tables. It maps to the audit_logs table,
+which is range partitioned by month on ``event_time`` (see
+``app/db/sql/0007_monthly_partitions.sql``); the primary key includes
+``event_time`` as partitioning requires, while the mapper identifies rows by
+``id`` alone.
 """
 
 import uuid
@@ -16,7 +20,7 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    event_time = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    event_time = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
     table_name = Column(String, nullable=False)
     operation = Column(String, nullable=False)
     actor_uuid = Column(UUID(as_uuid=True), nullable=True)
@@ -28,3 +32,6 @@ class AuditLog(Base):
     changed_fields = Column(ARRAY(String), nullable=True)
     session_id = Column(UUID(as_uuid=True), nullable=True)
     request_id = Column(String, nullable=True)
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (event_time)"}
+    __mapper_args__ = {"primary_key": [id]}
@@ -14,7 +14,7 @@ class Customer(Base):
     # password_hash хранится как байты
     password_hash = Column(LargeBinary, nullable=False)
     
-    password_algo = Column(String, default="bcrypt", nullable=False)
+    password_algo = Column(String, default="pbkdf2_sha256", nullable=False)
     password_changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # PII данные хранятся в зашифрованном виде (BYTEA)
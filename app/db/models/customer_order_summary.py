@@ -0,0 +1,29 @@
+"""
+SQLAlchemy model for per-customer order summaries.
+
+One row per customer and currency with the number of orders, the lifetime
+spend (orders not cancelled) and the most recent order.  The table is
+maintained by a trigger on ``orders`` (see
+``app/db/sql/0005_order_history.sql``) and must not be written by the
+application.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, CHAR, Column, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class CustomerOrderSummary(Base):
+    """Order totals of one customer in one currency."""
+
+    __tablename__ = "customer_order_summaries"
+
+    client_id = Column(UUID(as_uuid=True), primary_key=True)
+    currency = Column(CHAR(3), primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default="0")
+    lifetime_spend_cents = Column(BigInteger, nullable=False, server_default="0")
+    last_order_id = Column(UUID(as_uuid=True), nullable=True)
+    last_order_at = Column(DateTime(timezone=True), nullable=True)
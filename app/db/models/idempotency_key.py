@@ -0,0 +1,30 @@
+"""
+IdempotencyKey model definition.
+
+One row per ``Idempotency-Key`` sent with a POST (see
+``app.core.idempotency``), shared by all workers so that a retry is
+recognised whichever worker it reaches.  A row is ``pending`` while the
+original request runs, then ``done`` with the stored response.  Rows are
+only needed until ``expires_at``: a pending row whose worker died is
+claimed again after its lease, and expired rows are deleted.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)  # the authenticated caller
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status = Column(String, nullable=False, server_default="pending")  # pending or done
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSONB, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
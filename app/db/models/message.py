@@ -9,6 +9,11 @@ be handled at the service layer.
 The ``metadata`` column name is reserved in SQLAlchemy declarative models,
 so we name the attribute ``metadata_json`` while mapping it to the underlying
 ``metadata`` column in the database.
+
+The table is range partitioned by month on ``created_at`` (see
+``app/db/sql/0007_monthly_partitions.sql``), so its primary key has to
+include ``created_at``; the mapper still identifies messages by ``id``
+alone.
 """
 
 from __future__ import annotations
@@ -19,6 +24,7 @@ from sqlalchemy import (
     String,
     Boolean,
     DateTime,
+    Index,
     JSON,
     func,
 )
@@ -43,10 +49,18 @@ class Message(Base):
     # ``metadata`` — зарезервированное имя в SQLAlchemy; используем другое имя
     # для атрибута, но оставляем имя столбца «metadata» в базе данных.
     metadata_json = Column("metadata", JSON, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Message listing, newest first (keyset pagination); partitioned like
+        # the table, see 0013_messages_created_index.sql.
+        Index("ix_messages_created", created_at.desc(), id.desc()),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
@@ -2,9 +2,9 @@
 SQLAlchemy model for orders.
 
 Represents a customer order in the system. Each order belongs to a customer
-(`client_id`) and contains aggregated totals for the items purchased. In a
-full implementation there would also be an ``OrderItem`` model referencing
-products, but this simplified version focuses on the order header only.
+(`client_id`) and contains aggregated totals for the items purchased; the
+purchased products are the ``OrderItem`` rows referencing the order.  The
+totals are computed by the server at checkout (see ``order_service``).
 """
 
 from __future__ import annotations
@@ -21,6 +21,7 @@ from sqlalchemy import (
     CHAR,
     func,
     CheckConstraint,
+    Index,
 )
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -45,7 +46,8 @@ class Order(Base):
     status = Column(String, nullable=False, server_default="pending")
     notes = Column(String, nullable=True)
     internal_notes = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Never NULL: the order history is paginated on (created_at, id).
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     confirmed_at = Column(DateTime(timezone=True), nullable=True)
     shipped_at = Column(DateTime(timezone=True), nullable=True)
@@ -59,4 +61,6 @@ class Order(Base):
         CheckConstraint("shipping_cents >= 0", name="ck_order_shipping_non_negative"),
         CheckConstraint("tax_cents >= 0", name="ck_order_tax_non_negative"),
         CheckConstraint("total_cents >= 0", name="ck_order_total_non_negative"),
+        # A customer's order history, newest first (keyset pagination).
+        Index("ix_orders_client_created", "client_id", created_at.desc(), id.desc()),
     )
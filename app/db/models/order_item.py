@@ -0,0 +1,47 @@
+"""
+SQLAlchemy model for order line items.
+
+Each row is one product line of an order.  The SKU, name and unit price are
+copied from the product at checkout so that later catalog changes do not
+alter past orders.
+"""
+
+from __future__ import annotations
+
+import uuid
+from sqlalchemy import (
+    Column,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    func,
+    CheckConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import Base
+
+
+class OrderItem(Base):
+    """A product line of an order."""
+
+    __tablename__ = "order_items"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    order_id = Column(
+        UUID(as_uuid=True), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    product_id = Column(UUID(as_uuid=True), nullable=False)  # foreign key omitted
+    sku = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price_cents = Column(BigInteger, nullable=False)
+    line_total_cents = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint("quantity > 0", name="ck_order_item_quantity_positive"),
+        CheckConstraint("unit_price_cents >= 0", name="ck_order_item_price_non_negative"),
+    )
@@ -0,0 +1,40 @@
+"""
+SQLAlchemy model for the transactional outbox.
+
+Emails and events are written to ``outbox`` in the same transaction as
+the change that causes them, so they are sent if and only if the change
+commits, and delivered later by ``app.services.outbox.OutboxDispatcher``
+without holding up the request.  Pending rows are found through the
+partial index ``ix_outbox_pending``; ``available_at`` is when a row may
+next be claimed (after a retry delay, or once the lease of a dispatcher
+that died while sending it runs out).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class OutboxMessage(Base):
+    """An email or event waiting to be delivered."""
+
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    kind = Column(String, nullable=False)  # email or event
+    topic = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, server_default="pending")  # pending, sent or failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_pending", "available_at", "id", postgresql_where=text("status = 'pending'")),
+    )
@@ -3,6 +3,10 @@ SQLAlchemy model for products.
 
 This model maps to the ``products`` table in the database. It stores
 information about items that can be purchased in the flower store.
+
+``search_vector`` is generated by PostgreSQL from the name and description
+for full-text search (see ``app/db/sql/0002_product_search.sql``).  It is
+deferred so that ordinary product queries do not load it.
 """
 
 from __future__ import annotations
@@ -17,12 +21,23 @@ from sqlalchemy import (
     BigInteger,
     CheckConstraint,
     CHAR,
+    Computed,
+    Index,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 
 from app.db.base import Base
 
+# Products needing restock.  The partial index below holds only these rows,
+# so the low-stock scanner reads a handful of index entries however large
+# the catalog is; queries must repeat the predicate verbatim to use it.
+LOW_STOCK_PREDICATE = (
+    "is_active AND deleted_at IS NULL AND stock - reserved_stock <= low_stock_threshold"
+)
+
 
 class Product(Base):
     """Represents a purchasable product in the store."""
@@ -48,8 +63,22 @@ class Product(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     version = Column(Integer, nullable=False, server_default="1")
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
 
     __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_low_stock", "id", postgresql_where=text(LOW_STOCK_PREDICATE)),
+        # Catalog browsing pages, in page order (see 0012_product_browse_index.sql).
+        Index("ix_products_browse", "name", "id", postgresql_where=text("is_active AND deleted_at IS NULL")),
         CheckConstraint("stock >= 0", name="ck_product_stock_non_negative"),
         CheckConstraint(
             "reserved_stock <= stock", name="ck_product_reserved_le_stock"
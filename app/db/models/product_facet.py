@@ -0,0 +1,25 @@
+"""
+SQLAlchemy model for precomputed product facet counts.
+
+One row per facet value (``category``, ``price``, ``featured``,
+``in_stock``) with the number of active products having it.  The table is
+maintained by a trigger on ``products`` (see
+``app/db/sql/0003_product_facets.sql``) and must not be written by the
+application.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, String
+
+from app.db.base import Base
+
+
+class ProductFacetCount(Base):
+    """Number of active products per facet value."""
+
+    __tablename__ = "product_facet_counts"
+
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default="0")
@@ -0,0 +1,22 @@
+"""
+RevokedToken model definition.
+
+One row per access token revoked before its expiry (e.g. on logout).  Rows
+are only needed until ``expires_at``; workers load new rows into their
+in-memory denylist and delete the expired ones.
+"""
+
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    client_id = Column(UUID(as_uuid=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -1,27 +1,38 @@
 """
-SQLAlchemy model for the unified users view.
+SQLAlchemy model for the user directory.
 
-In PostgreSQL, the application defines a view ``users_view`` that unions
-customers and support staff. This model maps to that view, allowing
-queries to return a unified representation of both types of user. Note
-that since this maps to a view rather than a table, it should be marked
-as read-only and does not define a primary key constraint on the view.
+``users_view`` unions customers and support staff, so listing users
+through it scans both tables on every call.  ``user_directory`` holds the
+same rows as a table, kept up to date row by row by triggers on
+``customers`` and ``support_staff`` (see
+``app/db/sql/0009_user_directory.sql``), and indexed for keyset
+pagination newest first, unfiltered or filtered by role, active flag or
+both: each filter has an index that returns its rows in page order.  The
+table is maintained by the database and must not be written by the
+application.  Customer names are encrypted at rest and are NULL here.
 """
 
 from __future__ import annotations
 
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Index, String
+from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base import Base
 
 
 class User(Base):
-    __tablename__ = "users_view"
-    __table_args__ = {"info": {"read_only": True}}
+    __tablename__ = "user_directory"
 
-    id = Column(String, primary_key=True)  # UUID stored as string
+    id = Column(UUID(as_uuid=True), primary_key=True)
     role = Column(String, nullable=False)
     full_name = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False)
     is_active = Column(Boolean, nullable=False)
     exists = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_directory_created", created_at.desc(), id.desc()),
+        Index("ix_user_directory_role_created", "role", created_at.desc(), id.desc()),
+        Index("ix_user_directory_active_created", "is_active", created_at.desc(), id.desc()),
+        Index("ix_user_directory_role_active_created", "role", "is_active", created_at.desc(), id.desc()),
+    )
@@ -0,0 +1,51 @@
+"""
+Schema bootstrap for empty databases.
+
+The production schema (including row-level security policies) is managed
+outside the application.  Load tests, plan checks and local development
+need an equivalent schema on a throwaway database, so this module creates
+the tables for every model in ``app.db.models`` and then applies the SQL
+files in ``app/db/sql`` in file-name order for the objects the ORM cannot
+express (views, triggers, functions).  Every SQL file must be idempotent.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import MetaData
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+SQL_DIR = Path(__file__).with_name("sql")
+
+
+def all_metadata() -> list[MetaData]:
+    """Return the metadata of every declarative base used by the models."""
+    import app.db.models  # noqa: F401  (registers the models)
+    from app.db.models.audit_log import AuditLog  # noqa: F401
+    from app.db.base import Base
+    from app.db.base_class import Base as LegacyBase
+
+    return [LegacyBase.metadata, Base.metadata]
+
+
+def sql_files() -> list[Path]:
+    """Return the SQL files applied after the ORM tables, in order."""
+    return sorted(SQL_DIR.glob("*.sql"))
+
+
+async def create_schema(conn: AsyncConnection) -> None:
+    """Create all model tables and apply the SQL files on ``conn``.
+
+    Models marked ``info={"read_only": True}`` map to views and are
+    skipped; the views are created by the SQL files instead.
+    """
+    for metadata in all_metadata():
+        tables = [t for t in metadata.sorted_tables if not t.info.get("read_only")]
+        await conn.run_sync(lambda sync_conn, md=metadata, ts=tables: md.create_all(sync_conn, tables=ts))
+
+    # SQL files may hold several statements and dollar-quoted function
+    # bodies, which only the simple query protocol accepts.
+    raw = await conn.get_raw_connection()
+    for path in sql_files():
+        await raw.driver_connection.execute(path.read_text(encoding="utf-8"))
@@ -7,37 +7,251 @@ This version of the session module exposes both ``get_db`` and
 acquire an ``AsyncSession`` dependency; adding ``get_session`` as an alias
 for ``get_db`` preserves compatibility with existing code while still
 supporting the new configuration using Supabase's Supavisor pooler.
+
+The engine is not created at import time.  ``get_engine`` builds it on
+first use (normally from the application's lifespan handler) and
+``dispose_engine`` closes it on shutdown.
+
+Read-only endpoints depend on ``get_read_session`` instead of
+``get_session``.  When ``DB_REPLICA_DSNS`` lists read replicas, their
+sessions are spread round robin over the replicas that are up; a replica
+that fails to connect is skipped for ``DB_REPLICA_RETRY_SECONDS`` and the
+request falls back to the next one, or to the primary.  Writes always go
+to the primary.  Replicas lag behind the primary, so a client that made a
+write reads from the primary for the next ``DB_REPLICA_STICKY_SECONDS`` and
+sees its own changes: ``ReadYourWritesMiddleware`` sets a short-lived
+signed cookie on the response to the write, which any worker can check.
 """
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import hashlib
+import hmac
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
+from app.core import metrics
 from app.core.settings import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _instrument_pool(engine: AsyncEngine) -> None:
+    """Track pool occupancy through checkout/checkin events."""
+    pool = engine.sync_engine.pool
+    metrics.DB_POOL_SIZE.set(settings.db_pool_size)
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, conn_record, conn_proxy) -> None:  # noqa: ANN001
+        metrics.DB_POOL_CHECKED_OUT.inc()
 
-def _create_engine():
-    return create_async_engine(
-        settings.dsn,
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, conn_record) -> None:  # noqa: ANN001
+        metrics.DB_POOL_CHECKED_OUT.dec()
+
+
+def _create_engine(dsn: Optional[str] = None):
+    pool_kwargs: dict = {"poolclass": NullPool}
+    if settings.db_pool_size > 0:
+        pool_kwargs = {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_pre_ping": True,
+        }
+    engine = create_async_engine(
+        dsn or settings.dsn,
         echo=False,
-        poolclass=NullPool,
         connect_args={
             "statement_cache_size": 0,
             "prepared_statement_cache_size": 0,
         },
+        **pool_kwargs,
     )
+    _instrument_pool(engine)
+    return engine
+
+
+_engine: Optional[AsyncEngine] = None
+_session_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[sessionmaker[AsyncSession]] = None
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = _create_engine()
+    return _engine
+
+
+def get_session_engine() -> AsyncEngine:
+    """Return the engine for connections that keep session state.
+
+    Behind a transaction-mode pooler, session-level advisory locks stay on
+    whichever server connection ran the transaction that took them.  This
+    engine connects to ``settings.session_dsn`` instead (``INVALIDATION_DSN``
+    when set), and is the main engine otherwise.
+    """
+    global _session_engine
+    if settings.session_dsn == settings.dsn:
+        return get_engine()
+    if _session_engine is None:
+        _session_engine = _create_engine(settings.session_dsn)
+    return _session_engine
+
+
+def async_session() -> AsyncSession:
+    """Return a new ``AsyncSession`` bound to the process-wide engine."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = sessionmaker(
+            bind=get_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+    return _sessionmaker()
+
+
+@dataclass
+class _Replica:
+    engine: AsyncEngine
+    sessionmaker: sessionmaker
+    down_until: float = 0.0
+
+
+_replicas: Optional[list[_Replica]] = None
+_next_replica = 0
+
 
+def _get_replicas() -> list[_Replica]:
+    global _replicas
+    if _replicas is None:
+        _replicas = []
+        for dsn in settings.replica_dsns:
+            engine = _create_engine(dsn)
+            _replicas.append(
+                _Replica(engine, sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+            )
+    return _replicas
 
-engine = _create_engine()
-async_session: sessionmaker[AsyncSession] = sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
-)
+
+def _healthy_replicas() -> list[_Replica]:
+    """Return the replicas that are up, in round-robin order."""
+    global _next_replica
+    replicas = _get_replicas()
+    if not replicas:
+        return []
+    now = time.monotonic()
+    start = _next_replica % len(replicas)
+    _next_replica += 1
+    ordered = replicas[start:] + replicas[:start]
+    return [replica for replica in ordered if replica.down_until <= now]
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections and forget the engines."""
+    global _engine, _session_engine, _sessionmaker, _replicas
+    if _engine is not None:
+        await _engine.dispose()
+    if _session_engine is not None:
+        await _session_engine.dispose()
+    for replica in _replicas or ():
+        await replica.engine.dispose()
+    _engine = None
+    _session_engine = None
+    _sessionmaker = None
+    _replicas = None
+
+
+# -- read-your-writes ----------------------------------------------------------
+
+# Set by ReadYourWritesMiddleware on the response to a write.  The client
+# sends it back with its next requests, whichever worker or host they
+# reach, so the record of the write travels with the client rather than
+# living in the memory of the worker that served it.
+WRITE_COOKIE = "recent_write"
+
+
+def _sign(value: str) -> str:
+    return hmac.new(settings.jwt_secret_key.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def write_cookie() -> bytes:
+    """Return a ``Set-Cookie`` value sending the client's reads to the primary for a while."""
+    sticky = settings.db_replica_sticky_seconds
+    until = f"{time.time() + sticky:.3f}"
+    return (
+        f"{WRITE_COOKIE}={until}.{_sign(until)}; Max-Age={math.ceil(sticky)}; "
+        "Path=/; HttpOnly; SameSite=Lax"
+    ).encode()
+
+
+def wrote_recently(request: Request) -> bool:
+    """Return whether the client of ``request`` wrote in the last few seconds.
+
+    Only cookies signed by ``write_cookie`` count, so a client cannot pin
+    its reads to the primary indefinitely.
+    """
+    value = request.cookies.get(WRITE_COOKIE)
+    if not value:
+        return False
+    until, _, signature = value.rpartition(".")
+    if not hmac.compare_digest(signature, _sign(until)):
+        return False
+    try:
+        return float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def __getattr__(name: str):
+    # ``engine`` used to be a module attribute created at import time.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def _checkout(session: AsyncSession) -> None:
+    """Acquire the session's connection up front and time the checkout."""
+    start = time.perf_counter()
+    await session.connection()
+    metrics.DB_CHECKOUT_DURATION.observe(time.perf_counter() - start)
 
 
 async def get_db() -> AsyncSession:
     """Yield a new ``AsyncSession`` for dependency injection."""
     async with async_session() as session:
+        await _checkout(session)
+        yield session
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """Yield a session for a read-only request, on a replica when possible."""
+    replicas = _healthy_replicas()
+    if replicas and not wrote_recently(request):
+        for replica in replicas:
+            session = replica.sessionmaker()
+            try:
+                await _checkout(session)
+            except Exception:
+                await session.close()
+                replica.down_until = time.monotonic() + settings.db_replica_retry_seconds
+                logger.warning("Read replica %s is unavailable", replica.engine.url.host, exc_info=True)
+                continue
+            metrics.DB_READ_SESSIONS.labels(target="replica").inc()
+            async with session:
+                yield session
+            return
+    metrics.DB_READ_SESSIONS.labels(target="primary").inc()
+    async with async_session() as session:
+        await _checkout(session)
         yield session
 
 
@@ -45,4 +259,5 @@ async def get_db() -> AsyncSession:
 async def get_session() -> AsyncSession:
     """Alias for get_db to maintain compatibility with existing imports."""
     async with async_session() as session:
+        await _checkout(session)
         yield session
\ No newline at end of file
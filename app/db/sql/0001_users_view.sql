@@ -0,0 +1,19 @@
+-- Unified read-only view over customers and support staff, mapped by
+-- app.db.models.user.User.  Customer names are encrypted at rest, so the
+-- view exposes them as NULL.
+CREATE OR REPLACE VIEW users_view AS
+SELECT c.id::text               AS id,
+       'customer'::text         AS role,
+       NULL::text               AS full_name,
+       c.created_at             AS created_at,
+       c.is_active              AS is_active,
+       (c.deleted_at IS NULL)   AS "exists"
+FROM customers c
+UNION ALL
+SELECT s.id::text,
+       s.role,
+       s.full_name,
+       s.created_at,
+       s.is_active,
+       (s.deleted_at IS NULL)
+FROM support_staff s;
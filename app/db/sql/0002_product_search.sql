@@ -0,0 +1,23 @@
+-- Product search: a weighted tsvector over name (A) and description (B)
+-- with a GIN index for full-text queries, and a trigram index on name for
+-- typo-tolerant matching.  The column and GIN index are also declared on
+-- app.db.models.product.Product; the statements here bring existing
+-- databases up to date and keep the two definitions identical.
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector);
+
+-- pg_trgm may be unavailable (or need a superuser); search then falls back
+-- to full-text matching only.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm unavailable, typo-tolerant product search disabled: %', SQLERRM;
+END
+$$;
@@ -0,0 +1,70 @@
+-- Facet counts for catalog browsing, maintained on every product write so
+-- that storefront filters never run GROUP BY over products.  Only active,
+-- not deleted products are counted.  The price buckets must match
+-- PRICE_BUCKETS in app/services/product_service.py.
+CREATE OR REPLACE FUNCTION product_price_bucket(price_cents bigint) RETURNS text
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN price_cents < 3000 THEN 'under_30'
+        WHEN price_cents < 6000 THEN '30_60'
+        WHEN price_cents < 10000 THEN '60_100'
+        ELSE '100_plus'
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION product_facets(p products) RETURNS TABLE (facet text, value text)
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT f.facet, f.value
+    FROM (VALUES
+        ('category', coalesce(p.category_id::text, 'none')),
+        ('price', product_price_bucket(p.price_cents)),
+        ('featured', p.is_featured::text),
+        ('in_stock', (p.stock - p.reserved_stock > 0)::text)
+    ) AS f(facet, value)
+    WHERE p.is_active AND p.deleted_at IS NULL
+$$;
+
+CREATE OR REPLACE FUNCTION products_maintain_facets() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- Net change per facet value; unchanged values (e.g. a stock update
+    -- that does not cross zero) cancel out and touch no counter row, which
+    -- keeps contention on the hot counters low.
+    WITH delta AS (
+        SELECT facet, value, sum(d)::bigint AS d
+        FROM (
+            SELECT facet, value, -1 AS d FROM product_facets(OLD) WHERE TG_OP <> 'INSERT'
+            UNION ALL
+            SELECT facet, value, 1 FROM product_facets(NEW) WHERE TG_OP <> 'DELETE'
+        ) changes
+        GROUP BY facet, value
+        HAVING sum(d) <> 0
+    )
+    INSERT INTO product_facet_counts AS c (facet, value, count)
+    SELECT facet, value, d FROM delta
+    ORDER BY facet, value
+    ON CONFLICT (facet, value) DO UPDATE SET count = c.count + EXCLUDED.count;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS products_facets ON products;
+CREATE TRIGGER products_facets
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH ROW EXECUTE FUNCTION products_maintain_facets();
+
+-- Recount from scratch: used once the trigger is installed and after bulk
+-- loads that run with the trigger disabled.  Writes are blocked meanwhile.
+CREATE OR REPLACE FUNCTION refresh_product_facet_counts() RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE products IN SHARE MODE;
+    DELETE FROM product_facet_counts;
+    INSERT INTO product_facet_counts (facet, value, count)
+    SELECT f.facet, f.value, count(*)
+    FROM products p, LATERAL product_facets(p) f
+    GROUP BY f.facet, f.value;
+END
+$$;
+
+SELECT refresh_product_facet_counts();
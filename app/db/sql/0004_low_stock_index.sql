@@ -0,0 +1,5 @@
+-- Partial index over products at or below their restock threshold, read by
+-- app.services.inventory_alerts.  Also declared on the Product model; the
+-- predicate must stay identical to LOW_STOCK_PREDICATE there.
+CREATE INDEX IF NOT EXISTS ix_products_low_stock ON products (id)
+WHERE is_active AND deleted_at IS NULL AND stock - reserved_stock <= low_stock_threshold;
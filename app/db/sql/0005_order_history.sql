@@ -0,0 +1,72 @@
+-- Order history: a composite index for keyset pagination of a customer's
+-- orders (also declared on app.db.models.order.Order) and per-customer
+-- summaries maintained on every order write, so account pages never
+-- aggregate orders.  Cancelled orders count as orders but not as spend.
+CREATE INDEX IF NOT EXISTS ix_orders_client_created
+    ON orders (client_id, created_at DESC, id DESC);
+
+CREATE OR REPLACE FUNCTION orders_maintain_customer_summary() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE customer_order_summaries s
+        SET order_count = s.order_count - 1,
+            lifetime_spend_cents = s.lifetime_spend_cents
+                - CASE WHEN OLD.status <> 'cancelled' THEN OLD.total_cents ELSE 0 END
+        WHERE s.client_id = OLD.client_id AND s.currency = OLD.currency;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO customer_order_summaries AS s
+            (client_id, currency, order_count, lifetime_spend_cents, last_order_id, last_order_at)
+        VALUES (NEW.client_id, NEW.currency, 1,
+                CASE WHEN NEW.status <> 'cancelled' THEN NEW.total_cents ELSE 0 END,
+                NEW.id, NEW.created_at)
+        ON CONFLICT (client_id, currency) DO UPDATE
+        SET order_count = s.order_count + 1,
+            lifetime_spend_cents = s.lifetime_spend_cents + EXCLUDED.lifetime_spend_cents,
+            last_order_id = CASE WHEN s.last_order_at IS NULL OR EXCLUDED.last_order_at >= s.last_order_at
+                                 THEN EXCLUDED.last_order_id ELSE s.last_order_id END,
+            last_order_at = GREATEST(s.last_order_at, EXCLUDED.last_order_at);
+    END IF;
+
+    -- The last order was deleted or moved to another customer or currency.
+    IF TG_OP = 'DELETE' OR NEW.client_id <> OLD.client_id OR NEW.currency <> OLD.currency THEN
+        UPDATE customer_order_summaries s
+        SET (last_order_id, last_order_at) = (
+            SELECT o.id, o.created_at FROM orders o
+            WHERE o.client_id = OLD.client_id AND o.currency = OLD.currency
+            ORDER BY o.created_at DESC, o.id DESC
+            LIMIT 1
+        )
+        WHERE s.client_id = OLD.client_id AND s.currency = OLD.currency
+          AND s.last_order_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS orders_customer_summary ON orders;
+CREATE TRIGGER orders_customer_summary
+AFTER INSERT OR DELETE OR UPDATE OF client_id, currency, status, total_cents ON orders
+FOR EACH ROW EXECUTE FUNCTION orders_maintain_customer_summary();
+
+-- Recount from scratch: used once the trigger is installed and after bulk
+-- loads that run with the trigger disabled.  Writes are blocked meanwhile.
+CREATE OR REPLACE FUNCTION refresh_customer_order_summaries() RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE orders IN SHARE MODE;
+    DELETE FROM customer_order_summaries;
+    INSERT INTO customer_order_summaries
+        (client_id, currency, order_count, lifetime_spend_cents, last_order_id, last_order_at)
+    SELECT client_id, currency, count(*),
+           coalesce(sum(total_cents) FILTER (WHERE status <> 'cancelled'), 0),
+           (array_agg(id ORDER BY created_at DESC, id DESC))[1],
+           max(created_at)
+    FROM orders
+    GROUP BY client_id, currency;
+END
+$$;
+
+SELECT refresh_customer_order_summaries();
@@ -0,0 +1,44 @@
+-- Change notifications for per-worker caches (see app.core.invalidation).
+-- Every committed write to products, customers or support_staff sends
+-- {"table", "op", "id", "version"} on the row_changes channel; listeners
+-- drop exactly the cached entries of that row.  Notifications are only
+-- delivered on commit, so a listener never sees a change before it can
+-- read it.
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    r record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        r := OLD;
+    ELSE
+        r := NEW;
+    END IF;
+    PERFORM pg_notify('row_changes', json_build_object(
+        'table', TG_TABLE_NAME, 'op', TG_OP, 'id', r.id, 'version', r.version
+    )::text);
+    RETURN NULL;
+END
+$$;
+
+-- Tells listeners to drop everything cached for a table, e.g. after a bulk
+-- load that ran with the notification triggers disabled.
+CREATE OR REPLACE FUNCTION notify_table_reset(tbl text) RETURNS void
+LANGUAGE sql AS $$
+    SELECT pg_notify('row_changes', json_build_object('table', tbl, 'op', 'RESET')::text);
+$$;
+
+DROP TRIGGER IF EXISTS products_notify_change ON products;
+CREATE TRIGGER products_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+DROP TRIGGER IF EXISTS customers_notify_change ON customers;
+CREATE TRIGGER customers_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON customers
+FOR EACH ROW EXECUTE FUNCTION notify_row_change();
+
+DROP TRIGGER IF EXISTS support_staff_notify_change ON support_staff;
+CREATE TRIGGER support_staff_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON support_staff
+FOR EACH ROW EXECUTE FUNCTION notify_row_change();
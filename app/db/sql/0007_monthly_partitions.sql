@@ -0,0 +1,66 @@
+-- Monthly range partitions for the append-only tables messages (created_at)
+-- and audit_logs (event_time); the partitioned parents are created from the
+-- models.  Partition <parent>_pYYYYMM holds one UTC calendar month.  The
+-- partition maintenance job (app.services.partition_maintenance) creates
+-- the coming months ahead of time and detaches or drops the months past
+-- retention, which is instant where a DELETE would rewrite the table.
+
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent text, from_month date, to_month date)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    month date := date_trunc('month', from_month)::date;
+    lo timestamptz;
+    name text;
+    created integer := 0;
+BEGIN
+    -- Serialise concurrent callers (every worker runs the job).
+    PERFORM pg_advisory_xact_lock(hashtext('monthly_partitions:' || parent));
+    WHILE month <= to_month LOOP
+        name := parent || '_p' || to_char(month, 'YYYYMM');
+        IF to_regclass(name) IS NULL THEN
+            lo := month::timestamp AT TIME ZONE 'UTC';
+            EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                           name, parent, lo, lo + interval '1 month');
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$;
+
+-- Detach the partitions of parent whose whole month is older than
+-- keep_months full months, and drop them unless they should be kept for
+-- archiving.  Returns the names of the partitions removed.
+CREATE OR REPLACE FUNCTION expire_monthly_partitions(parent text, keep_months integer, drop_data boolean)
+RETURNS SETOF text
+LANGUAGE plpgsql AS $$
+DECLARE
+    cutoff date := (date_trunc('month', now() AT TIME ZONE 'UTC') - make_interval(months => keep_months))::date;
+    part text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('monthly_partitions:' || parent));
+    FOR part IN
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::regclass
+          AND c.relname ~ ('^' || parent || '_p[0-9]{6}$')
+          AND to_date(right(c.relname, 6), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part);
+        IF drop_data THEN
+            EXECUTE format('DROP TABLE %I', part);
+        END IF;
+        RETURN NEXT part;
+    END LOOP;
+END
+$$;
+
+-- Current month and the next three, for the partitioned tables only (a
+-- schema managed elsewhere may not partition them).
+SELECT create_monthly_partitions(c.relname, current_date, (current_date + interval '3 months')::date)
+FROM pg_class c
+WHERE c.relname IN ('messages', 'audit_logs') AND c.relkind = 'p'
+  AND c.relnamespace = 'public'::regnamespace;
@@ -0,0 +1,15 @@
+-- Wakes the outbox dispatchers (see app.services.outbox) when messages are
+-- queued: one notification per statement on the row_changes channel, sent
+-- on commit, instead of waiting for the next poll.
+CREATE OR REPLACE FUNCTION notify_outbox() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('row_changes', json_build_object('table', 'outbox', 'op', 'INSERT')::text);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS outbox_notify_insert ON outbox;
+CREATE TRIGGER outbox_notify_insert
+AFTER INSERT ON outbox
+FOR EACH STATEMENT EXECUTE FUNCTION notify_outbox();
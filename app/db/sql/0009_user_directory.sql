@@ -0,0 +1,52 @@
+-- user_directory (app.db.models.user.User) is users_view kept as a table:
+-- row triggers on customers and support_staff apply every change to the
+-- matching row, so listing users reads one indexed table instead of
+-- evaluating the union.  Updates that touch none of the listed columns
+-- (logins, password changes) do not fire the triggers.
+CREATE OR REPLACE FUNCTION sync_user_directory() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NEW.id IS DISTINCT FROM OLD.id) THEN
+        DELETE FROM user_directory WHERE id = OLD.id;
+        IF TG_OP = 'DELETE' THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_TABLE_NAME = 'customers' THEN
+        INSERT INTO user_directory (id, role, full_name, created_at, is_active, "exists")
+        VALUES (NEW.id, 'customer', NULL, NEW.created_at, NEW.is_active, NEW.deleted_at IS NULL)
+        ON CONFLICT (id) DO UPDATE
+        SET role = EXCLUDED.role, full_name = EXCLUDED.full_name, created_at = EXCLUDED.created_at,
+            is_active = EXCLUDED.is_active, "exists" = EXCLUDED."exists";
+    ELSE
+        INSERT INTO user_directory (id, role, full_name, created_at, is_active, "exists")
+        VALUES (NEW.id, NEW.role, NEW.full_name, coalesce(NEW.created_at, now()), NEW.is_active,
+                NEW.deleted_at IS NULL)
+        ON CONFLICT (id) DO UPDATE
+        SET role = EXCLUDED.role, full_name = EXCLUDED.full_name, created_at = EXCLUDED.created_at,
+            is_active = EXCLUDED.is_active, "exists" = EXCLUDED."exists";
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS customers_user_directory ON customers;
+CREATE TRIGGER customers_user_directory
+AFTER INSERT OR DELETE OR UPDATE OF id, created_at, is_active, deleted_at ON customers
+FOR EACH ROW EXECUTE FUNCTION sync_user_directory();
+
+DROP TRIGGER IF EXISTS support_staff_user_directory ON support_staff;
+CREATE TRIGGER support_staff_user_directory
+AFTER INSERT OR DELETE OR UPDATE OF id, role, full_name, created_at, is_active, deleted_at ON support_staff
+FOR EACH ROW EXECUTE FUNCTION sync_user_directory();
+
+-- Rebuilds the table from users_view, after bulk loads that ran with the
+-- triggers disabled and to fill it the first time.
+CREATE OR REPLACE FUNCTION refresh_user_directory() RETURNS void
+LANGUAGE sql AS $$
+    DELETE FROM user_directory;
+    INSERT INTO user_directory (id, role, full_name, created_at, is_active, "exists")
+    SELECT id::uuid, role, full_name, coalesce(created_at, now()), is_active, "exists" FROM users_view;
+$$;
+
+SELECT refresh_user_directory() WHERE NOT EXISTS (SELECT 1 FROM user_directory);
@@ -0,0 +1,69 @@
+-- Edge cache purges for product writes (see app.services.edge_cache).  Every
+-- statement that writes products queues one cdn.purge event in the outbox,
+-- in its own transaction, with the surrogate keys of the rows it wrote:
+-- product-<id>, category-<id> of their old and new categories, and
+-- product-list.  Writing more than 100 products (MAX_KEYED_PRODUCTS) purges
+-- the whole catalog instead.  Doing this in the database rather than in the
+-- service functions catches every write path: restocks, price edits,
+-- deactivation, checkout reservations and manual SQL alike.
+CREATE OR REPLACE FUNCTION product_purge_keys(ids uuid[], category_ids uuid[]) RETURNS text[]
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN (SELECT count(DISTINCT i) FROM unnest(ids) AS i) > 100 THEN ARRAY['catalog']
+        ELSE ARRAY(
+            SELECT k FROM (
+                SELECT 'product-' || i FROM unnest(ids) AS i
+                UNION SELECT 'category-' || c FROM unnest(category_ids) AS c WHERE c IS NOT NULL
+                UNION SELECT 'product-list'
+            ) AS keys(k)
+            ORDER BY k
+        )
+    END;
+$$;
+
+CREATE OR REPLACE FUNCTION queue_product_purge() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    ids uuid[];
+    category_ids uuid[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(id), array_agg(category_id) INTO ids, category_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(id), array_agg(category_id) INTO ids, category_ids FROM old_rows;
+    ELSE
+        SELECT array_agg(id), array_agg(category_id) INTO ids, category_ids
+        FROM (SELECT id, category_id FROM old_rows UNION ALL SELECT id, category_id FROM new_rows) AS r;
+    END IF;
+    IF ids IS NULL THEN
+        RETURN NULL;  -- the statement wrote no rows
+    END IF;
+    INSERT INTO outbox (kind, topic, payload)
+    VALUES ('event', 'cdn.purge', jsonb_build_object('keys', product_purge_keys(ids, category_ids)));
+    RETURN NULL;
+END
+$$;
+
+-- Purges everything cached from the catalog, e.g. after a bulk load that
+-- ran with the purge triggers disabled.
+CREATE OR REPLACE FUNCTION queue_catalog_purge() RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO outbox (kind, topic, payload)
+    VALUES ('event', 'cdn.purge', jsonb_build_object('keys', ARRAY['catalog']));
+$$;
+
+-- Transition tables allow only one event per trigger.
+DROP TRIGGER IF EXISTS products_cdn_purge_insert ON products;
+CREATE TRIGGER products_cdn_purge_insert
+AFTER INSERT ON products REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION queue_product_purge();
+
+DROP TRIGGER IF EXISTS products_cdn_purge_update ON products;
+CREATE TRIGGER products_cdn_purge_update
+AFTER UPDATE ON products REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION queue_product_purge();
+
+DROP TRIGGER IF EXISTS products_cdn_purge_delete ON products;
+CREATE TRIGGER products_cdn_purge_delete
+AFTER DELETE ON products REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION queue_product_purge();
@@ -0,0 +1,18 @@
+-- Order history pages are keyed on (created_at, id) (see
+-- app.utils.pagination), which needs every order to have a creation time:
+-- NULLs would sort first in the newest-first listing and cannot be encoded
+-- in a cursor.  Tables created before created_at was declared NOT NULL on
+-- app.db.models.order.Order are backfilled (with the last update time when
+-- there is one) and constrained; the check keeps later startups from
+-- locking the table again.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'orders'::regclass AND attname = 'created_at' AND NOT attnotnull
+    ) THEN
+        UPDATE orders SET created_at = coalesce(updated_at, now()) WHERE created_at IS NULL;
+        ALTER TABLE orders ALTER COLUMN created_at SET NOT NULL;
+    END IF;
+END
+$$;
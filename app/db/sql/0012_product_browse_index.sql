@@ -0,0 +1,6 @@
+-- Partial index over the browsable products in page order, read by
+-- app.services.product_service.browse_products (ORDER BY name, id): a page
+-- walks the index and stops after OFFSET + LIMIT entries instead of sorting
+-- every active product.  Also declared on the Product model.
+CREATE INDEX IF NOT EXISTS ix_products_browse ON products (name, id)
+WHERE is_active AND deleted_at IS NULL;
@@ -0,0 +1,6 @@
+-- Message listing, newest first, read by
+-- app.services.message_service.get_messages with keyset pagination on
+-- (created_at, id).  Also declared on the Message model.  On the
+-- partitioned table the index is created on every monthly partition, and
+-- new partitions get it automatically.
+CREATE INDEX IF NOT EXISTS ix_messages_created ON messages (created_at DESC, id DESC);
@@ -9,39 +9,120 @@ routers.  It also performs a simple database connectivity check on
 startup.  Use this file to replace ``app/main.py`` in your project
 after adding the corresponding ``health.py`` and ``dbinfo.py``
 endpoints.
+
+Startup cost matters for autoscaling, so importing this module is cheap:
+the endpoint modules (and with them the services, models and crypto
+libraries) are imported by ``create_app``, the module-level ``app`` is
+only built when first accessed (``uvicorn app.main:app`` does that), and
+the database engine is created by the lifespan handler.
 """
-from __future__ import annotations
 
 import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, List
 
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, status
-from fastapi.middleware.cors import CORSMiddleware
-
-from app.core.settings import settings
 from app.core.logging import setup_logging
 
-# Import existing endpoint modules
-from app.api.v1.endpoints import (
-    auth as auth_endpoints,
-    users as users_endpoints,
-    orders as orders_endpoints,
-    products as products_endpoints,
-    support as support_endpoints,
-    messages as messages_endpoints,
-    health as health_endpoints,
-    dbinfo as dbinfo_endpoints,
-)
-
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import async_session, get_db
-from typing import List
-
-
-def create_app() -> FastAPI:
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def lifespan(app: "FastAPI") -> AsyncIterator[None]:
+    """Create the database engine on startup and dispose of it on shutdown.
+
+    Attempt a simple SELECT against the database to fail fast if the DSN
+    is invalid.  If the query fails, log the exception and stop
+    the application from starting.  The pbkdf2 cost is then set (see
+    ``security.password_rounds``); with PASSWORD_HASH_BUDGET_MS it is
+    calibrated by the first worker on the host and reused by the others.
+    Background workers such as the health prober, the change listener,
+    the token denylist sync, the product name index, the catalog snapshot,
+    the outbox dispatcher, the low-stock scanner and the partition
+    maintainer are started here and stopped before the engine is disposed,
+    including when startup fails after some of them are running.
+    """
+    from sqlalchemy import text
+
+    from app.core import security
+    from app.core.health import HealthProber
+    from app.core.invalidation import change_listener
+    from app.core.revocation import token_denylist
+    from app.core.settings import settings
+    from app.db.introspection import schema_cache
+    from app.services.catalog_snapshot import catalog_snapshot
+    from app.services.inventory_alerts import LowStockScanner
+    from app.services.outbox import outbox_dispatcher
+    from app.services.partition_maintenance import PartitionMaintainer
+    from app.services.product_search import product_name_index
+    from app.db.session import async_session, dispose_engine, get_engine
+
+    async with AsyncExitStack() as stack:
+        # Every step registers its cleanup as soon as it succeeds, so a
+        # failure part-way through startup stops the workers already running
+        # and disposes of the engine, in reverse order.
+        get_engine()
+        stack.push_async_callback(dispose_engine)
+        async with async_session() as session:
+            try:
+                await session.execute(text("SELECT 1"))
+                logging.info("Database connectivity check passed.")
+            except Exception as exc:
+                logging.exception("Database connection failed: %s", exc)
+                raise
+
+        rounds = await security.run_crypto(security.password_rounds)
+        logging.info("Password hashing uses %d pbkdf2 rounds.", rounds)
+
+        try:
+            await schema_cache.refresh()
+        except Exception:
+            logging.exception("Could not load schema metadata; it will be retried on demand")
+
+        app.state.health_prober = HealthProber()
+        for worker in (
+            change_listener,
+            token_denylist,
+            product_name_index,
+            catalog_snapshot,
+            outbox_dispatcher,
+            LowStockScanner(),
+            PartitionMaintainer(),
+            app.state.health_prober,
+        ):
+            await worker.start()
+            stack.push_async_callback(worker.stop)
+        yield
+
+def create_app() -> "FastAPI":
     """Create and configure a new FastAPI application instance."""
+    from fastapi import FastAPI, APIRouter, HTTPException, Response, status
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from app.core.middleware import (
+        IdempotencyMiddleware,
+        MetricsMiddleware,
+        ReadYourWritesMiddleware,
+    )
+    from app.core.settings import settings
+    from app.db.introspection import schema_cache
+
+    # Import existing endpoint modules
+    from app.api.v1.endpoints import (
+        auth as auth_endpoints,
+        users as users_endpoints,
+        orders as orders_endpoints,
+        products as products_endpoints,
+        support as support_endpoints,
+        messages as messages_endpoints,
+        health as health_endpoints,
+        dbinfo as dbinfo_endpoints,
+        metrics as metrics_endpoints,
+    )
+
     setup_logging()
     app = FastAPI(
+        lifespan=lifespan,
         title="Secure Flower Store API",
         version="1.0.0",
         description=(
@@ -50,6 +131,10 @@ def create_app() -> FastAPI:
         ),
     )
 
+    app.add_middleware(ReadYourWritesMiddleware)
+    # Outside ReadYourWritesMiddleware (a replayed write changes nothing) and
+    # inside CORS, so that replayed responses still get CORS headers.
+    app.add_middleware(IdempotencyMiddleware)
     # CORS settings: adjust origins in production
     app.add_middleware(
         CORSMiddleware,
@@ -58,6 +143,8 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Outermost middleware so that latency includes CORS handling.
+    app.add_middleware(MetricsMiddleware)
 
     # Include API routers with version prefix
     api_router = APIRouter()
@@ -71,6 +158,7 @@ def create_app() -> FastAPI:
     api_router.include_router(dbinfo_endpoints.router, prefix="/dbinfo", tags=["dbinfo"])
 
     app.include_router(api_router, prefix="/api/v1")
+    app.include_router(metrics_endpoints.router, tags=["metrics"])
 
     @app.get("/favicon.ico", include_in_schema=False)
     async def favicon():
@@ -82,49 +170,34 @@ def create_app() -> FastAPI:
         response_model=List[str],
         tags=["root"],
     )
-    async def read_root(db: AsyncSession = Depends(get_db)) -> List[str]:
+    async def read_root() -> List[str]:
         """
         Verify database connectivity and return a list of tables.
 
-        This root endpoint queries the ``information_schema.tables`` view in the
-        connected PostgreSQL database.  It returns a JSON list of table names
-        in the ``public`` schema.  If the query fails (for example, if the
-        database credentials are invalid or the host is unreachable), a 500
-        error is raised so that the client can see a clear error message.
+        The table names come from the schema metadata cached at startup (see
+        ``app.db.introspection``), so this endpoint, which load balancers
+        and scanners hit constantly, does not query the catalog per call.
+        If the metadata cannot be loaded (for example, if the database
+        credentials are invalid or the host is unreachable), a 500 error is
+        raised so that the client can see a clear error message.
         """
-        query = text(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'public'
-            ORDER BY table_name
-            """
-        )
         try:
-            result = await db.execute(query)
-            tables = [row[0] for row in result.all()]
-            return tables
+            return await schema_cache.table_names()
         except Exception as exc:
             # Provide a descriptive error to the client if the query fails.
             raise HTTPException(status_code=500, detail=f"Database query error: {exc}") from exc
 
-    @app.on_event("startup")
-    async def startup_event() -> None:
-        """Run tasks on application startup.
+    return app
 
-        Attempt a simple SELECT against the database to fail fast if the DSN
-        is invalid.  If the query fails, log the exception and stop
-        the application from starting.
-        """
-        async with async_session() as session:
-            try:
-                await session.execute(text("SELECT 1"))
-                logging.info("Database connectivity check passed.")
-            except Exception as exc:
-                logging.exception("Database connection failed: %s", exc)
-                raise
 
-    return app
+_app: "FastAPI | None" = None
 
 
-app = create_app()
\ No newline at end of file
+def __getattr__(name: str):
+    # Build the ASGI application on first access of ``app.main.app``.
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -25,10 +25,10 @@ class MessageCreate(BaseModel):
 
 
 class MessageOut(BaseModel):
-    id: str
-    session_id: str
-    client_id: str | None
-    support_id: str | None
+    id: UUID
+    session_id: UUID
+    client_id: UUID | None
+    support_id: UUID | None
     content: str
     chat_type: str
     is_from_client: bool
@@ -39,3 +39,10 @@ class MessageOut(BaseModel):
 
     # Параметр populate_by_name позволяет обращаться к полю «metadata_json» как к «metadata»
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+
+class MessagePage(BaseModel):
+    """One page of messages, newest first."""
+
+    items: list[MessageOut]
+    next_cursor: str | None
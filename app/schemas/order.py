@@ -1,33 +1,46 @@
 """
     Pydantic schemas for order data.
 
-    Defines both the response model (OrderOut) and the request model
-    (OrderCreate).  The request model is used when creating orders via POST.
+    Defines both the response models (OrderOut, OrderItemOut, CheckoutOut,
+    OrderPage, OrderSummaryOut) and the request model (OrderCreate).  The request model is used when creating
+    orders via POST: it lists SKUs and quantities only, and every price and
+    total is computed by the server.
 """
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class OrderItemCreate(BaseModel):
+    """One line of a new order."""
+
+    sku: str
+    quantity: int = Field(..., ge=1, le=1000)
 
 
 class OrderCreate(BaseModel):
-    """Schema for creating a new order."""
+    """Schema for creating a new order; the customer is the authenticated caller."""
 
-    client_id: UUID
-    subtotal_cents: int
-    discount_cents: int = 0
-    shipping_cents: int = 0
-    tax_cents: int = 0
-    total_cents: int
-    currency: str = "USD"
-    status: str = "pending"
+    items: list[OrderItemCreate] = Field(..., min_length=1, max_length=200)
     notes: Optional[str] = None
-    internal_notes: Optional[str] = None
+
+
+class OrderItemOut(BaseModel):
+    product_id: UUID
+    sku: str
+    name: str
+    quantity: int
+    unit_price_cents: int
+    line_total_cents: int
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderOut(BaseModel):
-    id: str
+    id: UUID
     order_number: int | None
-    client_id: str
+    client_id: UUID
     subtotal_cents: int
     discount_cents: int
     shipping_cents: int
@@ -37,5 +50,36 @@ class OrderOut(BaseModel):
     status: str
     notes: str | None
     internal_notes: str | None
+    created_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CheckoutOut(OrderOut):
+    """A newly created order with its lines."""
+
+    items: list[OrderItemOut]
+
+
+class OrderPage(BaseModel):
+    """One page of a customer's order history, newest first."""
+
+    items: list[OrderOut]
+    next_cursor: str | None
+
+
+class CurrencySpend(BaseModel):
+    currency: str
+    order_count: int
+    lifetime_spend_cents: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class OrderSummaryOut(BaseModel):
+    """Order totals of the current customer; spend excludes cancelled orders."""
+
+    order_count: int
+    spend: list[CurrencySpend]
+    last_order_id: UUID | None
+    last_order_at: datetime | None
@@ -7,6 +7,7 @@
     SQLAlchemy ORM objects via the ``model_validate`` method.
 """
 from typing import Optional
+from uuid import UUID
 from pydantic import BaseModel, ConfigDict
 
 
@@ -16,6 +17,7 @@ class ProductCreate(BaseModel):
     sku: str
     slug: str
     name: str
+    category_id: Optional[UUID] = None
     description: Optional[str] = None
     price_cents: int
     compare_at_price_cents: Optional[int] = None
@@ -28,8 +30,23 @@ class ProductCreate(BaseModel):
     is_featured: bool = False
 
 
+class ProductSuggestion(BaseModel):
+    """Autocomplete entry: a product id and its name."""
+
+    id: UUID
+    name: str
+
+
+class FacetValue(BaseModel):
+    """One facet value and the number of active products having it."""
+
+    value: str
+    count: int
+
+
 class ProductOut(BaseModel):
-    id: str
+    id: UUID
+    category_id: UUID | None = None
     sku: str
     slug: str
     name: str
@@ -45,3 +62,13 @@ class ProductOut(BaseModel):
     is_featured: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ProductBrowseResponse(BaseModel):
+    """A page of products with the catalog-wide facet counts."""
+
+    items: list[ProductOut]
+    facets: dict[str, list[FacetValue]]
+    limit: int
+    offset: int
+    has_more: bool
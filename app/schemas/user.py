@@ -1,21 +1,32 @@
 """
 Pydantic schemas for user representations.
 
-This version uses Pydantic v2's configuration style.  The ``model_config``
+This version uses Pydantic v2's configuration style.  The ``model_config``
 attribute is set so that Pydantic will read attributes from SQLAlchemy ORM
 objects when validating, replacing the deprecated ``orm_mode`` option.
 """
 
+from datetime import datetime
+from uuid import UUID
+
 from pydantic import BaseModel, ConfigDict
 
 
 class User(BaseModel):
-    id: str
+    id: UUID
     role: str
     full_name: str | None = None
+    created_at: datetime | None = None
     is_active: bool
     exists: bool
 
     # Enable reading attributes from ORM objects.  See
     # https://docs.pydantic.dev/latest/usage/models/#from-attributes-and-arbitrary-class-instances
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserPage(BaseModel):
+    """One page of users, newest first."""
+
+    items: list[User]
+    next_cursor: str | None
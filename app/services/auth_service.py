@@ -1,5 +1,9 @@
-from typing import Optional, Dict
+import asyncio
+import logging
+import uuid
+from typing import Optional, Dict, Set
 
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException, status
@@ -7,6 +11,17 @@ from fastapi import HTTPException, status
 from app.db.models.customer import Customer
 from app.schemas.auth import UserCreate, Token
 from app.core import security
+from app.services import outbox
+
+logger = logging.getLogger(__name__)
+
+WELCOME_SUBJECT = "Welcome to the Flower Store"
+WELCOME_BODY = "Your account has been created. Thank you for registering!"
+
+# Фоновые задачи пересчёта хешей: ссылки держим, чтобы задачи не собрал GC,
+# а id клиентов — чтобы параллельные входы не пересчитывали хеш дважды.
+_rehash_tasks: Set[asyncio.Task] = set()
+_rehashing: Set[uuid.UUID] = set()
 
 
 async def register_user(
@@ -32,7 +47,7 @@ async def register_user(
         )
 
     # Хешируем пароль и шифруем личные данные
-    password_hash = security.get_password_hash(password)
+    password_hash = await security.run_crypto(security.get_password_hash, password)
     full_name_enc = security.encrypt_data(full_name)
     phone_enc = security.encrypt_data(phone)
     address_enc = security.encrypt_data(address)
@@ -46,10 +61,13 @@ async def register_user(
         address_enc=address_enc,
         is_active=True,
         is_verified=False,
-        password_algo="pbkdf2_sha256",  # записываем используемую схему
+        password_algo=security.PASSWORD_SCHEME,  # записываем используемую схему
     )
     db.add(new_customer)
     try:
+        # Приветственное письмо ставим в outbox в той же транзакции: оно
+        # уйдёт после коммита, и регистрация не ждёт почтовый сервер.
+        await outbox.enqueue_email(db, email, WELCOME_SUBJECT, WELCOME_BODY)
         await db.commit()
         await db.refresh(new_customer)
     except Exception as exc:
@@ -61,7 +79,9 @@ async def register_user(
         )
 
     # Генерируем JWT
-    access_token = security.create_access_token(subject=new_customer.id)
+    access_token = security.create_access_token(
+        subject=new_customer.id, role="customer", client_id=new_customer.id
+    )
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -98,10 +118,14 @@ async def login(
     if not user:
         return None
     # Проверяем пароль через pbkdf2_sha256
-    if not security.verify_password(password, user.password_hash):
+    if not await security.run_crypto(security.verify_password, password, user.password_hash):
         return None
+    if security.password_needs_rehash(user.password_hash, user.password_algo):
+        _schedule_rehash(user.id, password, user.password_hash)
 
-    access_token = security.create_access_token(subject=user.id)
+    access_token = security.create_access_token(
+        subject=user.id, role="customer", client_id=user.id
+    )
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -109,6 +133,38 @@ async def login(
     }
 
 
+def _schedule_rehash(user_id: uuid.UUID, password: str, old_hash: bytes) -> None:
+    """
+    Пересчитывает хеш пароля в фоне, не задерживая ответ на вход: старая
+    схема или число раундов, не совпадающее с текущей калибровкой.
+    """
+    if user_id in _rehashing:
+        return
+    _rehashing.add(user_id)
+    task = asyncio.create_task(_rehash_password(user_id, password, old_hash))
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+
+
+async def _rehash_password(user_id: uuid.UUID, password: str, old_hash: bytes) -> None:
+    from app.db.session import async_session
+
+    try:
+        new_hash = await security.run_crypto(security.get_password_hash, password)
+        async with async_session() as session:
+            # Условие на старый хеш: если пароль успели сменить, не затираем его.
+            await session.execute(
+                update(Customer)
+                .where(Customer.id == user_id, Customer.password_hash == old_hash)
+                .values(password_hash=new_hash, password_algo=security.PASSWORD_SCHEME)
+            )
+            await session.commit()
+    except Exception:
+        logger.exception("Password rehash failed for customer %s", user_id)
+    finally:
+        _rehashing.discard(user_id)
+
+
 async def login_service(user_in: UserCreate, db: AsyncSession):
     """
     Старая обёртка: принимает UserCreate и делегирует login().
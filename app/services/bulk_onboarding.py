@@ -0,0 +1,273 @@
+"""
+Bulk customer onboarding.
+
+Registers many customers at once, e.g. when migrating accounts from
+another shop.  ``auth_service.register_user`` costs a lookup, a pbkdf2
+hash, three Fernet encryptions and a commit per customer; here the work is
+restructured for throughput:
+
+1. Email hashes are computed up front (a cheap SHA-256) and the input is
+   deduplicated by ``email_hash`` in memory, keeping the first occurrence.
+2. Hashes already present in ``customers`` are looked up in bulk with one
+   ``= ANY(...)`` query per batch, so existing accounts are skipped before
+   any password is hashed.
+3. Password hashing and PII encryption run in a process pool, one batch per
+   task; pbkdf2 is CPU bound and scales with the number of cores.
+4. Each prepared batch is copied into a temporary table and moved into
+   ``customers`` with ``INSERT ... ON CONFLICT (email_hash) DO NOTHING`` in
+   one transaction, which stays correct if the same email registers through
+   the API in the meantime.  Batches are committed one by one, so an
+   interrupted import can simply be run again.
+
+The input is a CSV file with an ``email``, ``password``, ``full_name``,
+``phone`` and ``address`` header.  Example::
+
+    python -m app.services.bulk_onboarding customers.csv --processes 8
+
+The secrets and the database settings are read from the environment like
+the application does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from app.core import security
+
+BATCH_SIZE = 500
+
+CUSTOMER_COLUMNS = (
+    "id", "email_hash", "password_hash", "password_algo", "full_name_enc", "phone_enc",
+    "address_enc", "is_active", "is_verified", "failed_login_count", "version",
+)
+
+
+@dataclass
+class OnboardingRecord:
+    """One customer to register."""
+
+    email: str
+    password: str
+    full_name: str = ""
+    phone: str = ""
+    address: str = ""
+
+
+@dataclass
+class OnboardingReport:
+    """Outcome of a bulk registration run."""
+
+    total: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    already_registered: int = 0
+    inserted: int = 0
+    conflicts: int = 0
+    processes: int = 1
+    elapsed: float = 0.0
+    crypto_seconds: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def per_core_second(self) -> float:
+        """Customers prepared per CPU-second spent hashing and encrypting."""
+        prepared = self.inserted + self.conflicts
+        return prepared / self.crypto_seconds if self.crypto_seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.total:,} records: {self.inserted:,} inserted, "
+            f"{self.already_registered:,} already registered, {self.duplicates:,} duplicates, "
+            f"{self.conflicts:,} conflicts, {self.invalid:,} invalid\n"
+            f"{self.elapsed:.1f}s on {self.processes} processes: {self.per_second:,.0f} customers/s, "
+            f"{self.per_core_second:,.1f} customers/s per core"
+        )
+
+
+def read_csv(path: str) -> Iterator[OnboardingRecord]:
+    """Yield the records of a CSV export, ignoring unknown columns."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield OnboardingRecord(
+                email=(row.get("email") or "").strip(),
+                password=row.get("password") or "",
+                full_name=row.get("full_name") or "",
+                phone=row.get("phone") or "",
+                address=row.get("address") or "",
+            )
+
+
+def dedupe(
+    records: Iterable[OnboardingRecord], report: OnboardingReport
+) -> list[tuple[bytes, OnboardingRecord]]:
+    """Pair each valid record with its email hash, keeping the first per email."""
+    seen: set[bytes] = set()
+    unique: list[tuple[bytes, OnboardingRecord]] = []
+    for record in records:
+        report.total += 1
+        if not record.email or not record.password:
+            report.invalid += 1
+            continue
+        email_hash = security.hash_email(record.email)
+        if email_hash in seen:
+            report.duplicates += 1
+            continue
+        seen.add(email_hash)
+        unique.append((email_hash, record))
+    return unique
+
+
+def _batches(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def prepare_batch(batch: Sequence[tuple[bytes, OnboardingRecord]]) -> tuple[list[tuple], float]:
+    """Hash passwords and encrypt PII; runs in a worker process.
+
+    Returns the rows in ``CUSTOMER_COLUMNS`` order and the CPU time spent.
+    """
+    started = time.process_time()
+    rows = [
+        (
+            uuid.uuid4(),
+            email_hash,
+            security.get_password_hash(record.password),
+            security.PASSWORD_SCHEME,
+            security.encrypt_data(record.full_name),
+            security.encrypt_data(record.phone),
+            security.encrypt_data(record.address),
+            True,
+            False,
+            0,
+            1,
+        )
+        for email_hash, record in batch
+    ]
+    return rows, time.process_time() - started
+
+
+async def _existing_hashes(conn, hashes: Sequence[bytes]) -> set[bytes]:
+    rows = await conn.fetch(
+        "SELECT email_hash FROM customers WHERE email_hash = ANY($1::bytea[])", list(hashes)
+    )
+    return {bytes(row["email_hash"]) for row in rows}
+
+
+async def _insert_batch(conn, rows: list[tuple]) -> int:
+    """Copy rows into ``customers``; return how many were actually inserted."""
+    columns = ", ".join(CUSTOMER_COLUMNS)
+    async with conn.transaction():
+        await conn.execute(
+            f"CREATE TEMP TABLE customers_import ON COMMIT DROP AS "
+            f"SELECT {columns} FROM customers WITH NO DATA"
+        )
+        await conn.copy_records_to_table("customers_import", records=rows, columns=CUSTOMER_COLUMNS)
+        status = await conn.execute(
+            f"INSERT INTO customers ({columns}) SELECT {columns} FROM customers_import "
+            f"ON CONFLICT (email_hash) DO NOTHING"
+        )
+    # Command tag has the form "INSERT 0 <rows>".
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def onboard(
+    dsn: str,
+    records: Iterable[OnboardingRecord],
+    *,
+    processes: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[OnboardingReport], None]] = None,
+) -> OnboardingReport:
+    """Register ``records`` in bulk and return the run report.
+
+    ``dsn`` is a plain ``postgresql://`` DSN used by asyncpg.
+    """
+    import asyncpg
+
+    started = time.perf_counter()
+    report = OnboardingReport(processes=processes or os.cpu_count() or 1)
+    unique = dedupe(records, report)
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        pending: list[tuple[bytes, OnboardingRecord]] = []
+        for batch in _batches(unique, 10_000):
+            existing = await _existing_hashes(conn, [email_hash for email_hash, _ in batch])
+            report.already_registered += len(existing)
+            pending.extend(item for item in batch if item[0] not in existing)
+
+        # Hash with the rounds the application would use, so that imported
+        # customers are not rehashed on their first login.
+        rounds = security.password_rounds()
+        loop = asyncio.get_running_loop()
+        with multiprocessing.Pool(
+            report.processes,
+            initializer=security.configure_password_rounds,
+            initargs=(rounds,),
+        ) as pool:
+            # imap keeps every worker busy while this process writes the
+            # batches that are already prepared.
+            prepared = pool.imap(prepare_batch, _batches(pending, batch_size))
+            while True:
+                item = await loop.run_in_executor(None, next, prepared, None)
+                if item is None:
+                    break
+                rows, cpu_seconds = item
+                report.crypto_seconds += cpu_seconds
+                inserted = await _insert_batch(conn, rows)
+                report.inserted += inserted
+                report.conflicts += len(rows) - inserted
+                if progress:
+                    report.elapsed = time.perf_counter() - started
+                    progress(report)
+    finally:
+        await conn.close()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def _asyncpg_dsn() -> str:
+    from app.core.settings import settings
+
+    return settings.dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.services.bulk_onboarding",
+                                     description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", help="CSV file with email,password,full_name,phone,address")
+    parser.add_argument("--dsn", help="postgresql:// DSN (default: DB_* settings)")
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="customers per worker task and per insert")
+    args = parser.parse_args(argv)
+
+    def report_progress(report: OnboardingReport) -> None:
+        print(f"\r{report.inserted:>12,} inserted  {report.elapsed:7.1f}s", end="", flush=True)
+
+    report = asyncio.run(onboard(
+        args.dsn or _asyncpg_dsn(), read_csv(args.csv), processes=args.processes,
+        batch_size=args.batch_size, progress=report_progress,
+    ))
+    print()
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Shared catalog snapshot.
+
+The active product catalog is published as a file that every uvicorn
+worker on the host maps read-only with ``mmap``.  The pages live once in
+the OS page cache however many workers there are, and a worker started
+after the file was written serves from it at once, before it has touched
+the database.
+
+The file holds a header, a fixed-size index sorted by product id (id,
+price, stock and the position of the product's JSON) and the JSON array of
+all products as served by ``GET /products/``; each product's JSON is a
+slice of that array, so nothing is stored twice::
+
+    header  magic, catalog version, product count, array offset and length
+    index   count x (id, price_cents, stock, json offset, json length)
+    array   [{...},{...},...]
+
+Every worker checks the catalog version (a checksum of the ids and
+``updated_at`` of the active products) every ``CATALOG_SNAPSHOT_INTERVAL``
+seconds, and right away when a product change is notified (see
+``app.core.invalidation``).  When the
+snapshot is behind, the worker that gets an exclusive ``flock`` on
+``<path>.lock`` rebuilds it into a temporary file and renames it over the
+snapshot, which is atomic: readers keep the old mapping until they notice
+the new file and map it, and never see a half-written snapshot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+
+from app.core.invalidation import RowChange, change_listener
+from app.core.settings import settings
+from app.db.models.product import Product
+from app.schemas.product import ProductOut
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CATSNAP2"
+# magic, catalog version, product count, array offset, array length
+HEADER = struct.Struct("<8s64sIQQ")
+# product id, price_cents, stock, json offset, json length
+ENTRY = struct.Struct("<16sqqQI")
+
+
+class CatalogSnapshot:
+    """Read-only view of a snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, self._array_offset, self._array_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+        self.version = version.rstrip(b"\0").decode()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def is_file(self, path: str) -> bool:
+        """Return whether ``path`` is still the file this snapshot maps."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_dev) == (self._stat.st_ino, self._stat.st_dev)
+
+    def list_json(self) -> bytes:
+        """Return the JSON array of all products."""
+        return self._map[self._array_offset:self._array_offset + self._array_length]
+
+    def get(self, product_id: uuid.UUID) -> Optional[dict[str, Any]]:
+        """Return one product as a dict, or None if it is not in the snapshot."""
+        key = product_id.bytes
+        # Binary search on the mapped index, so a worker holds no copy of it.
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = HEADER.size + mid * ENTRY.size
+            if self._map[start:start + 16] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = HEADER.size + lo * ENTRY.size
+        if lo == self._count or self._map[start:start + 16] != key:
+            return None
+        _, _, _, offset, length = ENTRY.unpack_from(self._map, start)
+        return json.loads(self._map[offset:offset + length])
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def write_snapshot(path: str, version: str, products: list[tuple[uuid.UUID, int, int, bytes]]) -> None:
+    """Atomically replace the snapshot at ``path``.
+
+    ``products`` are ``(id, price_cents, stock, json)`` tuples.
+    """
+    products = sorted(products, key=lambda product: product[0].bytes)
+    array_offset = HEADER.size + len(products) * ENTRY.size
+    index = bytearray()
+    array = bytearray(b"[")
+    for i, (product_id, price_cents, stock, data) in enumerate(products):
+        if i:
+            array += b","
+        index += ENTRY.pack(product_id.bytes, price_cents, stock, array_offset + len(array), len(data))
+        array += data
+    array += b"]"
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version.encode(), len(products), array_offset, len(array)))
+            f.write(index)
+            f.write(array)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# The products served by GET /products/ (see product_service.get_products).
+ACTIVE = Product.is_active == True  # noqa: E712
+
+
+class CatalogSnapshots:
+    """Keeps this worker's mapping of the catalog snapshot current."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._path = path
+        self.current: Optional[CatalogSnapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def path(self) -> str:
+        return self._path or settings.catalog_snapshot_path or os.path.join(
+            tempfile.gettempdir(), f"flowerstore-catalog-{settings.db_name}.snap"
+        )
+
+    def _remap(self) -> None:
+        """Map the snapshot file if it changed since it was last mapped."""
+        if self.current is not None and self.current.is_file(self.path):
+            return
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except (FileNotFoundError, ValueError, struct.error):
+            return
+        # Readers copy out of the mapping, so the old one can go at once.
+        old, self.current = self.current, snapshot
+        if old is not None:
+            old.close()
+
+    async def _catalog_version(self) -> str:
+        """Return a fingerprint of the ids and ``updated_at`` of active products."""
+        from app.db.session import async_session
+
+        row_hash = func.hashtextextended(
+            func.concat(Product.id, "|", Product.updated_at), 0
+        )
+        query = select(func.count(), func.coalesce(func.sum(row_hash), 0)).where(ACTIVE)
+        async with async_session() as session:
+            count, checksum = (await session.execute(query)).one()
+        return f"{count}-{int(checksum) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+    async def _build(self, version: str) -> None:
+        from app.db.session import async_session
+
+        async with async_session() as session:
+            products = (await session.execute(select(Product).where(ACTIVE))).scalars().all()
+        rows = [
+            (p.id, p.price_cents, p.stock, ProductOut.model_validate(p).model_dump_json().encode())
+            for p in products
+        ]
+        await asyncio.to_thread(write_snapshot, self.path, version, rows)
+        logger.info("Published catalog snapshot %s with %d products", version, len(rows))
+
+    async def refresh(self) -> None:
+        """Map the latest snapshot and rebuild it if the catalog has changed."""
+        self._remap()
+        version = await self._catalog_version()
+        if self.current is not None and self.current.version == version:
+            return
+        with open(self.path + ".lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # another worker is publishing; map it next time
+            try:
+                # Another worker may have published while we were checking.
+                self._remap()
+                if self.current is None or self.current.version != version:
+                    await self._build(version)
+                    self._remap()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def on_change(self, change: RowChange) -> None:
+        """Check the catalog version now rather than at the next interval."""
+        if self._changed is not None:
+            self._changed.set()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Map the existing snapshot, then keep it current in the background."""
+        self._changed = asyncio.Event()
+        self._remap()
+        self._task = asyncio.create_task(self._run(), name="catalog-snapshot")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Catalog snapshot refresh failed")
+            try:
+                await asyncio.wait_for(self._changed.wait(), settings.catalog_snapshot_interval)
+                # Let a burst of changes settle into one rebuild.
+                await asyncio.sleep(0.2)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+
+
+catalog_snapshot = CatalogSnapshots()
+change_listener.subscribe("products", catalog_snapshot.on_change)
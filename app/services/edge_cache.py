@@ -0,0 +1,205 @@
+"""
+Edge (CDN) caching of catalog responses.
+
+Catalog responses are the same for every visitor, so a CDN in front of the
+API can serve nearly all of them.  Each catalog route sets:
+
+* ``Cache-Control`` for browsers, which cannot be purged and so keep
+  responses only briefly (``CDN_BROWSER_MAX_AGE``);
+* ``Surrogate-Control`` for the edge, which keeps them much longer
+  (``CDN_CATALOG_MAX_AGE``, ``CDN_SEARCH_MAX_AGE`` for search) and may serve
+  stale copies while revalidating or while the API is failing.  CDNs strip
+  this header before responding to clients;
+* ``Surrogate-Key``: the keys the response depends on, i.e.
+  ``product-<id>`` and ``category-<id>`` for the products it contains, and
+  ``product-list`` for listings, whose membership any product write may
+  change.  Listings of more than ``MAX_KEYED_PRODUCTS`` products carry the
+  collection keys only, to keep the header small.
+
+Every statement writing products queues a purge of the keys it affects in
+the outbox (``app.services.outbox``), in the transaction of the write,
+from triggers on ``products`` (``app/db/sql/0010_cdn_purge.sql``), so no
+write path (restocks, price edits, deactivation, checkout reservations)
+can leave stale stock or prices at the edge.  The edge drops exactly the
+responses that may have changed, once the write has committed, and the
+request does not wait for the CDN API.  ``queue_purge`` queues other
+purges.  The purger is chosen with ``CDN_PURGER``: ``local`` (the default)
+only records and logs the keys, for development and tests; ``fastly``
+calls the Fastly purge API.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import urllib.request
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Protocol, Sequence
+
+from fastapi import Response
+
+from app.core.settings import settings
+from app.services.outbox import Executor, enqueue_event, outbox_dispatcher
+
+logger = logging.getLogger(__name__)
+
+PURGE_TOPIC = "cdn.purge"
+# Key formats and MAX_KEYED_PRODUCTS must match product_purge_keys() in
+# app/db/sql/0010_cdn_purge.sql.
+CATALOG_KEY = "catalog"
+PRODUCT_LIST_KEY = "product-list"
+MAX_KEYED_PRODUCTS = 100
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Browser and edge lifetimes of a response, in seconds."""
+
+    browser_max_age: int
+    edge_max_age: int
+    stale_while_revalidate: int = 0
+    stale_if_error: int = 0
+
+    def headers(self) -> dict[str, str]:
+        edge = [f"max-age={self.edge_max_age}"]
+        if self.stale_while_revalidate:
+            edge.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        if self.stale_if_error:
+            edge.append(f"stale-if-error={self.stale_if_error}")
+        return {
+            "Cache-Control": f"public, max-age={self.browser_max_age}",
+            "Surrogate-Control": ", ".join(edge),
+        }
+
+
+def policy(name: str) -> CachePolicy:
+    """Return the cache policy of a route group: ``catalog`` or ``search``."""
+    edge_max_age = {"catalog": settings.cdn_catalog_max_age, "search": settings.cdn_search_max_age}[name]
+    return CachePolicy(
+        browser_max_age=min(settings.cdn_browser_max_age, edge_max_age),
+        edge_max_age=edge_max_age,
+        stale_while_revalidate=settings.cdn_stale_while_revalidate,
+        stale_if_error=settings.cdn_stale_if_error,
+    )
+
+
+def product_key(product_id: Any) -> str:
+    return f"product-{product_id}"
+
+
+def category_key(category_id: Any) -> str:
+    return f"category-{category_id}"
+
+
+def product_keys(products: Sequence[Any], *, listing: bool = True) -> list[str]:
+    """Return the surrogate keys of a response containing ``products``.
+
+    ``products`` are ORM objects or dicts with ``id`` and ``category_id``.
+    """
+    keys = [CATALOG_KEY]
+    if listing:
+        keys.append(PRODUCT_LIST_KEY)
+        if len(products) > MAX_KEYED_PRODUCTS:
+            return keys
+    categories: dict[str, None] = {}
+    for product in products:
+        product_id, category_id = (
+            (product.get("id"), product.get("category_id"))
+            if isinstance(product, dict)
+            else (product.id, product.category_id)
+        )
+        keys.append(product_key(product_id))
+        if category_id is not None:
+            categories[category_key(category_id)] = None
+    return keys + list(categories)
+
+
+def set_cache_headers(response: Response, policy_name: str, keys: Iterable[str]) -> None:
+    """Set the cache policy and surrogate keys of a catalog response."""
+    response.headers.update(policy(policy_name).headers())
+    response.headers["Surrogate-Key"] = " ".join(keys)
+
+
+async def queue_purge(db: Executor, keys: Iterable[str]) -> None:
+    """Purge ``keys`` from the edge once ``db``'s transaction commits."""
+    await enqueue_event(db, PURGE_TOPIC, {"keys": sorted(set(keys))})
+
+
+
+# -- purgers -------------------------------------------------------------------
+
+
+class Purger(Protocol):
+    async def purge(self, keys: Sequence[str]) -> None: ...
+
+
+class LocalPurger:
+    """Records purges instead of calling a CDN (development and tests)."""
+
+    def __init__(self, history: int = 1000) -> None:
+        self.purged: deque[tuple[str, ...]] = deque(maxlen=history)
+
+    async def purge(self, keys: Sequence[str]) -> None:
+        self.purged.append(tuple(keys))
+        logger.info("Edge purge (local): %s", " ".join(keys))
+
+
+class FastlyPurger:
+    """Soft-purges surrogate keys through the Fastly API."""
+
+    url = "https://api.fastly.com/service/{service_id}/purge"
+
+    def __init__(self, service_id: str, api_token: str, timeout: float = 10.0) -> None:
+        self.service_id = service_id
+        self.api_token = api_token
+        self.timeout = timeout
+
+    def _post(self, keys: Sequence[str]) -> None:
+        request = urllib.request.Request(
+            self.url.format(service_id=self.service_id),
+            data=json.dumps({"surrogate_keys": list(keys)}).encode(),
+            method="POST",
+            headers={
+                "Fastly-Key": self.api_token,
+                # Soft purge: stale copies stay usable for stale-if-error.
+                "Fastly-Soft-Purge": "1",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def purge(self, keys: Sequence[str]) -> None:
+        await asyncio.to_thread(self._post, keys)
+
+
+_purger: Optional[Purger] = None
+
+
+def get_purger() -> Purger:
+    """Return the purger configured with ``CDN_PURGER``."""
+    global _purger
+    if _purger is None:
+        if settings.cdn_purger == "fastly":
+            _purger = FastlyPurger(settings.fastly_service_id, settings.fastly_api_token)
+        elif settings.cdn_purger == "local":
+            _purger = LocalPurger()
+        else:
+            raise ValueError(f"Unknown CDN_PURGER {settings.cdn_purger!r}")
+    return _purger
+
+
+def set_purger(purger: Optional[Purger]) -> None:
+    """Replace the purger (None: back to the configured one)."""
+    global _purger
+    _purger = purger
+
+
+async def _on_purge(payload: dict[str, Any]) -> None:
+    await get_purger().purge(payload["keys"])
+
+
+outbox_dispatcher.subscribe(PURGE_TOPIC, _on_purge)
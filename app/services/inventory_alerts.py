@@ -0,0 +1,169 @@
+"""
+Low-stock alerts.
+
+A background scanner looks for products whose available stock
+(``stock - reserved_stock``) is at or below ``low_stock_threshold`` every
+``LOW_STOCK_SCAN_INTERVAL`` seconds.  The query reads the partial index
+``ix_products_low_stock``, which only contains such products, so a scan is
+cheap and nothing is checked on the request path.
+
+Each product is reported once per threshold crossing: the scanner
+remembers which products it already reported and forgets a product once
+it is restocked above the threshold, so the next drop is reported again.
+New alerts of one scan are sent as a single email, queued in the outbox
+(``app.services.outbox``) and delivered in the background.
+
+Only one worker in the cluster scans.  The scanner that obtains the
+PostgreSQL advisory lock ``LOW_STOCK_LOCK_KEY`` keeps it, and its
+connection, for as long as it runs; the others retry on every interval and
+take over if the leader goes away.  The reported set lives in memory, so a
+new leader reports the products that are still low once more.
+
+The lock is a session-level lock, so it needs a real database session: a
+transaction-mode pooler would leave it on whichever server connection ran
+the transaction that took it, for the next client to "hold".  The scanner
+therefore connects through ``get_session_engine``; set ``INVALIDATION_DSN``
+to a direct or session-mode DSN when ``DB_HOST`` is such a pooler.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.settings import settings
+from app.db.models.product import LOW_STOCK_PREDICATE
+from app.services import outbox
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_LOCK_KEY = 0x4C4F5753  # "LOWS"
+
+LOW_STOCK_SQL = text(
+    f"""
+    SELECT id::text AS id, sku, name, stock - reserved_stock AS available, low_stock_threshold
+    FROM products
+    WHERE {LOW_STOCK_PREDICATE}
+    """
+)
+
+
+@dataclass(frozen=True)
+class LowStockAlert:
+    """A product that dropped to or below its restock threshold."""
+
+    product_id: str
+    sku: str
+    name: str
+    available: int
+    threshold: int
+
+    def line(self) -> str:
+        return f"{self.sku}  {self.name}: {self.available} available (threshold {self.threshold})"
+
+
+class LowStockScanner:
+    """Periodically reports products that crossed their low-stock threshold."""
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval or settings.low_stock_scan_interval
+        self._alerted: set[str] = set()
+        self._conn = None  # AsyncConnection holding the advisory lock
+        self._task: Optional[asyncio.Task] = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="low-stock-scanner")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.scan()
+            except Exception:
+                logger.exception("Low-stock scan failed")
+                await self._release()
+            await asyncio.sleep(self.interval)
+
+    # -- leadership ----------------------------------------------------------
+
+    async def _acquire(self) -> bool:
+        if self._conn is not None:
+            return True
+        from app.db.session import get_session_engine
+
+        conn = await get_session_engine().connect()
+        try:
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": LOW_STOCK_LOCK_KEY}
+            )
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not locked:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def _release(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOW_STOCK_LOCK_KEY})
+            await conn.commit()
+        except Exception:
+            # A broken connection must not go back to a pool; dropping it
+            # ends the database session, which releases the lock.
+            await conn.invalidate()
+        finally:
+            await conn.close()
+
+    # -- scanning ------------------------------------------------------------
+
+    async def scan(self) -> list[LowStockAlert]:
+        """Run one scan and send the new alerts; return them."""
+        if not await self._acquire():
+            return []
+        rows = (await self._conn.execute(LOW_STOCK_SQL)).all()
+        await self._conn.commit()
+
+        low = {row.id: row for row in rows}
+        # Restocked products may alert again on their next drop.
+        self._alerted &= low.keys()
+        alerts = [
+            LowStockAlert(row.id, row.sku, row.name, row.available, row.low_stock_threshold)
+            for product_id, row in sorted(low.items(), key=lambda item: item[1].sku)
+            if product_id not in self._alerted
+        ]
+        if alerts:
+            await self._notify(alerts)
+            await self._conn.commit()
+            self._alerted.update(alert.product_id for alert in alerts)
+        return alerts
+
+    async def _notify(self, alerts: list[LowStockAlert]) -> None:
+        recipients = [r.strip() for r in settings.low_stock_alert_recipients.split(",") if r.strip()]
+        subject = f"Low stock: {len(alerts)} product(s) need restocking"
+        body = "\n".join(alert.line() for alert in alerts)
+        if not recipients:
+            logger.warning("%s\n%s", subject, body)
+            return
+        for recipient in recipients:
+            await outbox.enqueue_email(self._conn, recipient, subject, body)
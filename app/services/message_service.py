@@ -7,19 +7,35 @@
 """
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.message import Message
 from app.schemas.message import MessageCreate
-
-
-async def get_messages(db: AsyncSession) -> List[Message]:
-    """Return all messages."""
-    result = await db.execute(select(Message))
-    return result.scalars().all()
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+async def get_messages(
+    db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 50
+) -> Tuple[List[Message], Optional[str]]:
+    """Return one page of messages, newest first.
+
+    Pages are read in order from ``ix_messages_created`` (see
+    ``app/db/sql/0013_messages_created_index.sql``).  The second element is
+    the cursor of the next page, or None on the last page.
+    """
+    query = select(Message)
+    if cursor is not None:
+        created_at, message_id = decode_cursor(cursor)
+        query = query.where(tuple_(Message.created_at, Message.id) < tuple_(created_at, message_id))
+    result = await db.execute(
+        query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+    )
+    messages = list(result.scalars().all())
+    next_cursor = encode_cursor(messages[limit - 1]) if len(messages) > limit else None
+    return messages[:limit], next_cursor
 
 
 async def create_message(db: AsyncSession, message_in: MessageCreate) -> Message:
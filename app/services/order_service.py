@@ -4,43 +4,229 @@
     Provides operations for retrieving and creating orders.  In a real
     implementation, row‑level security should restrict the orders returned or
     created based on the current user context.
+
+    A customer's order history is paginated by keyset on
+    ``(created_at, id)``, newest first, which the composite index
+    ``ix_orders_client_created`` serves directly: every page costs the same
+    however deep it is.  Order counts and lifetime spend come from
+    ``customer_order_summaries``, which a trigger on ``orders`` keeps up to
+    date, so account pages do not aggregate the order history.
+
+    Checkout costs the same number of database round trips whatever the
+    number of lines: one query fetches the prices of every SKU, the totals
+    are computed in a single pass over the lines, and one statement inserts
+    the order header together with all of its lines and queues its
+    ``order.created`` event in the outbox (see ``app.services.outbox``).
 """
 from __future__ import annotations
 
-from typing import List
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, BIGINT, INTEGER, TEXT, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.settings import settings
+from app.db.models.customer_order_summary import CustomerOrderSummary
 from app.db.models.order import Order
+from app.db.models.product import Product
 from app.schemas.order import OrderCreate
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@dataclass
+class PricedLine:
+    """An order line priced from the catalog."""
+
+    id: uuid.UUID
+    product_id: uuid.UUID
+    sku: str
+    name: str
+    quantity: int
+    unit_price_cents: int
+    line_total_cents: int
+
+
+@dataclass
+class OrderTotals:
+    subtotal_cents: int
+    discount_cents: int
+    shipping_cents: int
+    tax_cents: int
+    total_cents: int
+
+
+# Header and lines in one statement: the data-modifying CTE inserts the
+# lines from parallel arrays, so the statement does not grow with the order.
+# The order.created event goes to the outbox in the same statement.
+INSERT_ORDER_SQL = text(
+    """
+    WITH header AS (
+        INSERT INTO orders (id, client_id, subtotal_cents, discount_cents, shipping_cents,
+                            tax_cents, total_cents, currency, status, notes)
+        VALUES (:id, :client_id, :subtotal_cents, :discount_cents, :shipping_cents,
+                :tax_cents, :total_cents, :currency, 'pending', :notes)
+        RETURNING *
+    ), lines AS (
+        INSERT INTO order_items (id, order_id, product_id, sku, name, quantity,
+                                 unit_price_cents, line_total_cents)
+        SELECT l.id, header.id, l.product_id, l.sku, l.name, l.quantity,
+               l.unit_price_cents, l.line_total_cents
+        FROM header,
+             unnest(:line_ids, :product_ids, :skus, :names, :quantities,
+                    :unit_prices, :line_totals)
+                 AS l(id, product_id, sku, name, quantity, unit_price_cents, line_total_cents)
+    ), event AS (
+        INSERT INTO outbox (kind, topic, payload)
+        SELECT 'event', 'order.created',
+               jsonb_build_object('order_id', header.id, 'client_id', header.client_id,
+                                  'total_cents', header.total_cents, 'currency', header.currency)
+        FROM header
+    )
+    SELECT * FROM header
+    """
+).bindparams(
+    bindparam("line_ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("product_ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("skus", type_=ARRAY(TEXT)),
+    bindparam("names", type_=ARRAY(TEXT)),
+    bindparam("quantities", type_=ARRAY(INTEGER)),
+    bindparam("unit_prices", type_=ARRAY(BIGINT)),
+    bindparam("line_totals", type_=ARRAY(BIGINT)),
+)
+
+
+async def get_orders(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Tuple[List[Order], Optional[str]]:
+    """Return one page of a customer's orders, newest first.
+
+    The second element is the cursor of the next page, or None on the last
+    page.
+    """
+    query = select(Order).where(Order.client_id == client_id)
+    if cursor is not None:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.where(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+    result = await db.execute(
+        query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+    )
+    orders = list(result.scalars().all())
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+
+async def get_order_summaries(db: AsyncSession, client_id: uuid.UUID) -> List[CustomerOrderSummary]:
+    """Return the order summary of a customer, one row per currency."""
+    result = await db.execute(
+        select(CustomerOrderSummary)
+        .where(CustomerOrderSummary.client_id == client_id)
+        .order_by(CustomerOrderSummary.currency)
+    )
+    return list(result.scalars().all())
+
+
+async def price_lines(db: AsyncSession, order_in: OrderCreate) -> Tuple[List[PricedLine], str]:
+    """Price the requested SKUs with one query; return the lines and currency.
+
+    Repeated SKUs are merged.  Raises HTTP 422 for unknown or inactive SKUs
+    and for carts mixing currencies.
+    """
+    quantities: dict[str, int] = {}
+    for item in order_in.items:
+        quantities[item.sku] = quantities.get(item.sku, 0) + item.quantity
+
+    result = await db.execute(
+        select(Product.id, Product.sku, Product.name, Product.price_cents, Product.currency).where(
+            Product.sku.in_(list(quantities)),
+            Product.is_active == True,  # noqa: E712
+            Product.deleted_at.is_(None),
+        )
+    )
+    products = {row.sku: row for row in result.all()}
+    missing = [sku for sku in quantities if sku not in products]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Unknown or unavailable SKUs", "skus": missing},
+        )
+    currencies = {row.currency for row in products.values()}
+    if len(currencies) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="All products of an order must share one currency",
+        )
+
+    lines = [
+        PricedLine(
+            id=uuid.uuid4(),
+            product_id=products[sku].id,
+            sku=sku,
+            name=products[sku].name,
+            quantity=quantity,
+            unit_price_cents=products[sku].price_cents,
+            line_total_cents=products[sku].price_cents * quantity,
+        )
+        for sku, quantity in quantities.items()
+    ]
+    return lines, currencies.pop()
+
+
+def compute_totals(lines: Sequence[PricedLine]) -> OrderTotals:
+    """Compute the order totals from priced lines (integer cents throughout)."""
+    subtotal = sum(line.line_total_cents for line in lines)
+    discount = 0
+    if settings.order_discount_bp and subtotal >= settings.order_discount_min_subtotal_cents:
+        discount = subtotal * settings.order_discount_bp // 10_000
+    shipping = 0 if subtotal >= settings.order_free_shipping_min_cents else settings.order_shipping_cents
+    # Round half up to the cent.
+    tax = ((subtotal - discount) * settings.order_tax_bp + 5_000) // 10_000
+    return OrderTotals(
+        subtotal_cents=subtotal,
+        discount_cents=discount,
+        shipping_cents=shipping,
+        tax_cents=tax,
+        total_cents=subtotal - discount + shipping + tax,
+    )
 
 
-async def get_orders(db: AsyncSession) -> List[Order]:
-    """Return all orders.
+async def create_order(
+    db: AsyncSession, client_id: uuid.UUID, order_in: OrderCreate
+) -> Tuple[Order, List[PricedLine]]:
+    """Check out an order for ``client_id``: price its lines, compute totals and persist it.
 
-    The caller should ensure that RLS context variables are set so that
-    the underlying query is filtered appropriately by the database.
+    Returns the new order and its lines.
     """
-    result = await db.execute(select(Order))
-    return result.scalars().all()
-
-
-async def create_order(db: AsyncSession, order_in: OrderCreate) -> Order:
-    """Create a new order and persist it to the database."""
-    new_order = Order(
-        client_id=order_in.client_id,
-        subtotal_cents=order_in.subtotal_cents,
-        discount_cents=order_in.discount_cents,
-        shipping_cents=order_in.shipping_cents,
-        tax_cents=order_in.tax_cents,
-        total_cents=order_in.total_cents,
-        currency=order_in.currency,
-        status=order_in.status,
-        notes=order_in.notes,
-        internal_notes=order_in.internal_notes,
+    lines, currency = await price_lines(db, order_in)
+    totals = compute_totals(lines)
+    result = await db.execute(
+        select(Order).from_statement(INSERT_ORDER_SQL),
+        {
+            "id": uuid.uuid4(),
+            "client_id": client_id,
+            "subtotal_cents": totals.subtotal_cents,
+            "discount_cents": totals.discount_cents,
+            "shipping_cents": totals.shipping_cents,
+            "tax_cents": totals.tax_cents,
+            "total_cents": totals.total_cents,
+            "currency": currency,
+            "notes": order_in.notes,
+            "line_ids": [line.id for line in lines],
+            "product_ids": [line.product_id for line in lines],
+            "skus": [line.sku for line in lines],
+            "names": [line.name for line in lines],
+            "quantities": [line.quantity for line in lines],
+            "unit_prices": [line.unit_price_cents for line in lines],
+            "line_totals": [line.line_total_cents for line in lines],
+        },
     )
-    db.add(new_order)
+    new_order = result.scalar_one()
     await db.commit()
-    await db.refresh(new_order)
-    return new_order
+    return new_order, lines
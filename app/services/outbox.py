@@ -0,0 +1,261 @@
+"""
+Transactional outbox.
+
+Sending an email (or publishing an event) while handling a request makes
+the request as slow and as unreliable as the mail server, and sending it
+outside the transaction of the change it reports either loses it when the
+process dies after the commit or sends it for a change that was rolled
+back.  Instead, ``enqueue_email`` and ``enqueue_event`` insert a row into
+``outbox`` in the caller's transaction; it becomes visible, and is
+delivered, exactly when the change commits.
+
+Each worker runs an ``OutboxDispatcher`` that claims due messages in
+batches of ``OUTBOX_BATCH_SIZE`` with ``FOR UPDATE SKIP LOCKED``, so that
+dispatchers never wait for each other or claim the same message, and
+delivers them with at most ``OUTBOX_CONCURRENCY`` sends in flight.
+Claiming only leases a message for ``OUTBOX_LEASE_SECONDS`` and commits at
+once, so no transaction stays open while sending; if the dispatcher dies,
+the message is claimed again when the lease runs out.  The lease covers the
+whole batch, so a batch must be done well before it expires: sends still
+running half-way through the lease fail with a timeout, and messages whose
+turn has not come by then are handed back, due at once and without using
+up an attempt.  Delivery is
+therefore at least once.  A failed send is retried with exponential
+backoff and the message is marked ``failed`` after
+``OUTBOX_MAX_ATTEMPTS`` attempts.
+
+Dispatchers poll every ``OUTBOX_POLL_INTERVAL`` seconds and are woken as
+soon as messages are committed, through the ``outbox`` notifications of
+``app.core.invalidation`` (see ``app/db/sql/0008_outbox.sql``).  Sent
+messages are deleted after ``OUTBOX_RETENTION_DAYS``.
+
+Email addresses are personal data and are stored encrypted like the other
+PII columns.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from sqlalchemy import bindparam, insert, text
+from sqlalchemy.dialects.postgresql import ARRAY, BIGINT, DOUBLE_PRECISION, TEXT
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core import metrics, security
+from app.core.invalidation import RowChange, change_listener
+from app.core.settings import settings
+from app.db.models.outbox_message import OutboxMessage
+from app.services import email_service
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 3600.0
+MAX_RETRY_DELAY = 3600.0
+
+# Returned by a send whose turn came after the batch deadline.
+NOT_STARTED = object()
+
+CLAIM_SQL = text(
+    """
+    WITH due AS (
+        SELECT id FROM outbox
+        WHERE status = 'pending' AND available_at <= now()
+        ORDER BY available_at, id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE outbox o
+    SET attempts = o.attempts + 1, available_at = now() + make_interval(secs => :lease)
+    FROM due
+    WHERE o.id = due.id
+    RETURNING o.id, o.kind, o.topic, o.payload, o.attempts
+    """
+)
+
+MARK_SENT_SQL = text(
+    "UPDATE outbox SET status = 'sent', dispatched_at = now(), last_error = NULL WHERE id = ANY(:ids)"
+).bindparams(bindparam("ids", type_=ARRAY(BIGINT)))
+
+RELEASE_SQL = text(
+    "UPDATE outbox SET attempts = attempts - 1, available_at = now() WHERE id = ANY(:ids)"
+).bindparams(bindparam("ids", type_=ARRAY(BIGINT)))
+
+MARK_FAILED_SQL = text(
+    """
+    UPDATE outbox o
+    SET status = f.status, last_error = f.error, available_at = now() + make_interval(secs => f.delay)
+    FROM unnest(:ids, :statuses, :errors, :delays) AS f(id, status, error, delay)
+    WHERE o.id = f.id
+    """
+).bindparams(
+    bindparam("ids", type_=ARRAY(BIGINT)),
+    bindparam("statuses", type_=ARRAY(TEXT)),
+    bindparam("errors", type_=ARRAY(TEXT)),
+    bindparam("delays", type_=ARRAY(DOUBLE_PRECISION)),
+)
+
+PURGE_SQL = text(
+    "DELETE FROM outbox WHERE status = 'sent' AND dispatched_at < now() - make_interval(days => :days)"
+)
+
+Executor = Union[AsyncSession, AsyncConnection]
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+async def enqueue_email(db: Executor, to: str, subject: str, body: str) -> None:
+    """Queue an email in ``db``'s transaction; it is sent once that commits."""
+    payload = {"to_enc": security.encrypt_data(to).decode(), "subject": subject, "body": body}
+    await db.execute(insert(OutboxMessage).values(kind="email", topic="email", payload=payload))
+
+
+async def enqueue_event(db: Executor, topic: str, payload: dict[str, Any]) -> None:
+    """Queue an event for the handlers of ``topic`` in ``db``'s transaction."""
+    await db.execute(insert(OutboxMessage).values(kind="event", topic=topic, payload=payload))
+
+
+def retry_delay(attempts: int) -> float:
+    """Return the seconds to wait before the next attempt, with jitter."""
+    return min(MAX_RETRY_DELAY, 5.0 * 2 ** attempts) * random.uniform(0.5, 1.0)
+
+
+class OutboxDispatcher:
+    """Delivers the messages queued in ``outbox``."""
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._purged_at = 0.0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Call ``handler`` with the payload of every ``topic`` event."""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def _deliver(self, kind: str, topic: str, payload: dict[str, Any]) -> None:
+        if kind == "email":
+            to = security.decrypt_data(payload["to_enc"].encode())
+            await email_service.send_email(to, payload["subject"], payload["body"])
+        elif kind == "event":
+            for handler in self._handlers.get(topic, ()):
+                await handler(payload)
+        else:
+            raise ValueError(f"unknown outbox message kind {kind!r}")
+
+    async def dispatch_once(self) -> int:
+        """Claim one batch of due messages and deliver it; return its size."""
+        from app.db.session import get_engine
+
+        engine = get_engine()
+        async with engine.begin() as conn:
+            rows = (
+                await conn.execute(
+                    CLAIM_SQL,
+                    {"batch_size": settings.outbox_batch_size, "lease": settings.outbox_lease_seconds},
+                )
+            ).all()
+        if not rows:
+            return 0
+
+        semaphore = asyncio.Semaphore(settings.outbox_concurrency)
+        # The lease started at the claim, for every row of the batch: nothing
+        # may still be sending when it runs out and another dispatcher can
+        # claim the row again.
+        deadline = time.monotonic() + settings.outbox_lease_seconds / 2
+
+        async def send(row: Any) -> Union[BaseException, None, object]:
+            async with semaphore:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return NOT_STARTED
+                try:
+                    await asyncio.wait_for(self._deliver(row.kind, row.topic, row.payload), remaining)
+                except Exception as exc:
+                    return exc
+                return None
+
+        errors = await asyncio.gather(*(send(row) for row in rows))
+        sent = [row for row, error in zip(rows, errors) if error is None]
+        released = [row for row, error in zip(rows, errors) if error is NOT_STARTED]
+        failed = [(row, error) for row, error in zip(rows, errors) if error not in (None, NOT_STARTED)]
+        gave_up = {row.id for row, _ in failed if row.attempts >= settings.outbox_max_attempts}
+        async with engine.begin() as conn:
+            if released:
+                await conn.execute(RELEASE_SQL, {"ids": [row.id for row in released]})
+            if sent:
+                await conn.execute(MARK_SENT_SQL, {"ids": [row.id for row in sent]})
+            if failed:
+                await conn.execute(
+                    MARK_FAILED_SQL,
+                    {
+                        "ids": [row.id for row, _ in failed],
+                        "statuses": ["failed" if row.id in gave_up else "pending" for row, _ in failed],
+                        "errors": [repr(error) for _, error in failed],
+                        "delays": [retry_delay(row.attempts) for row, _ in failed],
+                    },
+                )
+
+        if released:
+            logger.info("Outbox batch ran out of time; handed back %d unsent message(s)", len(released))
+        for row in sent:
+            metrics.OUTBOX_MESSAGES.labels(kind=row.kind, outcome="sent").inc()
+        for row, error in failed:
+            outcome = "failed" if row.id in gave_up else "retry"
+            metrics.OUTBOX_MESSAGES.labels(kind=row.kind, outcome=outcome).inc()
+            logger.warning(
+                "Outbox %s %s (id %d) attempt %d failed (%s): %r",
+                row.kind, row.topic, row.id, row.attempts, "giving up" if outcome == "failed" else "will retry", error,
+            )
+        return len(rows)
+
+    async def _purge(self) -> None:
+        from app.db.session import get_engine
+
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        async with get_engine().begin() as conn:
+            await conn.execute(PURGE_SQL, {"days": settings.outbox_retention_days})
+        self._purged_at = time.monotonic()
+
+    def on_change(self, change: RowChange) -> None:
+        """Dispatch now rather than at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            claimed = 0
+            try:
+                claimed = await self.dispatch_once()
+                await self._purge()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+            if claimed >= settings.outbox_batch_size:
+                continue  # more messages are due
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.outbox_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+outbox_dispatcher = OutboxDispatcher()
+change_listener.subscribe("outbox", outbox_dispatcher.on_change)
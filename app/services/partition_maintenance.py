@@ -0,0 +1,127 @@
+"""
+Monthly partition maintenance.
+
+``messages`` and ``audit_logs`` are range partitioned by month (see
+``app/db/sql/0007_monthly_partitions.sql``).  Every
+``PARTITION_MAINTENANCE_INTERVAL`` seconds, and at startup, the maintainer
+creates the partitions of the current month and the next
+``PARTITION_MONTHS_AHEAD`` months, so inserts never find their month
+missing, and retires the months older than the table's retention
+(``MESSAGES_RETENTION_MONTHS``, ``AUDIT_LOG_RETENTION_MONTHS``; 0 keeps
+everything).  Retiring a month detaches its partition, which leaves it as
+a plain table to archive (``pg_dump -t``) and drop by hand, or drops it
+outright with ``PARTITION_DROP_EXPIRED``.  Either is a catalog change that
+takes milliseconds, where deleting the rows would rewrite the table and
+leave it bloated.
+
+Every worker runs the maintenance; the SQL functions serialise on an
+advisory lock per table and are no-ops when there is nothing to do.
+Tables that are not partitioned (a schema managed elsewhere) are skipped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_SQL = text(
+    "SELECT relname FROM pg_class "
+    "WHERE relname IN ('messages', 'audit_logs') AND relkind = 'p' "
+    "AND relnamespace = 'public'::regnamespace"
+)
+CREATE_SQL = text("SELECT create_monthly_partitions(:parent, :from_month, :to_month)")
+EXPIRE_SQL = text("SELECT expire_monthly_partitions(:parent, :keep_months, :drop_data)")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionMaintainer:
+    """Creates upcoming monthly partitions and retires expired ones."""
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval or settings.partition_maintenance_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def retention(self) -> dict[str, int]:
+        """Return the months of data kept per table (0: keep everything)."""
+        return {
+            "messages": settings.messages_retention_months,
+            "audit_logs": settings.audit_log_retention_months,
+        }
+
+    async def run_once(self, today: Optional[date] = None) -> dict[str, list[str]]:
+        """Run one maintenance pass; return the partitions retired per table."""
+        from app.db.session import get_engine
+
+        # Partitions are UTC months.
+        this_month = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        retired: dict[str, list[str]] = {}
+        async with get_engine().connect() as conn:
+            tables = (await conn.scalars(PARTITIONED_SQL)).all()
+            for table in tables:
+                created = await conn.scalar(
+                    CREATE_SQL,
+                    {
+                        "parent": table,
+                        "from_month": this_month,
+                        "to_month": _add_months(this_month, settings.partition_months_ahead),
+                    },
+                )
+                keep_months = self.retention()[table]
+                expired: list[str] = []
+                if keep_months > 0:
+                    expired = list(
+                        await conn.scalars(
+                            EXPIRE_SQL,
+                            {
+                                "parent": table,
+                                "keep_months": keep_months,
+                                "drop_data": settings.partition_drop_expired,
+                            },
+                        )
+                    )
+                await conn.commit()
+                if created:
+                    logger.info("Created %d monthly partitions of %s", created, table)
+                if expired:
+                    logger.info(
+                        "%s expired partitions of %s: %s",
+                        "Dropped" if settings.partition_drop_expired else "Detached",
+                        table,
+                        ", ".join(expired),
+                    )
+                retired[table] = expired
+        return retired
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="partition-maintenance")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Partition maintenance failed")
+            await asyncio.sleep(self.interval)
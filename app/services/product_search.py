@@ -0,0 +1,262 @@
+"""
+Product search service.
+
+``search_products`` runs a full-text query against the generated
+``products.search_vector`` column (GIN indexed) and ranks the matches with
+``ts_rank``.  When full-text search finds fewer products than requested
+and the ``pg_trgm`` extension is installed, the remainder is filled with
+products whose name is similar to the query, so that typos such as
+"tulp" still find "Tulip".
+
+``product_name_index`` is an in-memory prefix index of product names for
+autocomplete.  It is a sorted list of ``(word, product id)`` pairs searched
+with ``bisect``, so a lookup is a binary search plus a short scan and
+takes microseconds.  It is loaded at startup, updated directly when this
+worker writes a product and, for writes made elsewhere, refreshed product
+by product from the change notifications of ``app.core.invalidation``.
+While the change listener is disconnected it is synced incrementally from
+``updated_at`` instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import String, cast, func, literal, select, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import RowChange, change_listener
+from app.core.settings import settings
+from app.db.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = "english"
+SYNC_OVERLAP = timedelta(seconds=60)
+WORD_RE = re.compile(r"\w+")
+
+_trigram_available: Optional[bool] = None
+
+
+async def _has_trigram(db: AsyncSession) -> bool:
+    """Return whether pg_trgm is installed; checked once per process."""
+    global _trigram_available
+    if _trigram_available is None:
+        found = await db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        _trigram_available = found is not None
+    return _trigram_available
+
+
+async def search_products(db: AsyncSession, q: str, limit: int = 20) -> List[Product]:
+    """Return active products matching ``q``, best matches first."""
+    q = q.strip()
+    if not q:
+        return []
+    query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+    rank = func.ts_rank(Product.search_vector, query)
+    result = await db.execute(
+        select(Product)
+        .where(Product.is_active == True, Product.search_vector.op("@@")(query))  # noqa: E712
+        .order_by(rank.desc(), Product.name)
+        .limit(limit)
+    )
+    products = list(result.scalars().all())
+    if len(products) >= limit or not await _has_trigram(db):
+        return products
+
+    # Typo tolerance: "q <% name" matches when q is similar to a word of name.
+    similarity = func.word_similarity(q, Product.name)
+    fuzzy = select(Product).where(
+        Product.is_active == True,  # noqa: E712
+        literal(q, String).op("<%")(Product.name),
+    )
+    found = [p.id for p in products]
+    if found:
+        fuzzy = fuzzy.where(Product.id.notin_(found))
+    result = await db.execute(
+        fuzzy.order_by(similarity.desc(), Product.name).limit(limit - len(products))
+    )
+    return products + list(result.scalars().all())
+
+
+def _words(name: str) -> list[str]:
+    return [word.lower() for word in WORD_RE.findall(name)]
+
+
+class ProductNameIndex:
+    """Sorted in-memory index of the words of active product names."""
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[str, str]] = []
+        self._names: dict[str, str] = {}
+        self._loaded = False
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._changed: set[str] = set()
+        self._reload = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # -- updates -------------------------------------------------------------
+
+    def upsert(self, product_id: uuid.UUID | str, name: str, active: bool = True) -> None:
+        """Add, rename or (when inactive) remove one product."""
+        key = str(product_id)
+        if self._names.get(key) == name and active:
+            return
+        self.remove(key)
+        if not active:
+            return
+        self._names[key] = name
+        for word in set(_words(name)):
+            bisect.insort(self._entries, (word, key))
+
+    def remove(self, product_id: uuid.UUID | str) -> None:
+        key = str(product_id)
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        for word in set(_words(name)):
+            pos = bisect.bisect_left(self._entries, (word, key))
+            if pos < len(self._entries) and self._entries[pos] == (word, key):
+                del self._entries[pos]
+
+    def rebuild(self, products: Iterable[tuple[uuid.UUID, str]]) -> None:
+        """Replace the whole index with ``(id, name)`` pairs."""
+        names = {str(product_id): name for product_id, name in products}
+        self._entries = sorted(
+            (word, key) for key, name in names.items() for word in set(_words(name))
+        )
+        self._names = names
+
+    # -- lookup --------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict[str, str]]:
+        """Return up to ``limit`` products with a name word starting with ``prefix``.
+
+        Every word of ``prefix`` must match: the last one as a prefix and
+        the others as whole words, so "red ro" finds "Red Rose Bouquet".
+        """
+        words = _words(prefix)
+        if not words:
+            return []
+        *complete, last = words
+        suggestions: list[dict[str, str]] = []
+        seen: set[str] = set()
+        pos = bisect.bisect_left(self._entries, (last, ""))
+        while pos < len(self._entries) and len(suggestions) < limit:
+            word, key = self._entries[pos]
+            if not word.startswith(last):
+                break
+            pos += 1
+            if key in seen:
+                continue
+            seen.add(key)
+            name = self._names[key]
+            if complete and not set(complete) <= set(_words(name)):
+                continue
+            suggestions.append({"id": key, "name": name})
+        return suggestions
+
+    # -- database sync -------------------------------------------------------
+
+    async def sync(self) -> int:
+        """Load products changed since the last sync; return how many were read."""
+        from app.db.session import async_session
+
+        query = select(Product.id, Product.name, Product.is_active, Product.deleted_at, Product.updated_at)
+        if self._synced_at is not None:
+            # Overlap so rows committed late by a slow transaction are seen.
+            query = query.where(Product.updated_at > self._synced_at - SYNC_OVERLAP)
+        async with async_session() as session:
+            rows = (await session.execute(query)).all()
+        if not self._loaded:
+            self.rebuild((row.id, row.name) for row in rows if row.is_active and row.deleted_at is None)
+            self._loaded = True
+        else:
+            for row in rows:
+                self.upsert(row.id, row.name, row.is_active and row.deleted_at is None)
+        stamps = [row.updated_at for row in rows if row.updated_at is not None]
+        if self._synced_at is not None:
+            stamps.append(self._synced_at)
+        self._synced_at = max(stamps, default=None)
+        return len(rows)
+
+    # -- change notifications ------------------------------------------------
+
+    def on_change(self, change: RowChange) -> None:
+        """Schedule a reload of the changed product (or of everything)."""
+        if change.op == "RESET" or change.id is None:
+            self._reload = True
+        elif change.op == "DELETE":
+            self.remove(change.id)
+            return
+        else:
+            self._changed.add(str(change.id))
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh(), name="product-name-index-refresh")
+
+    async def _refresh(self) -> None:
+        from app.db.session import async_session
+
+        # Let a burst of changes (a bulk update) accumulate into one query.
+        await asyncio.sleep(0.05)
+        try:
+            while self._reload or self._changed:
+                if self._reload:
+                    self._reload, self._changed = False, set()
+                    self._loaded, self._synced_at = False, None
+                    await self.sync()
+                    continue
+                ids, self._changed = self._changed, set()
+                query = select(Product.id, Product.name, Product.is_active, Product.deleted_at).where(
+                    Product.id.in_([uuid.UUID(key) for key in ids])
+                )
+                async with async_session() as session:
+                    rows = (await session.execute(query)).all()
+                for row in rows:
+                    self.upsert(row.id, row.name, row.is_active and row.deleted_at is None)
+                for key in ids - {str(row.id) for row in rows}:
+                    self.remove(key)
+        except Exception:
+            logger.exception("Product name index refresh failed")
+
+    async def start(self) -> None:
+        """Load the index, then keep it in sync in the background."""
+        try:
+            await self.sync()
+        except Exception:
+            logger.exception("Could not load the product name index; retrying in the background")
+        self._task = asyncio.create_task(self._run(), name="product-name-index-sync")
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._refresh_task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.product_index_sync_interval)
+            if change_listener.connected:
+                continue
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Product name index sync failed")
+
+
+product_name_index = ProductNameIndex()
+change_listener.subscribe("products", product_name_index.on_change)
@@ -4,22 +4,115 @@
     Provides functions to retrieve, create, and update products from the database.
     Functions return ORM objects that can be converted to Pydantic models using
     ``model_validate``.
+
+    Catalog browsing reads facet counts from ``product_facet_counts``, which a
+    trigger on ``products`` keeps up to date, instead of grouping products on
+    every page view.
+
+    Product writes need no cache purging here: triggers on ``products``
+    queue a purge of the edge cache keys they affect (see
+    ``app.services.edge_cache``) in the transaction of the write.
+
+    Catalog reads are coalesced with ``SingleFlight``: identical queries
+    running at the same time on this worker execute once and share the
+    rows, so a burst of page views costs one query per distinct page.
 """
 from __future__ import annotations
 
-from typing import List
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.singleflight import SingleFlight, statement_key
 from app.db.models.product import Product
+from app.db.models.product_facet import ProductFacetCount
 from app.schemas.product import ProductCreate
+from app.services.product_search import product_name_index
+
+
+_catalog_reads = SingleFlight("products")
+
+
+async def _coalesced_all(db: AsyncSession, query, *, scalars: bool = True) -> List[Any]:
+    """Run ``query`` once for all concurrent identical callers; return its rows.
+
+    The returned list is the caller's own; the objects in it are shared.
+    """
+
+    async def run() -> List[Any]:
+        result = await db.execute(query)
+        return result.scalars().all() if scalars else result.all()
+
+    # Sessions on different databases (primary, replicas) do not share
+    # results: a client reading its own writes must not get replica rows.
+    key = (id(getattr(db, "bind", None)), statement_key(query))
+    return list(await _catalog_reads.do(key, run))
 
 
 async def get_products(db: AsyncSession) -> List[Product]:
     """Return all active products."""
-    result = await db.execute(select(Product).where(Product.is_active == True))  # noqa: E712
-    return result.scalars().all()
+    return await _coalesced_all(db, select(Product).where(Product.is_active == True))  # noqa: E712
+
+
+# Price facet buckets as (value, min cents inclusive, max cents exclusive).
+# Must match product_price_bucket() in app/db/sql/0003_product_facets.sql.
+PRICE_BUCKETS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "under_30": (None, 3000),
+    "30_60": (3000, 6000),
+    "60_100": (6000, 10000),
+    "100_plus": (10000, None),
+}
+
+
+async def get_facet_counts(db: AsyncSession) -> Dict[str, List[Tuple[str, int]]]:
+    """Return ``{facet: [(value, count), ...]}`` for all active products."""
+    rows = await _coalesced_all(
+        db,
+        select(ProductFacetCount.facet, ProductFacetCount.value, ProductFacetCount.count)
+        .where(ProductFacetCount.count > 0)
+        .order_by(ProductFacetCount.facet, ProductFacetCount.count.desc(), ProductFacetCount.value),
+        scalars=False,
+    )
+    facets: Dict[str, List[Tuple[str, int]]] = {}
+    for facet, value, count in rows:
+        facets.setdefault(facet, []).append((value, count))
+    return facets
+
+
+async def browse_products(
+    db: AsyncSession,
+    *,
+    category_id: Optional[uuid.UUID] = None,
+    price: Optional[str] = None,
+    featured: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+    limit: int = 24,
+    offset: int = 0,
+) -> Tuple[List[Product], bool]:
+    """Return one page of active products matching the filters.
+
+    The second element tells whether more products follow the page.
+    """
+    query = select(Product).where(Product.is_active == True, Product.deleted_at.is_(None))  # noqa: E712
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    if price is not None:
+        low, high = PRICE_BUCKETS[price]
+        if low is not None:
+            query = query.where(Product.price_cents >= low)
+        if high is not None:
+            query = query.where(Product.price_cents < high)
+    if featured is not None:
+        query = query.where(Product.is_featured == featured)
+    if in_stock is not None:
+        available = Product.stock - Product.reserved_stock > 0
+        query = query.where(available if in_stock else ~available)
+    products = await _coalesced_all(
+        db, query.order_by(Product.name, Product.id).offset(offset).limit(limit + 1)
+    )
+    return products[:limit], len(products) > limit
 
 
 async def create_product(db: AsyncSession, product_in: ProductCreate) -> Product:
@@ -28,6 +121,7 @@ async def create_product(db: AsyncSession, product_in: ProductCreate) -> Product
         sku=product_in.sku,
         slug=product_in.slug,
         name=product_in.name,
+        category_id=product_in.category_id,
         description=product_in.description,
         price_cents=product_in.price_cents,
         compare_at_price_cents=product_in.compare_at_price_cents,
@@ -42,4 +136,5 @@ async def create_product(db: AsyncSession, product_in: ProductCreate) -> Product
     db.add(new_product)
     await db.commit()
     await db.refresh(new_product)
+    product_name_index.upsert(new_product.id, new_product.name, new_product.is_active)
     return new_product
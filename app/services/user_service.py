@@ -1,27 +1,60 @@
 """
 User service.
 
-Provides database operations for the unified users view. Note that the
-``users_view`` is a PostgreSQL view defined in the SQL schema, so this
-service should treat it as read-only.
+Provides database operations for the unified list of customers and
+support staff.  Users are read from ``user_directory``, the table that
+triggers keep in step with ``customers`` and ``support_staff`` (see
+``app.db.models.user``); it is read-only for the application.
+
+Listings are paginated by keyset on ``(created_at, id)``, newest first,
+and served by ``ix_user_directory_created`` or, when filtered, by the
+index leading with the filtered columns (``ix_user_directory_role_created``,
+``ix_user_directory_active_created``,
+``ix_user_directory_role_active_created``), so a page costs the same
+however many users there are.
 """
 
 from __future__ import annotations
 
-from typing import List
+import uuid
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.user import User
-
-
-async def get_users(db: AsyncSession) -> List[User]:
-    """Return all users visible to the current actor.
-
-    In this simplified implementation, no RLS filtering is applied. The
-    caller should ensure the session variables are set appropriately
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+async def get_users(
+    db: AsyncSession,
+    *,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[User], Optional[str]]:
+    """Return one page of users, newest first.
+
+    The second element is the cursor of the next page, or None on the last
+    page.  In this simplified implementation, no RLS filtering is applied.
+    The caller should ensure the session variables are set appropriately
     before invoking this function.
     """
-    result = await db.execute(select(User))
-    return result.scalars().all()
+    query = select(User)
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if cursor is not None:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.where(tuple_(User.created_at, User.id) < tuple_(created_at, user_id))
+    result = await db.execute(query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1))
+    users = list(result.scalars().all())
+    next_cursor = encode_cursor(users[limit - 1]) if len(users) > limit else None
+    return users[:limit], next_cursor
+
+
+async def get_user(db: AsyncSession, user_id: uuid.UUID) -> Optional[User]:
+    """Return one user by id, or None."""
+    return await db.get(User, user_id)
@@ -0,0 +1,364 @@
+"""
+Query plan regression checks.
+
+Every case runs one service function against a seeded database while the
+SQL it sends is captured from the engine, then asks PostgreSQL for the
+plan of each statement with ``EXPLAIN (FORMAT JSON)`` (the statements are
+not executed a second time) and checks the plans against the case's rules:
+
+* no sequential scan of a large table, unless the case reads the whole
+  table by design;
+* the indexes the case depends on appear in its plans;
+* paginated reads come back in index order, without a sort.
+
+A model or query change that loses an index path fails here rather than
+in production.  Writes made by the service functions are rolled back.  The
+background workers (low-stock scanner, outbox dispatcher) commit on their
+own connections and deliver what they claim, so their queries are run
+directly in the rolled-back transaction instead of through the workers.
+
+Coverage is opt-in: only the queries of the functions listed in ``CASES``
+are checked, so a new service query needs a case here to be covered.
+
+On a small database the planner rightly prefers a sequential scan or a
+sort to an index, so the plans are made with ``enable_seqscan`` off (and
+``enable_sort`` off for the paginated cases).  The planner then only
+scans or sorts when no index can do the job, whatever the size of the
+data, which is exactly the regression to catch.
+
+The checks need a database seeded with the load-test dataset and are
+skipped unless ``QUERY_PLAN_TESTS=1``.  They use the application settings
+(``DB_*`` and the secrets the dataset was generated with)::
+
+    python -m loadtest.dataset --create-schema --customers 20000 \\
+        --products 5000 --orders 100000 --messages 50000
+    QUERY_PLAN_TESTS=1 pytest app/tests/integration/test_query_plans.py
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("QUERY_PLAN_TESTS") != "1",
+    reason="set QUERY_PLAN_TESTS=1 and DB_* to a seeded database",
+)
+
+# Tables that grow with the business: reading them whole is a regression.
+LARGE_TABLES = {
+    "customers", "products", "orders", "order_items", "messages", "audit_logs", "revoked_tokens", "outbox",
+    "user_directory",
+}
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+PARTITION = re.compile(r"_p\d{6}$")
+
+
+@dataclass
+class Fixture:
+    """Seeded rows the cases query for."""
+
+    client_id: uuid.UUID
+    sku: str
+    search_word: str
+
+
+@dataclass
+class PlanCase:
+    name: str
+    run: Callable[[Any, Fixture], Awaitable[Any]]
+    indexes: tuple[str, ...] = ()
+    seq_scan_ok: tuple[str, ...] = ()
+    no_sort: bool = False
+
+
+@dataclass
+class Node:
+    type: str
+    relation: str | None
+    index: str | None
+
+
+async def _get_orders(db, fx):
+    from app.services import order_service
+
+    _, cursor = await order_service.get_orders(db, fx.client_id, limit=5)
+    assert cursor is not None, "pick a customer with more than one page of orders"
+    await order_service.get_orders(db, fx.client_id, cursor=cursor, limit=5)
+
+
+async def _get_order_summaries(db, fx):
+    from app.services import order_service
+
+    await order_service.get_order_summaries(db, fx.client_id)
+
+
+async def _create_order(db, fx):
+    from app.schemas.order import OrderCreate, OrderItemCreate
+    from app.services import order_service
+
+    order_in = OrderCreate(items=[OrderItemCreate(sku=fx.sku, quantity=2)])
+    await order_service.create_order(db, fx.client_id, order_in)
+
+
+async def _login(db, fx):
+    from app.services import auth_service
+    from loadtest.seed import customer_email
+
+    await auth_service.login(db, customer_email(0), "not-the-password")
+
+
+async def _register_user(db, fx):
+    from app.services import auth_service
+
+    await auth_service.register_user(
+        db,
+        email=f"plan-{uuid.uuid4().hex}@example.com",
+        password="plan-test-password",
+        full_name="Plan Test",
+        phone="+10000000000",
+        address="1 Test Street",
+    )
+
+
+async def _get_products(db, fx):
+    from app.services import product_service
+
+    await product_service.get_products(db)
+
+
+async def _get_facet_counts(db, fx):
+    from app.services import product_service
+
+    await product_service.get_facet_counts(db)
+
+
+async def _browse_products(db, fx):
+    from app.services import product_service
+
+    await product_service.browse_products(db, price="30_60", in_stock=True)
+
+
+async def _search_products(db, fx):
+    from app.services import product_search
+
+    await product_search.search_products(db, fx.search_word)
+    await product_search.search_products(db, fx.search_word[:-1] + "x")
+
+
+async def _create_product(db, fx):
+    from app.schemas.product import ProductCreate
+    from app.services import product_service
+
+    sku = f"PLAN-{uuid.uuid4().hex[:12]}"
+    await product_service.create_product(
+        db, ProductCreate(sku=sku, slug=sku.lower(), name="Plan Test", price_cents=1000, stock=3)
+    )
+
+
+async def _get_messages(db, fx):
+    from app.services import message_service
+
+    _, cursor = await message_service.get_messages(db, limit=5)
+    await message_service.get_messages(db, cursor=cursor, limit=5)
+
+
+async def _create_message(db, fx):
+    from app.schemas.message import MessageCreate
+    from app.services import message_service
+
+    await message_service.create_message(
+        db, MessageCreate(session_id=uuid.uuid4(), client_id=fx.client_id, content="plan test")
+    )
+
+
+async def _get_users(db, fx):
+    from app.services import user_service
+
+    _, cursor = await user_service.get_users(db, limit=5)
+    await user_service.get_users(db, cursor=cursor, limit=5)
+
+
+async def _get_users_by_role(db, fx):
+    from app.services import user_service
+
+    _, cursor = await user_service.get_users(db, role="customer", limit=5)
+    await user_service.get_users(db, role="customer", cursor=cursor, limit=5)
+
+
+async def _get_active_users(db, fx):
+    from app.services import user_service
+
+    _, cursor = await user_service.get_users(db, is_active=True, limit=5)
+    await user_service.get_users(db, is_active=True, cursor=cursor, limit=5)
+
+
+async def _get_active_users_by_role(db, fx):
+    from app.services import user_service
+
+    await user_service.get_users(db, role="customer", is_active=True, limit=5)
+
+
+async def _get_user(db, fx):
+    from app.services import user_service
+
+    await user_service.get_user(db, fx.client_id)
+
+
+async def _low_stock_scan(db, fx):
+    from app.services.inventory_alerts import LOW_STOCK_SQL
+
+    await db.execute(LOW_STOCK_SQL)
+
+
+async def _outbox_claim(db, fx):
+    from app.core.settings import settings
+    from app.services.outbox import CLAIM_SQL
+
+    # Claims are rolled back with the rest: nothing is delivered.
+    await db.execute(CLAIM_SQL, {"batch_size": settings.outbox_batch_size, "lease": settings.outbox_lease_seconds})
+
+
+async def _catalog_version(db, fx):
+    from app.services.catalog_snapshot import CatalogSnapshots
+
+    await CatalogSnapshots(path=os.devnull)._catalog_version()
+
+
+async def _name_index_sync(db, fx):
+    from app.services.product_search import ProductNameIndex
+
+    index = ProductNameIndex()
+    await index.sync()
+
+
+CASES = [
+    PlanCase("order_service.get_orders", _get_orders, indexes=("ix_orders_client_created",), no_sort=True),
+    PlanCase("order_service.get_order_summaries", _get_order_summaries,
+             indexes=("customer_order_summaries_pkey",)),
+    PlanCase("order_service.create_order", _create_order, indexes=("products_sku_key",)),
+    PlanCase("auth_service.login", _login, indexes=("ix_customers_email_hash",)),
+    PlanCase("auth_service.register_user", _register_user, indexes=("ix_customers_email_hash",)),
+    PlanCase("product_service.get_products", _get_products, seq_scan_ok=("products",)),
+    PlanCase("product_service.get_facet_counts", _get_facet_counts),
+    PlanCase("product_service.browse_products", _browse_products, indexes=("ix_products_browse",), no_sort=True),
+    PlanCase("product_search.search_products", _search_products, indexes=("ix_products_search_vector",)),
+    PlanCase("product_service.create_product", _create_product, indexes=("products_pkey",)),
+    PlanCase("message_service.get_messages", _get_messages, indexes=("ix_messages_created",), no_sort=True),
+    PlanCase("message_service.create_message", _create_message),
+    PlanCase("user_service.get_users", _get_users, indexes=("ix_user_directory_created",), no_sort=True),
+    PlanCase("user_service.get_users[role]", _get_users_by_role,
+             indexes=("ix_user_directory_role_created",), no_sort=True),
+    PlanCase("user_service.get_users[is_active]", _get_active_users,
+             indexes=("ix_user_directory_active_created",), no_sort=True),
+    # Any of the role or is_active indexes returns this page in order; which
+    # one is cheapest depends on how selective each filter is in the data.
+    PlanCase("user_service.get_users[role,is_active]", _get_active_users_by_role, no_sort=True),
+    PlanCase("user_service.get_user", _get_user, indexes=("user_directory_pkey",)),
+    PlanCase("inventory_alerts.scan", _low_stock_scan, indexes=("ix_products_low_stock",)),
+    PlanCase("outbox.claim", _outbox_claim, indexes=("ix_outbox_pending",)),
+    PlanCase("catalog_snapshot.version", _catalog_version, seq_scan_ok=("products",)),
+    PlanCase("product_search.ProductNameIndex.sync", _name_index_sync, seq_scan_ok=("products",)),
+]
+
+
+def _nodes(plan: dict, index_parents: dict[str, str]) -> Iterator[Node]:
+    relation = plan.get("Relation Name")
+    if relation is not None:
+        relation = PARTITION.sub("", relation)
+    index = plan.get("Index Name")
+    yield Node(plan["Node Type"], relation, index_parents.get(index, index))
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child, index_parents)
+
+
+async def _fixture(conn) -> Fixture:
+    from sqlalchemy import text
+
+    client_id = await conn.scalar(text(
+        "SELECT client_id FROM orders GROUP BY client_id HAVING count(*) > 5 LIMIT 1"
+    ))
+    product = (await conn.execute(text(
+        "SELECT sku, name FROM products WHERE is_active AND deleted_at IS NULL LIMIT 1"
+    ))).one_or_none()
+    if client_id is None or product is None:
+        pytest.skip("seed the database first (python -m loadtest.dataset)")
+    word = max(re.findall(r"\w+", product.name), key=len)
+    return Fixture(client_id=client_id, sku=product.sku, search_word=word.lower())
+
+
+async def _capture_plans() -> dict[str, list[tuple[str, list[Node]]]]:
+    from sqlalchemy import event, text
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.db.session import dispose_engine, get_engine
+
+    engine = get_engine()
+    captured: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+        if not executemany and EXPLAINABLE.match(statement):
+            captured.append((statement, parameters))
+
+    plans: dict[str, list[tuple[str, list[Node]]]] = {}
+    try:
+        async with engine.connect() as conn:
+            await conn.begin()
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            fx = await _fixture(conn)
+            # Partitions of a partitioned index are reported under the index.
+            index_parents = dict((await conn.execute(text(
+                "SELECT c.relname, p.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE c.relkind = 'i'"
+            ))).all())
+            for case in CASES:
+                # Service commits become savepoints of the outer transaction.
+                db = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+                event.listen(engine.sync_engine, "before_cursor_execute", capture)
+                try:
+                    await case.run(db, fx)
+                finally:
+                    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+                    await db.close()
+                statements, captured[:] = list(captured), []
+                plans[case.name] = []
+                await conn.exec_driver_sql(f"SET LOCAL enable_sort = {'off' if case.no_sort else 'on'}")
+                for statement, parameters in statements:
+                    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+                    plan = result.scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    plans[case.name].append((statement, list(_nodes(plan[0]["Plan"], index_parents))))
+            await conn.rollback()
+    finally:
+        await dispose_engine()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict[str, list[tuple[str, list[Node]]]]:
+    return asyncio.run(_capture_plans())
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_query_plan(case: PlanCase, plans: dict[str, list[tuple[str, list[Node]]]]) -> None:
+    statements = plans[case.name]
+    assert statements, f"{case.name} issued no queries"
+    used = {node.index for _, nodes in statements for node in nodes if node.index}
+    for statement, nodes in statements:
+        for node in nodes:
+            if node.type == "Seq Scan" and node.relation in LARGE_TABLES:
+                assert node.relation in case.seq_scan_ok, (
+                    f"sequential scan of {node.relation} in:\n{statement}"
+                )
+            if case.no_sort:
+                assert node.type not in ("Sort", "Incremental Sort"), f"sort in:\n{statement}"
+    missing = set(case.indexes) - used
+    assert not missing, f"{case.name} does not use {sorted(missing)}; indexes used: {sorted(used)}"
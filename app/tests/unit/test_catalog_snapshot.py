@@ -0,0 +1,97 @@
+"""
+Catalog snapshot file format.
+
+``write_snapshot`` and ``CatalogSnapshot`` share a hand-rolled binary
+layout (header, index sorted by id, JSON array); these checks write
+snapshots to a temporary directory and read them back without a database.
+"""
+from __future__ import annotations
+
+import json
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.services.catalog_snapshot import CatalogSnapshot, write_snapshot
+
+
+def _products(count: int) -> list[tuple[uuid.UUID, int, int, bytes]]:
+    products = []
+    for i in range(count):
+        product_id = uuid.UUID(int=(i * 7919 + 13) << 64)
+        data = json.dumps({"id": str(product_id), "name": f"Product {i}", "price_cents": 100 + i}).encode()
+        products.append((product_id, 100 + i, i, data))
+    return products
+
+
+@pytest.fixture
+def snapshot_path(tmp_path: Path) -> str:
+    return str(tmp_path / "catalog.snap")
+
+
+def test_list_json_holds_every_product(snapshot_path: str) -> None:
+    products = _products(25)
+    write_snapshot(snapshot_path, "25-abc", products)
+    snapshot = CatalogSnapshot(snapshot_path)
+    try:
+        assert snapshot.version == "25-abc"
+        assert len(snapshot) == 25
+        listed = json.loads(snapshot.list_json())
+        assert sorted(p["id"] for p in listed) == sorted(str(p[0]) for p in products)
+    finally:
+        snapshot.close()
+
+
+def test_get_finds_first_middle_and_last_and_misses_unknown(snapshot_path: str) -> None:
+    products = _products(101)
+    write_snapshot(snapshot_path, "v1", products)
+    ordered = sorted(products, key=lambda product: product[0].bytes)
+    snapshot = CatalogSnapshot(snapshot_path)
+    try:
+        for product_id, _, _, data in (ordered[0], ordered[50], ordered[-1]):
+            assert snapshot.get(product_id) == json.loads(data)
+        assert snapshot.get(uuid.UUID(int=0)) is None  # before the first
+        assert snapshot.get(uuid.UUID(int=(1 << 128) - 1)) is None  # after the last
+        between = uuid.UUID(int=ordered[50][0].int + 1)
+        assert snapshot.get(between) is None
+    finally:
+        snapshot.close()
+
+
+def test_empty_catalog(snapshot_path: str) -> None:
+    write_snapshot(snapshot_path, "0-0", [])
+    snapshot = CatalogSnapshot(snapshot_path)
+    try:
+        assert len(snapshot) == 0
+        assert json.loads(snapshot.list_json()) == []
+        assert snapshot.get(uuid.uuid4()) is None
+    finally:
+        snapshot.close()
+
+
+def test_foreign_file_is_rejected(snapshot_path: str) -> None:
+    Path(snapshot_path).write_bytes(b"not a snapshot".ljust(256, b"\0"))
+    with pytest.raises(ValueError):
+        CatalogSnapshot(snapshot_path)
+
+
+def test_is_file_notices_atomic_replace(snapshot_path: str) -> None:
+    old_products = _products(3)
+    write_snapshot(snapshot_path, "v1", old_products)
+    old = CatalogSnapshot(snapshot_path)
+    try:
+        assert old.is_file(snapshot_path)
+        write_snapshot(snapshot_path, "v2", _products(5))
+        assert not old.is_file(snapshot_path)
+        # The replaced file stays readable through the old mapping.
+        assert old.get(old_products[0][0]) == json.loads(old_products[0][3])
+        new = CatalogSnapshot(snapshot_path)
+        try:
+            assert new.version == "v2" and len(new) == 5
+            assert new.is_file(snapshot_path)
+        finally:
+            new.close()
+    finally:
+        old.close()
+    assert list(Path(snapshot_path).parent.glob(".catalog-*")) == []
@@ -0,0 +1,121 @@
+"""
+Single-flight coalescing rules.
+
+Plain coroutines stand in for the queries: followers share the leader's
+result or exception, retry when the leader is cancelled, can go away
+without cancelling the flight, and no key outlives its flight.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+class _Query:
+    """Counts calls and blocks each one until released."""
+
+    def __init__(self, result: object = "rows", error: BaseException | None = None) -> None:
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> object:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def _settle() -> None:
+    """Let every task reach its first await (leader in fn, followers on the flight)."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_callers_share_one_call() -> None:
+    async def main() -> None:
+        group, query = SingleFlight("test"), _Query()
+        tasks = [asyncio.create_task(group.do("k", query)) for _ in range(5)]
+        await _settle()
+        assert len(group) == 1
+        query.release.set()
+        assert await asyncio.gather(*tasks) == ["rows"] * 5
+        assert query.calls == 1
+        assert len(group) == 0
+
+    asyncio.run(main())
+
+
+def test_followers_get_the_leaders_exception() -> None:
+    async def main() -> None:
+        error = RuntimeError("database down")
+        group, query = SingleFlight("test"), _Query(error=error)
+        tasks = [asyncio.create_task(group.do("k", query)) for _ in range(3)]
+        await _settle()
+        query.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(result is error for result in results)
+        assert query.calls == 1
+        assert len(group) == 0
+
+    asyncio.run(main())
+
+
+def test_followers_retry_when_the_leader_is_cancelled() -> None:
+    async def main() -> None:
+        group, query = SingleFlight("test"), _Query()
+        leader = asyncio.create_task(group.do("k", query))
+        await _settle()
+        followers = [asyncio.create_task(group.do("k", query)) for _ in range(3)]
+        await _settle()
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await _settle()
+        # One follower took over as leader; the others follow it.
+        assert query.calls == 2
+        assert len(group) == 1
+        query.release.set()
+        assert await asyncio.gather(*followers) == ["rows"] * 3
+        assert len(group) == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_follower_does_not_cancel_the_flight() -> None:
+    async def main() -> None:
+        group, query = SingleFlight("test"), _Query()
+        leader = asyncio.create_task(group.do("k", query))
+        follower = asyncio.create_task(group.do("k", query))
+        await _settle()
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        query.release.set()
+        assert await leader == "rows"
+        assert query.calls == 1
+
+    asyncio.run(main())
+
+
+def test_keys_are_independent_and_not_kept() -> None:
+    async def main() -> None:
+        group = SingleFlight("test")
+        first, second = _Query("a"), _Query("b")
+        tasks = [asyncio.create_task(group.do("a", first)), asyncio.create_task(group.do("b", second))]
+        await _settle()
+        assert len(group) == 2
+        first.release.set()
+        second.release.set()
+        assert await asyncio.gather(*tasks) == ["a", "b"]
+        # Nothing is cached: the next caller runs the query again.
+        assert await group.do("a", first) == "a"
+        assert first.calls == 2
+        assert len(group) == 0
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Startup cost checks.
+
+Importing ``app.main`` must stay cheap and free of side effects: no
+settings parsing, no engine, no endpoint imports.  The checks run in a
+fresh interpreter with ``-X importtime`` so the measurement is not skewed
+by modules the test process already loaded, and the slowest imports are
+printed when a budget is exceeded.  Budgets can be raised on slow machines
+through ``IMPORT_BUDGET_MS`` and ``CREATE_APP_BUDGET_MS``.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "250"))
+CREATE_APP_BUDGET_MS = float(os.environ.get("CREATE_APP_BUDGET_MS", "3000"))
+
+
+def _run(code: str, cwd: Path) -> subprocess.CompletedProcess:
+    # No DB_* or secret variables and no .env in the working directory:
+    # anything that parses the settings at import time fails loudly.
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith("DB_") and key not in ("ENCRYPTION_KEY", "EMAIL_PEPPER", "JWT_SECRET_KEY")
+    }
+    env["PYTHONPATH"] = str(REPO_ROOT)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=cwd, env=env, check=False,
+    )
+
+
+def _cumulative_us(stderr: str) -> dict[str, int]:
+    """Parse ``-X importtime`` output into module -> cumulative microseconds."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _slowest(times: dict[str, int], count: int = 15) -> str:
+    rows = sorted(times.items(), key=lambda item: item[1], reverse=True)[:count]
+    return "\n".join(f"{us / 1000:9.1f} ms  {name}" for name, us in rows)
+
+
+def test_import_main_is_cheap_and_lazy(tmp_path: Path) -> None:
+    result = _run(
+        "import sys, app.main, app.core.settings as s, app.db.session as d\n"
+        "assert s.get_settings.cache_info().currsize == 0, 'settings parsed at import'\n"
+        "assert d._engine is None, 'engine created at import'\n"
+        "heavy = [m for m in ('app.api.v1.endpoints.auth', 'jose', 'passlib') if m in sys.modules]\n"
+        "assert not heavy, f'eager imports: {heavy}'\n",
+        tmp_path,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = _cumulative_us(result.stderr)
+    elapsed_ms = times["app.main"] / 1000
+    assert elapsed_ms <= IMPORT_BUDGET_MS, (
+        f"import app.main took {elapsed_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)\n"
+        + _slowest(times)
+    )
+
+
+def test_create_app_does_not_touch_settings_or_engine(tmp_path: Path) -> None:
+    result = _run(
+        "import time, app.main, app.core.settings as s, app.db.session as d\n"
+        "start = time.perf_counter()\n"
+        "app.main.create_app()\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+        "assert s.get_settings.cache_info().currsize == 0, 'settings parsed by create_app'\n"
+        "assert d._engine is None, 'engine created by create_app'\n",
+        tmp_path,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+    assert elapsed_ms <= CREATE_APP_BUDGET_MS, (
+        f"create_app took {elapsed_ms:.1f} ms (budget {CREATE_APP_BUDGET_MS:.0f} ms)\n"
+        + _slowest(_cumulative_us(result.stderr))
+    )
@@ -11,7 +11,8 @@ def generate_uuid() -> str:
     """Generate a random UUID string.
 
     Although the database generates UUIDs itself, sometimes a client may
-    need to create a UUID for idempotent requests. This helper uses
-    Python's uuid4 for randomness.
+    need to create a UUID for idempotent requests, e.g. as the
+    ``Idempotency-Key`` header of a POST (see ``app.core.idempotency``).
+    This helper uses Python's uuid4 for randomness.
     """
     return str(uuid.uuid4())
@@ -0,0 +1,38 @@
+"""
+Keyset pagination cursors.
+
+Listings ordered by ``(created_at, id)``, newest first, hand out an opaque
+cursor naming the last row of a page; the next page starts strictly after
+it, so every page is an index range scan however deep it is.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Any, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(row: Any) -> str:
+    """Return the opaque cursor of the page following ``row``.
+
+    ``row`` is any object with ``created_at`` and ``id`` attributes; the
+    listings using these cursors are keyed on NOT NULL columns, so
+    ``created_at`` is never None.
+    """
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Return the ``(created_at, id)`` position of a cursor; HTTP 400 if invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
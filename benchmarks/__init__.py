@@ -0,0 +1,7 @@
+"""
+Microbenchmarks for the hot paths of the backend.
+
+Run ``python -m benchmarks --help`` for usage.  The suite only needs the
+Python dependencies of the application; no database or other external
+service is contacted.
+"""
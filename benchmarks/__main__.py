@@ -0,0 +1,190 @@
+"""
+Command line entry point for the benchmark suite.
+
+Examples::
+
+    # Run everything and store the results
+    python -m benchmarks run --output bench.json
+
+    # Run the security cases only and compare against a stored baseline
+    python -m benchmarks run -k security --compare baseline.json
+
+    # Compare two result files without running anything
+    python -m benchmarks compare baseline.json bench.json --threshold 0.15
+
+``compare`` (and ``run --compare``) exits with status 1 when the median of
+any case got slower than the baseline by more than ``--threshold``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+# The settings object requires secrets at import time.  Benchmarks never
+# talk to a database, so dummy values are enough when none are configured.
+for _name, _value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "bench",
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+    "ENCRYPTION_KEY": "bench-encryption-key",
+    "EMAIL_PEPPER": "bench-pepper",
+    "JWT_SECRET_KEY": "bench-jwt-secret",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+def _autorange(run: Callable[[int], float], min_time: float) -> int:
+    """Return a loop count whose total runtime is at least ``min_time``."""
+    number = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            candidate = number * multiplier
+            if run(candidate) >= min_time:
+                return candidate
+        number *= 10
+
+
+def _measure(op: Callable[[], Any], repeat: int, min_time: float) -> dict:
+    if asyncio.iscoroutinefunction(op):
+        loop = asyncio.new_event_loop()
+
+        def run(number: int) -> float:
+            async def batch() -> float:
+                start = time.perf_counter()
+                for _ in range(number):
+                    await op()
+                return time.perf_counter() - start
+
+            return loop.run_until_complete(batch())
+
+    else:
+        loop = None
+
+        def run(number: int) -> float:
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            return time.perf_counter() - start
+
+    try:
+        number = _autorange(run, min_time)
+        timings = [run(number) / number for _ in range(repeat)]
+    finally:
+        if loop is not None:
+            loop.close()
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def _format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:8.2f} {unit}"
+    return f"{value / 1e-9:8.2f} ns"
+
+
+def run_benchmarks(selector: str | None, repeat: int, min_time: float) -> dict:
+    from benchmarks.cases import CASES
+
+    # One log line per request would dominate the route timings.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results: dict[str, dict] = {}
+    for name, factory in CASES.items():
+        if selector and selector not in name:
+            continue
+        stats = _measure(factory(), repeat, min_time)
+        results[name] = stats
+        print(f"{name:<50} {_format_seconds(stats['median_s'])}  (x{stats['number']})")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print a comparison table and return the names of regressed cases."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, stats in current.get("results", {}).items():
+        base = base_results.get(name)
+        if base is None:
+            print(f"{name:<50} {'new':>10}")
+            continue
+        ratio = stats["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  improved"
+        print(f"{name:<50} {ratio:>9.2f}x{flag}")
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-k", dest="selector", help="only run cases whose name contains this string")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per case")
+    run_parser.add_argument("--min-time", type=float, default=0.2,
+                            help="minimum seconds per repetition")
+    run_parser.add_argument("--output", help="write results to this JSON file")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a results file")
+    run_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="allowed slowdown before a case is flagged (0.10 = 10%%)")
+
+    cmp_parser = sub.add_parser("compare", help="compare two result files")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare(_load(args.baseline), _load(args.current), args.threshold)
+    else:
+        current = run_benchmarks(args.selector, args.repeat, args.min_time)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as fh:
+                json.dump(current, fh, indent=2, sort_keys=True)
+        regressions = []
+        if args.compare:
+            print()
+            regressions = compare(_load(args.compare), current, args.threshold)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
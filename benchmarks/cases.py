@@ -0,0 +1,203 @@
+"""
+Benchmark case definitions.
+
+Every case is registered with :func:`case` and is a factory that performs
+any setup and returns the operation to time.  Operations may be plain
+functions or coroutine functions; the runner awaits the latter inside a
+single event loop per case.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict
+
+import httpx
+
+from app.core import security
+from app.db.session import get_db, get_read_session, get_session
+from app.schemas.message import MessageOut
+from app.schemas.order import OrderOut
+from app.schemas.product import ProductOut
+
+from benchmarks.stubs import StubSession, make_messages, make_orders, make_products
+
+
+CaseFactory = Callable[[], Callable[[], Any]]
+CASES: Dict[str, CaseFactory] = {}
+
+ROW_COUNTS = (1, 100, 10_000)
+
+
+def case(name: str) -> Callable[[CaseFactory], CaseFactory]:
+    """Register a benchmark factory under ``name``."""
+
+    def decorator(factory: CaseFactory) -> CaseFactory:
+        if name in CASES:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        CASES[name] = factory
+        return factory
+
+    return decorator
+
+
+# --- security ---------------------------------------------------------------
+
+@case("security.hash_email")
+def _hash_email() -> Callable[[], Any]:
+    return lambda: security.hash_email("  Customer.Name@Example.com ")
+
+
+@case("security.encrypt_data")
+def _encrypt_data() -> Callable[[], Any]:
+    return lambda: security.encrypt_data("221B Baker Street, London")
+
+
+@case("security.decrypt_data")
+def _decrypt_data() -> Callable[[], Any]:
+    token = security.encrypt_data("221B Baker Street, London")
+    return lambda: security.decrypt_data(token)
+
+
+@case("security.get_password_hash")
+def _get_password_hash() -> Callable[[], Any]:
+    return lambda: security.get_password_hash("correct horse battery staple")
+
+
+@case("security.verify_password")
+def _verify_password() -> Callable[[], Any]:
+    hashed = security.get_password_hash("correct horse battery staple")
+    return lambda: security.verify_password("correct horse battery staple", hashed)
+
+
+@case("security.create_access_token")
+def _create_access_token() -> Callable[[], Any]:
+    subject = uuid.UUID(int=42)
+    return lambda: security.create_access_token(subject, expires_delta=timedelta(minutes=30))
+
+
+# --- schemas ----------------------------------------------------------------
+
+def _register_validation(name: str, schema: Any, make_rows: Callable[[int], list]) -> None:
+    for count in ROW_COUNTS:
+
+        def factory(count: int = count) -> Callable[[], Any]:
+            rows = make_rows(count)
+            validate = schema.model_validate
+            return lambda: [validate(row) for row in rows]
+
+        CASES[f"schemas.{name}.validate[{count}]"] = factory
+
+
+_register_validation("ProductOut", ProductOut, make_products)
+_register_validation("OrderOut", OrderOut, make_orders)
+_register_validation("MessageOut", MessageOut, make_messages)
+
+
+# --- routes -----------------------------------------------------------------
+
+def _route_client(
+    rows: list, user: dict | None = None, overrides: dict | None = None
+) -> httpx.AsyncClient:
+    """Return an in-process client whose DB dependency yields ``rows``.
+
+    ``user`` stands in for the authenticated user of the request and
+    ``overrides`` replaces further dependencies.
+    """
+    from app.api.v1.deps import get_catalog_session, get_current_user
+    from app.main import create_app
+
+    app = create_app()
+
+    async def _stub_session():
+        yield StubSession(rows)
+
+    app.dependency_overrides[get_db] = _stub_session
+    app.dependency_overrides[get_session] = _stub_session
+    app.dependency_overrides[get_read_session] = _stub_session
+    app.dependency_overrides[get_catalog_session] = _stub_session
+    if user is not None:
+        app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides.update(overrides or {})
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+
+
+@case("routes.GET /api/v1/products/[100]")
+def _list_products() -> Callable[[], Any]:
+    client = _route_client(make_products(100))
+
+    async def op() -> None:
+        response = await client.get("/api/v1/products/")
+        response.raise_for_status()
+
+    return op
+
+
+@case("routes.GET /api/v1/products/[100, snapshot]")
+def _list_products_snapshot() -> Callable[[], Any]:
+    import os
+    import tempfile
+
+    from app.api.v1.deps import get_catalog_session
+    from app.services.catalog_snapshot import CatalogSnapshot, catalog_snapshot, write_snapshot
+
+    fd, path = tempfile.mkstemp(suffix=".snap")
+    os.close(fd)
+    write_snapshot(path, "bench", [
+        (p.id, p.price_cents, p.stock, ProductOut.model_validate(p).model_dump_json().encode())
+        for p in make_products(100)
+    ])
+    catalog_snapshot.current = CatalogSnapshot(path)
+    os.unlink(path)  # the mapping stays valid
+
+    async def _no_session():
+        yield None
+
+    client = _route_client([], overrides={get_catalog_session: _no_session})
+
+    async def op() -> None:
+        response = await client.get("/api/v1/products/")
+        response.raise_for_status()
+
+    return op
+
+
+@case("routes.GET /api/v1/orders/[100]")
+def _list_orders() -> Callable[[], Any]:
+    client_id = str(uuid.UUID(int=1))
+    client = _route_client(make_orders(100), {"id": client_id, "role": "customer", "client_id": client_id})
+
+    async def op() -> None:
+        response = await client.get("/api/v1/orders/", params={"limit": 100})
+        response.raise_for_status()
+
+    return op
+
+
+@case("routes.GET /api/v1/messages/[100]")
+def _list_messages() -> Callable[[], Any]:
+    client = _route_client(make_messages(100))
+
+    async def op() -> None:
+        response = await client.get("/api/v1/messages/", params={"limit": 100})
+        response.raise_for_status()
+
+    return op
+
+
+@case("routes.POST /api/v1/messages/")
+def _create_message() -> Callable[[], Any]:
+    client = _route_client([])
+    body = {
+        "session_id": str(uuid.UUID(int=1)),
+        "client_id": str(uuid.UUID(int=2)),
+        "content": "Do you deliver on Sundays?",
+    }
+
+    async def op() -> None:
+        response = await client.post("/api/v1/messages/", json=body)
+        response.raise_for_status()
+
+    return op
@@ -0,0 +1,148 @@
+"""
+In-memory stand-ins for the database layer.
+
+``StubSession`` implements the small subset of ``AsyncSession`` used by
+the services (``execute``, ``add``, ``commit``, ``refresh``, ``rollback``
+and ``get``) and answers every ``execute`` with a fixed list of rows, so
+route benchmarks measure request handling and serialisation rather than
+database latency.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from app.db.models.message import Message
+from app.db.models.order import Order
+from app.db.models.product import Product
+
+
+class _ScalarResult:
+    def __init__(self, rows: list[Any]) -> None:
+        self._rows = rows
+
+    def all(self) -> list[Any]:
+        return self._rows
+
+    def first(self) -> Any:
+        return self._rows[0] if self._rows else None
+
+
+class _Result:
+    def __init__(self, rows: list[Any]) -> None:
+        self._rows = rows
+
+    def scalars(self) -> _ScalarResult:
+        return _ScalarResult(self._rows)
+
+    def scalar_one_or_none(self) -> Any:
+        return self._rows[0] if self._rows else None
+
+    def all(self) -> list[Any]:
+        return self._rows
+
+
+def _literal(arg: Any) -> Any:
+    text = getattr(arg, "text", arg)
+    if not isinstance(text, str):
+        return None
+    if text in ("true", "false"):
+        return text == "true"
+    return int(text) if text.lstrip("-").isdigit() else text
+
+
+class StubSession:
+    """Minimal async session returning canned rows."""
+
+    def __init__(self, rows: Iterable[Any] = ()) -> None:
+        self.rows = list(rows)
+
+    async def execute(self, statement: Any, params: Any = None) -> _Result:
+        return _Result(self.rows)
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        return self.rows[0] if self.rows else None
+
+    def add(self, obj: Any) -> None:
+        if getattr(obj, "id", None) is None:
+            obj.id = uuid.uuid4()
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def refresh(self, obj: Any) -> None:
+        # Emulate the server-side defaults that a real refresh would load.
+        for column in obj.__table__.columns:
+            if getattr(obj, column.key, None) is None and column.server_default is not None:
+                setattr(obj, column.key, _literal(column.server_default.arg))
+
+    async def connection(self) -> None:
+        pass
+
+
+def make_products(count: int) -> list[Product]:
+    return [
+        Product(
+            id=uuid.UUID(int=i + 1),
+            category_id=uuid.UUID(int=(i % 12) + 1),
+            sku=f"SKU-{i:07d}",
+            slug=f"bouquet-{i}",
+            name=f"Bouquet #{i}",
+            description="Seasonal flowers arranged by hand.",
+            price_cents=1500 + (i % 90) * 100,
+            compare_at_price_cents=None,
+            currency="USD",
+            stock=i % 40,
+            reserved_stock=0,
+            low_stock_threshold=5,
+            weight_grams=800,
+            is_active=True,
+            is_featured=i % 10 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def make_orders(count: int) -> list[Order]:
+    client_id = uuid.UUID(int=1)
+    newest = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    return [
+        Order(
+            id=uuid.UUID(int=i + 1),
+            order_number=i + 1,
+            client_id=client_id,
+            subtotal_cents=4500,
+            discount_cents=0,
+            shipping_cents=500,
+            tax_cents=360,
+            total_cents=5360,
+            currency="USD",
+            status="pending",
+            notes=None,
+            internal_notes=None,
+            created_at=newest - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+def make_messages(count: int) -> list[Message]:
+    session_id = uuid.UUID(int=1)
+    return [
+        Message(
+            id=uuid.UUID(int=i + 1),
+            session_id=session_id,
+            client_id=uuid.UUID(int=2),
+            support_id=None,
+            content="Hello, when will my bouquet arrive?",
+            chat_type="ai_bot",
+            is_from_client=i % 2 == 0,
+            is_read=False,
+            metadata_json={"locale": "en"},
+        )
+        for i in range(count)
+    ]
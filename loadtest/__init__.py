@@ -0,0 +1,7 @@
+"""
+End-to-end load-test harness.
+
+Starts a throwaway PostgreSQL server, creates the schema for every model,
+seeds realistic data, runs ``app.main:app`` under uvicorn and drives mixed
+workloads against it.  Run ``python -m loadtest --help`` for usage.
+"""
@@ -0,0 +1,205 @@
+"""
+Run the load test.
+
+Examples::
+
+    # Throwaway Postgres, 2 uvicorn workers, 64 concurrent users for 60 s
+    python -m loadtest --workers 2 --concurrency 64 --duration 60
+
+    # Reuse an existing database and a server that is already running
+    python -m loadtest --dsn postgresql://postgres@localhost/flowers \\
+        --url http://localhost:8000 --no-schema
+
+The report lists throughput and p50/p95/p99 latency per route; pass
+``--output report.json`` to keep it for comparison between changes.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import time
+from typing import Iterator
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_MIX = "browse=60,login=10,order=15,chat=15"
+
+
+def _settings_env(dsn: str | None, pg_env: dict[str, str] | None) -> dict[str, str]:
+    """Build the environment shared by the seeding code and the server."""
+    env = {
+        "ENCRYPTION_KEY": os.environ.get("ENCRYPTION_KEY", secrets.token_urlsafe(32)),
+        "EMAIL_PEPPER": os.environ.get("EMAIL_PEPPER", secrets.token_hex(16)),
+        "JWT_SECRET_KEY": os.environ.get("JWT_SECRET_KEY", secrets.token_hex(32)),
+    }
+    if pg_env:
+        env.update(pg_env)
+    elif dsn:
+        parts = urlsplit(dsn)
+        env.update({
+            "DB_HOST": parts.hostname or "localhost",
+            "DB_PORT": str(parts.port or 5432),
+            "DB_NAME": parts.path.lstrip("/") or "postgres",
+            "DB_USER": parts.username or "postgres",
+            "DB_PASSWORD": parts.password or "",
+        })
+    return env
+
+
+@contextlib.contextmanager
+def _database(args: argparse.Namespace) -> Iterator[dict[str, str] | None]:
+    if args.dsn:
+        yield None
+        return
+    from loadtest.postgres import ThrowawayPostgres
+
+    with ThrowawayPostgres() as pg:
+        print(f"Started throwaway PostgreSQL on port {pg.port}")
+        yield pg.env()
+
+
+@contextlib.contextmanager
+def _server(args: argparse.Namespace, env: dict[str, str]) -> Iterator[str]:
+    if args.url:
+        yield args.url.rstrip("/")
+        return
+    port = args.port
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(args.workers), "--log-level", "warning",
+         "--no-access-log"],
+        env={**os.environ, **env},
+    )
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def _wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/v1/health/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+async def _prepare(args: argparse.Namespace):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.core.settings import settings
+    from app.db.schema import create_schema
+    from loadtest.seed import seed
+
+    engine = create_async_engine(settings.dsn)
+    try:
+        if not args.no_schema:
+            async with engine.begin() as conn:
+                await create_schema(conn)
+        start = time.perf_counter()
+        data = await seed(
+            engine,
+            customers=args.customers,
+            products=args.products,
+            orders_per_customer=args.orders_per_customer,
+            messages_per_customer=args.messages_per_customer,
+            seed=args.seed,
+        )
+        print(f"Seeded {len(data.customer_ids)} customers and {len(data.product_ids)} "
+              f"products in {time.perf_counter() - start:.1f}s")
+        return data
+    finally:
+        await engine.dispose()
+
+
+async def _drive(args: argparse.Namespace, base_url: str, data) -> dict:
+    from loadtest.workloads import SCENARIOS, Recorder, parse_mix
+
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def user(worker: int) -> None:
+            rng = random.Random(args.seed * 1000 + worker)
+            while time.monotonic() < deadline:
+                scenario = SCENARIOS[rng.choices(names, weights)[0]]
+                await scenario(client, recorder, data, rng)
+
+        start = time.monotonic()
+        await asyncio.gather(*(user(i) for i in range(args.concurrency)))
+        elapsed = time.monotonic() - start
+    return {
+        "duration_s": elapsed,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "mix": mix,
+        "routes": recorder.report(elapsed),
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"\n{'route':<28} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, row in report["routes"].items():
+        print(f"{route:<28} {row['requests']:>7} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="use this database instead of a throwaway server")
+    parser.add_argument("--url", help="drive an already running server instead of starting uvicorn")
+    parser.add_argument("--no-schema", action="store_true", help="do not create the schema")
+    parser.add_argument("--port", type=int, default=8765, help="port for the uvicorn server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders-per-customer", type=int, default=3)
+    parser.add_argument("--messages-per-customer", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and workloads")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    with _database(args) as pg_env:
+        env = _settings_env(args.dsn, pg_env)
+        # The seeding code hashes and encrypts with the same secrets as the
+        # server, so the settings must see them before app modules load.
+        os.environ.update(env)
+        data = asyncio.run(_prepare(args))
+        with _server(args, env) as base_url:
+            asyncio.run(_wait_ready(base_url))
+            report = asyncio.run(_drive(args, base_url, data))
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
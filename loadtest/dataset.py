@@ -0,0 +1,417 @@
+"""
+Synthetic dataset generator for scale testing.
+
+Generates customers (with peppered email hashes, a pbkdf2 password hash and
+Fernet-encrypted PII), products, orders and messages and loads them with
+``COPY`` through asyncpg.  Tables are split into fixed-size chunks that a
+process pool generates and copies in parallel, each worker process holding
+its own connection.
+
+The output is deterministic for a given ``--seed`` and secrets, whatever
+the chunk size or process count: every row is derived from ``(seed,
+table, row index)``, foreign keys are recomputed
+from the referenced row's index instead of being shared between processes,
+and the Fernet IVs, timestamps and password salt come from the seed too.
+Customers use the emails from ``loadtest.seed.customer_email`` and the
+password ``loadtest.seed.LOADTEST_PASSWORD``, so the load-test login
+workload works against a generated dataset.
+
+Example::
+
+    python -m loadtest.dataset --customers 2000000 --products 200000 \\
+        --orders 6000000 --messages 2000000 --processes 8 --create-schema
+
+The secrets (``ENCRYPTION_KEY``, ``EMAIL_PEPPER``) and the database
+settings are read from the environment like the application does.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator, Optional
+
+import asyncpg
+
+from loadtest.seed import CHAT_LINES, COLOURS, FLOWERS, LOADTEST_PASSWORD, STYLES, customer_email
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CATEGORY_COUNT = 24
+MESSAGES_PER_SESSION = 8
+
+CUSTOMER_COLUMNS = (
+    "id", "email_hash", "password_hash", "password_algo", "full_name_enc", "phone_enc",
+    "address_enc", "is_active", "is_verified", "failed_login_count", "version", "created_at",
+    "updated_at", "password_changed_at",
+)
+PRODUCT_COLUMNS = (
+    "id", "category_id", "sku", "slug", "name", "description", "price_cents", "currency",
+    "stock", "reserved_stock", "low_stock_threshold", "weight_grams", "is_active",
+    "is_featured", "created_at", "updated_at", "version",
+)
+ORDER_COLUMNS = (
+    "id", "client_id", "subtotal_cents", "discount_cents", "shipping_cents", "tax_cents",
+    "total_cents", "currency", "status", "created_at", "updated_at", "version",
+)
+MESSAGE_COLUMNS = (
+    "id", "session_id", "client_id", "content", "chat_type", "is_from_client", "is_read",
+    "created_at", "updated_at",
+)
+
+# Triggers (see app/db/sql) disabled during the load, with the statement
+# that catches up on their work afterwards: recomputing the aggregates they
+# maintain, telling listening workers to drop their cached rows, or purging
+# the edge cache.
+DEFERRED_TRIGGERS = (
+    ("products", "products_facets", "SELECT refresh_product_facet_counts()"),
+    ("orders", "orders_customer_summary", "SELECT refresh_customer_order_summaries()"),
+    ("products", "products_notify_change", "SELECT notify_table_reset('products')"),
+    ("customers", "customers_notify_change", "SELECT notify_table_reset('customers')"),
+    ("customers", "customers_user_directory", "SELECT refresh_user_directory()"),
+    ("products", "products_cdn_purge_insert", "SELECT queue_catalog_purge()"),
+)
+
+
+def row_uuid(seed: int, table: str, index: int) -> uuid.UUID:
+    """Deterministic UUID (version 4 layout) for row ``index`` of ``table``."""
+    digest = hashlib.blake2b(f"{seed}:{table}:{index}".encode(), digest_size=16).digest()
+    return uuid.UUID(bytes=digest, version=4)
+
+
+def row_rng(seed: int, table: str, index: int) -> random.Random:
+    """Random generator for the columns of a single row.
+
+    Seeding per row keeps the output independent of the chunk size and of
+    the number of processes.
+    """
+    return random.Random(f"{seed}:{table}:{index}")
+
+
+class _Context:
+    """Per-process state shared by every chunk a worker generates."""
+
+    def __init__(self, seed: int, counts: dict[str, int], password_hash: bytes) -> None:
+        from app.core import security
+        from app.core.settings import settings
+
+        self.seed = seed
+        self.counts = counts
+        self.password_hash = password_hash
+        self.hash_email = security.hash_email
+        # The Fernet key the application derives from ENCRYPTION_KEY (see
+        # security._fernet_for): signing key, then AES key.
+        key = hashlib.sha256(settings.encryption_key.encode("utf-8")).digest()
+        self._signing_key, self._encryption_key = key[:16], key[16:]
+        sample = self.encrypt(random.Random(0), "check", EPOCH)
+        if security.decrypt_data(sample) != "check":
+            raise RuntimeError("generated tokens do not decrypt with the application's key")
+
+    def encrypt(self, rng: random.Random, value: str, when: datetime) -> bytes:
+        """Return a Fernet token of ``value`` whose IV comes from ``rng``.
+
+        ``Fernet.encrypt`` draws the IV from the OS, so the token is built
+        here following the Fernet spec (version, timestamp, IV, AES-128-CBC
+        ciphertext, HMAC-SHA256) to make reruns byte-identical.
+        """
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+        iv = rng.getrandbits(128).to_bytes(16, "big")
+        padder = padding.PKCS7(algorithms.AES.block_size).padder()
+        padded = padder.update(value.encode("utf-8")) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(self._encryption_key), modes.CBC(iv)).encryptor()
+        ciphertext = encryptor.update(padded) + encryptor.finalize()
+        body = b"\x80" + int(when.timestamp()).to_bytes(8, "big") + iv + ciphertext
+        mac = hmac.new(self._signing_key, body, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(body + mac)
+
+
+def _customers(ctx: _Context, start: int, stop: int) -> Iterator[tuple]:
+    for i in range(start, stop):
+        rng = row_rng(ctx.seed, "customers", i)
+        created = EPOCH + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        yield (
+            row_uuid(ctx.seed, "customers", i),
+            ctx.hash_email(customer_email(i)),
+            ctx.password_hash,
+            "pbkdf2_sha256",
+            ctx.encrypt(rng, f"Customer {i}", created),
+            ctx.encrypt(rng, f"+1{rng.randrange(10**9, 10**10)}", created),
+            ctx.encrypt(rng, f"{rng.randint(1, 999)} {rng.choice(FLOWERS)} Street", created),
+            rng.random() > 0.02,
+            rng.random() > 0.3,
+            0,
+            1,
+            created,
+            created,
+            created,
+        )
+
+
+def _products(ctx: _Context, start: int, stop: int) -> Iterator[tuple]:
+    for i in range(start, stop):
+        rng = row_rng(ctx.seed, "products", i)
+        name = f"{rng.choice(COLOURS)} {rng.choice(FLOWERS)} {rng.choice(STYLES)}"
+        stock = rng.randint(0, 500)
+        created = EPOCH + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        yield (
+            row_uuid(ctx.seed, "products", i),
+            row_uuid(ctx.seed, "categories", rng.randrange(CATEGORY_COUNT)),
+            f"SKU-{i:09d}",
+            f"{name.lower().replace(' ', '-')}-{i}",
+            name,
+            f"A hand-tied {name.lower()} with seasonal greenery.",
+            rng.randint(15, 250) * 100 - 1,
+            "USD",
+            stock,
+            rng.randint(0, stock // 5),
+            5,
+            rng.randint(200, 5000),
+            rng.random() > 0.05,
+            rng.random() < 0.05,
+            created,
+            created,
+            1,
+        )
+
+
+def _orders(ctx: _Context, start: int, stop: int) -> Iterator[tuple]:
+    customers = ctx.counts["customers"]
+    for i in range(start, stop):
+        rng = row_rng(ctx.seed, "orders", i)
+        subtotal = rng.randint(1, 6) * rng.randint(15, 250) * 100
+        shipping = 0 if subtotal > 7500 else 999
+        tax = subtotal * 8 // 100
+        created = EPOCH + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        yield (
+            row_uuid(ctx.seed, "orders", i),
+            row_uuid(ctx.seed, "customers", rng.randrange(customers)),
+            subtotal,
+            0,
+            shipping,
+            tax,
+            subtotal + shipping + tax,
+            "USD",
+            rng.choices(["pending", "confirmed", "shipped", "delivered", "cancelled"],
+                        [5, 5, 10, 75, 5])[0],
+            created,
+            created,
+            1,
+        )
+
+
+def _messages(ctx: _Context, start: int, stop: int) -> Iterator[tuple]:
+    customers = ctx.counts["customers"]
+    for i in range(start, stop):
+        rng = row_rng(ctx.seed, "messages", i)
+        session = i // MESSAGES_PER_SESSION
+        # Every message of a session belongs to the same customer.
+        client_index = random.Random(f"{ctx.seed}:session:{session}").randrange(customers)
+        created = EPOCH + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+        yield (
+            row_uuid(ctx.seed, "messages", i),
+            row_uuid(ctx.seed, "sessions", session),
+            row_uuid(ctx.seed, "customers", client_index),
+            rng.choice(CHAT_LINES),
+            "ai_bot",
+            i % 2 == 0,
+            rng.random() < 0.8,
+            created,
+            created,
+        )
+
+
+TABLES: dict[str, tuple[tuple[str, ...], Callable[..., Iterator[tuple]]]] = {
+    "customers": (CUSTOMER_COLUMNS, _customers),
+    "products": (PRODUCT_COLUMNS, _products),
+    "orders": (ORDER_COLUMNS, _orders),
+    "messages": (MESSAGE_COLUMNS, _messages),
+}
+
+# Emptied with the generated tables by --truncate: rows that reference them
+# (order_items) and tables derived from them, which _finish rebuilds, so
+# that nothing is left pointing at the old rows.
+DEPENDENT_TABLES = ("order_items", "customer_order_summaries", "user_directory", "outbox")
+
+# Worker process globals, set up once by _init_worker.
+_ctx: Optional[_Context] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_conn: Optional[asyncpg.Connection] = None
+
+
+def _init_worker(dsn: str, seed: int, counts: dict[str, int], password_hash: bytes) -> None:
+    global _ctx, _loop, _conn
+    _ctx = _Context(seed, counts, password_hash)
+    _loop = asyncio.new_event_loop()
+    _conn = _loop.run_until_complete(asyncpg.connect(dsn))
+    # Bulk synthetic data does not need to survive a crash mid-load.
+    _loop.run_until_complete(_conn.execute("SET synchronous_commit = off"))
+
+
+def _load_chunk(task: tuple[str, int, int]) -> tuple[str, int]:
+    table, start, stop = task
+    columns, generate = TABLES[table]
+    records = list(generate(_ctx, start, stop))
+    _loop.run_until_complete(_conn.copy_records_to_table(table, records=records, columns=columns))
+    return table, len(records)
+
+
+def _tasks(counts: dict[str, int], chunk_size: int) -> Iterator[tuple[str, int, int]]:
+    for table in TABLES:
+        total = counts[table]
+        for start in range(0, total, chunk_size):
+            yield table, start, min(start + chunk_size, total)
+
+
+def _password_hash(seed: int) -> bytes:
+    from passlib.hash import pbkdf2_sha256
+
+    salt = hashlib.blake2b(f"{seed}:password".encode(), digest_size=16).digest()
+    return pbkdf2_sha256.using(salt=salt).hash(LOADTEST_PASSWORD).encode("utf-8")
+
+
+def _asyncpg_dsn() -> str:
+    from app.core.settings import settings
+
+    return settings.dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def _prepare_schema(dsn: str, create: bool, truncate: bool) -> None:
+    if create:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from app.db.schema import create_schema
+
+        engine = create_async_engine(dsn.replace("postgresql://", "postgresql+asyncpg://", 1))
+        try:
+            async with engine.begin() as conn:
+                await create_schema(conn)
+        finally:
+            await engine.dispose()
+    conn = await asyncpg.connect(dsn)
+    try:
+        if truncate:
+            await conn.execute(f"TRUNCATE {', '.join((*TABLES, *DEPENDENT_TABLES))}")
+        # Partitioned messages need every month the generated rows span.
+        if await conn.fetchval("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('messages')"):
+            await conn.execute(
+                "SELECT create_monthly_partitions('messages', $1, $2)",
+                EPOCH.date(), (EPOCH + timedelta(days=3 * 365)).date(),
+            )
+        # Row triggers maintaining aggregates would serialise the parallel
+        # COPYs on the aggregate rows; they are rebuilt in one pass instead.
+        for table, trigger, _ in await _deferred_triggers(conn):
+            await conn.execute(f"ALTER TABLE {table} DISABLE TRIGGER {trigger}")
+    finally:
+        await conn.close()
+
+
+async def _deferred_triggers(conn: asyncpg.Connection) -> list[tuple[str, str, str]]:
+    """Return the installed ``(table, trigger, refresh statement)`` entries."""
+    installed = {
+        (row["table"], row["trigger"])
+        for row in await conn.fetch(
+            "SELECT c.relname AS table, t.tgname AS trigger FROM pg_trigger t "
+            "JOIN pg_class c ON c.oid = t.tgrelid WHERE NOT t.tgisinternal"
+        )
+    }
+    return [entry for entry in DEFERRED_TRIGGERS if entry[:2] in installed]
+
+
+async def _finish(dsn: str) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        deferred = await _deferred_triggers(conn)
+        # Every trigger is back on before the first (possibly failing) refresh.
+        for table, trigger, _ in deferred:
+            await conn.execute(f"ALTER TABLE {table} ENABLE TRIGGER {trigger}")
+        for _, _, refresh in deferred:
+            await conn.execute(refresh)
+        for table in TABLES:
+            await conn.execute(f"ANALYZE {table}")
+    finally:
+        await conn.close()
+
+
+def generate(
+    dsn: str,
+    counts: dict[str, int],
+    *,
+    seed: int = 42,
+    processes: int | None = None,
+    chunk_size: int = 50_000,
+    create: bool = False,
+    truncate: bool = False,
+    progress: Callable[[str, int, float], Any] | None = None,
+) -> dict[str, int]:
+    """Generate and load the dataset; return the number of rows per table."""
+    asyncio.run(_prepare_schema(dsn, create, truncate))
+    loaded = {table: 0 for table in TABLES}
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(
+            processes or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(dsn, seed, counts, _password_hash(seed)),
+        ) as pool:
+            for table, rows in pool.imap_unordered(_load_chunk, _tasks(counts, chunk_size)):
+                loaded[table] += rows
+                if progress:
+                    progress(table, loaded[table], time.perf_counter() - start)
+    finally:
+        # Also after a failed or interrupted load: the triggers disabled by
+        # _prepare_schema must not stay off for the application.
+        asyncio.run(_finish(dsn))
+    return loaded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.dataset", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="postgresql:// DSN (default: DB_* settings)")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=300_000)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per COPY")
+    parser.add_argument("--create-schema", action="store_true", help="create tables first")
+    parser.add_argument("--truncate", action="store_true", help="empty the tables first")
+    args = parser.parse_args(argv)
+
+    if args.customers < 1 and (args.orders or args.messages):
+        parser.error("orders and messages need at least one customer")
+    counts = {
+        "customers": args.customers,
+        "products": args.products,
+        "orders": args.orders,
+        "messages": args.messages,
+    }
+    dsn = args.dsn or _asyncpg_dsn()
+
+    def report(table: str, rows: int, elapsed: float) -> None:
+        print(f"\r{table:<10} {rows:>12,} rows  {elapsed:7.1f}s", end="", flush=True)
+
+    start = time.perf_counter()
+    loaded = generate(
+        dsn, counts, seed=args.seed, processes=args.processes, chunk_size=args.chunk_size,
+        create=args.create_schema, truncate=args.truncate, progress=report,
+    )
+    elapsed = time.perf_counter() - start
+    total = sum(loaded.values())
+    print(f"\nLoaded {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Throwaway PostgreSQL server for load tests.
+
+The server binaries are looked up in ``$PG_BIN``, then on ``PATH`` and
+finally through ``pg_config --bindir``.  The cluster lives in a temporary
+directory, listens on a free localhost port with trust authentication and
+is deleted when the context manager exits.  PostgreSQL refuses to run as
+root, so run the harness as an unprivileged user.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+class PostgresNotFound(RuntimeError):
+    """Raised when no PostgreSQL server binaries can be located."""
+
+
+def find_bindir() -> Path:
+    """Return the directory containing ``initdb`` and ``pg_ctl``."""
+    candidates = []
+    if os.environ.get("PG_BIN"):
+        candidates.append(Path(os.environ["PG_BIN"]))
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(Path(initdb).parent)
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        result = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True)
+        if result.returncode == 0:
+            candidates.append(Path(result.stdout.strip()))
+    for bindir in candidates:
+        if (bindir / "initdb").exists() and (bindir / "pg_ctl").exists():
+            return bindir
+    raise PostgresNotFound(
+        "PostgreSQL server binaries not found; install PostgreSQL or set PG_BIN"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ThrowawayPostgres:
+    """Context manager running a temporary PostgreSQL cluster."""
+
+    user = "postgres"
+    database = "postgres"
+
+    def __init__(self, *, port: Optional[int] = None, options: Optional[dict[str, str]] = None) -> None:
+        self.port = port or _free_port()
+        self.options = {"max_connections": "300", **(options or {})}
+        self._bindir = find_bindir()
+        self._tmpdir: Optional[str] = None
+
+    @property
+    def datadir(self) -> Path:
+        return Path(self._tmpdir) / "data"
+
+    def env(self) -> dict[str, str]:
+        """Return the DB_* variables understood by ``app.core.settings``."""
+        return {
+            "DB_HOST": "127.0.0.1",
+            "DB_PORT": str(self.port),
+            "DB_NAME": self.database,
+            "DB_USER": self.user,
+            "DB_PASSWORD": "",
+        }
+
+    def __enter__(self) -> "ThrowawayPostgres":
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            raise RuntimeError("PostgreSQL cannot run as root; run the load test as another user")
+        self._tmpdir = tempfile.mkdtemp(prefix="flowerstore-pg-")
+        subprocess.run(
+            [str(self._bindir / "initdb"), "-D", str(self.datadir), "-U", self.user,
+             "--auth=trust", "-E", "UTF8", "--no-sync"],
+            check=True, capture_output=True,
+        )
+        opts = " ".join(
+            [f"-p {self.port}", f"-k {self._tmpdir}", "-c listen_addresses=127.0.0.1"]
+            + [f"-c {key}={value}" for key, value in self.options.items()]
+        )
+        subprocess.run(
+            [str(self._bindir / "pg_ctl"), "-D", str(self.datadir), "-o", opts,
+             "-l", str(Path(self._tmpdir) / "postgres.log"), "-w", "start"],
+            check=True, capture_output=True,
+        )
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        try:
+            subprocess.run(
+                [str(self._bindir / "pg_ctl"), "-D", str(self.datadir), "-m", "fast", "-w", "stop"],
+                capture_output=True,
+            )
+        finally:
+            if self._tmpdir:
+                shutil.rmtree(self._tmpdir, ignore_errors=True)
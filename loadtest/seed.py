@@ -0,0 +1,170 @@
+"""
+Seed data for load tests.
+
+Rows are generated deterministically from a seed so that repeated runs
+exercise the same data.  Customers get real email hashes, Fernet-encrypted
+PII and a pbkdf2 password hash (computed once and shared, since hashing is
+deliberately slow) so that the login workload follows the production path.
+"""
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import security
+from app.db.models.customer import Customer
+from app.db.models.message import Message
+from app.db.models.order import Order
+from app.db.models.product import Product
+
+LOADTEST_PASSWORD = "loadtest-password"
+BATCH_SIZE = 1000
+
+FLOWERS = ["Rose", "Tulip", "Peony", "Lily", "Orchid", "Sunflower", "Daisy", "Hydrangea", "Carnation", "Iris"]
+STYLES = ["Bouquet", "Basket", "Box", "Wreath", "Posy", "Arrangement"]
+COLOURS = ["Red", "White", "Pink", "Yellow", "Purple", "Mixed", "Peach", "Blue"]
+CHAT_LINES = [
+    "Hi! Can you deliver tomorrow morning?",
+    "Is it possible to add a greeting card?",
+    "My order has not arrived yet.",
+    "Do you have white peonies in stock?",
+    "Thanks, the flowers were lovely!",
+]
+
+
+def customer_email(index: int) -> str:
+    """Return the email address of the ``index``-th seeded customer."""
+    return f"customer{index}@loadtest.example"
+
+
+@dataclass
+class SeedResult:
+    """Identifiers the workloads need to build realistic requests."""
+
+    customer_ids: list[uuid.UUID] = field(default_factory=list)
+    product_ids: list[uuid.UUID] = field(default_factory=list)
+    skus: list[str] = field(default_factory=list)
+    session_ids: list[uuid.UUID] = field(default_factory=list)
+
+
+def _batches(rows: Iterable[dict], size: int = BATCH_SIZE) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def seed(
+    engine: AsyncEngine,
+    *,
+    customers: int = 1000,
+    products: int = 500,
+    orders_per_customer: int = 3,
+    messages_per_customer: int = 4,
+    seed: int = 42,
+) -> SeedResult:
+    """Insert the load-test dataset and return the generated identifiers."""
+    rng = random.Random(seed)
+    result = SeedResult()
+    now = datetime.now(timezone.utc)
+    password_hash = security.get_password_hash(LOADTEST_PASSWORD)
+    categories = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(12)]
+
+    def customer_rows() -> Iterator[dict]:
+        for i in range(customers):
+            customer_id = uuid.UUID(int=rng.getrandbits(128))
+            result.customer_ids.append(customer_id)
+            yield {
+                "id": customer_id,
+                "email_hash": security.hash_email(customer_email(i)),
+                "password_hash": password_hash,
+                "password_algo": "pbkdf2_sha256",
+                "full_name_enc": security.encrypt_data(f"Customer {i}"),
+                "phone_enc": security.encrypt_data(f"+1555{i:07d}"),
+                "address_enc": security.encrypt_data(f"{i} Garden Lane"),
+                "is_active": True,
+                "is_verified": True,
+                "failed_login_count": 0,
+                "version": 1,
+            }
+
+    def product_rows() -> Iterator[dict]:
+        for i in range(products):
+            product_id = uuid.UUID(int=rng.getrandbits(128))
+            name = f"{rng.choice(COLOURS)} {rng.choice(FLOWERS)} {rng.choice(STYLES)}"
+            sku = f"LT-{i:06d}"
+            result.product_ids.append(product_id)
+            stock = rng.randint(0, 200)
+            active = rng.random() > 0.05
+            if active:
+                # Orders can only be placed for active products.
+                result.skus.append(sku)
+            yield {
+                "id": product_id,
+                "category_id": rng.choice(categories),
+                "sku": sku,
+                "slug": f"{name.lower().replace(' ', '-')}-{i}",
+                "name": name,
+                "description": f"A hand-tied {name.lower()} with seasonal greenery.",
+                "price_cents": rng.randint(15, 150) * 100 - 1,
+                "stock": stock,
+                "reserved_stock": rng.randint(0, stock // 4),
+                "low_stock_threshold": 5,
+                "weight_grams": rng.randint(300, 3000),
+                "is_active": active,
+                "is_featured": rng.random() < 0.1,
+            }
+
+    def order_rows() -> Iterator[dict]:
+        for client_id in result.customer_ids:
+            for _ in range(orders_per_customer):
+                subtotal = rng.randint(1, 6) * rng.randint(15, 150) * 100
+                shipping = 0 if subtotal > 7500 else 999
+                tax = subtotal * 8 // 100
+                yield {
+                    "id": uuid.UUID(int=rng.getrandbits(128)),
+                    "client_id": client_id,
+                    "subtotal_cents": subtotal,
+                    "discount_cents": 0,
+                    "shipping_cents": shipping,
+                    "tax_cents": tax,
+                    "total_cents": subtotal + shipping + tax,
+                    "status": rng.choice(["pending", "confirmed", "shipped", "delivered"]),
+                    "created_at": now - timedelta(days=rng.randint(0, 720)),
+                }
+
+    def message_rows() -> Iterator[dict]:
+        for client_id in result.customer_ids:
+            session_id = uuid.UUID(int=rng.getrandbits(128))
+            result.session_ids.append(session_id)
+            for n in range(messages_per_customer):
+                yield {
+                    "id": uuid.UUID(int=rng.getrandbits(128)),
+                    "session_id": session_id,
+                    "client_id": client_id,
+                    "content": rng.choice(CHAT_LINES),
+                    "chat_type": "ai_bot",
+                    "is_from_client": n % 2 == 0,
+                    "created_at": now - timedelta(minutes=rng.randint(0, 100_000)),
+                }
+
+    async with engine.begin() as conn:
+        for table, rows in (
+            (Customer.__table__, customer_rows()),
+            (Product.__table__, product_rows()),
+            (Order.__table__, order_rows()),
+            (Message.__table__, message_rows()),
+        ):
+            for batch in _batches(rows):
+                await conn.execute(insert(table), batch)
+    return result
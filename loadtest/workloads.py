@@ -0,0 +1,133 @@
+"""
+Workload scenarios and latency recording.
+
+Each scenario is a coroutine that performs one user journey through the
+API with an ``httpx.AsyncClient`` and records every request under its
+route template.  The runner picks scenarios at random according to the
+configured mix.
+"""
+from __future__ import annotations
+
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict
+
+import httpx
+
+from loadtest.seed import LOADTEST_PASSWORD, SeedResult, customer_email
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    """Collects per-route latencies for the report."""
+
+    def __init__(self) -> None:
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+
+    async def request(
+        self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.routes[route].errors += 1
+            return None
+        stats = self.routes[route]
+        stats.latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            stats.errors += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for route, stats in sorted(self.routes.items()):
+            ordered = sorted(stats.latencies)
+            report[route] = {
+                "requests": len(ordered),
+                "errors": stats.errors,
+                "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p95_ms": percentile(ordered, 95) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+            }
+        return report
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, SeedResult, random.Random], Awaitable[None]]
+
+
+async def browse_catalog(client: httpx.AsyncClient, rec: Recorder, data: SeedResult, rng: random.Random) -> None:
+    await rec.request(client, "GET /api/v1/products/", "GET", "/api/v1/products/")
+
+
+async def login(client: httpx.AsyncClient, rec: Recorder, data: SeedResult, rng: random.Random) -> None:
+    index = rng.randrange(len(data.customer_ids))
+    await rec.request(
+        client, "POST /api/v1/auth/login", "POST", "/api/v1/auth/login",
+        json={"email": customer_email(index), "password": LOADTEST_PASSWORD},
+    )
+
+
+async def place_order(client: httpx.AsyncClient, rec: Recorder, data: SeedResult, rng: random.Random) -> None:
+    # Checkout is booked to the caller, so the journey starts with a login.
+    index = rng.randrange(len(data.customer_ids))
+    response = await rec.request(
+        client, "POST /api/v1/auth/login", "POST", "/api/v1/auth/login",
+        json={"email": customer_email(index), "password": LOADTEST_PASSWORD},
+    )
+    if response is None or response.status_code != 200:
+        return
+    skus = rng.sample(data.skus, min(len(data.skus), rng.randint(1, 5)))
+    await rec.request(
+        client, "POST /api/v1/orders/", "POST", "/api/v1/orders/",
+        json={"items": [{"sku": sku, "quantity": rng.randint(1, 3)} for sku in skus]},
+        headers={"Authorization": f"Bearer {response.json()['access_token']}"},
+    )
+
+
+async def chat(client: httpx.AsyncClient, rec: Recorder, data: SeedResult, rng: random.Random) -> None:
+    index = rng.randrange(len(data.session_ids))
+    await rec.request(
+        client, "POST /api/v1/messages/", "POST", "/api/v1/messages/",
+        json={
+            "session_id": str(data.session_ids[index]),
+            "client_id": str(data.customer_ids[index]),
+            "content": "Could you deliver before noon?",
+        },
+    )
+    await rec.request(client, "GET /api/v1/messages/", "GET", "/api/v1/messages/")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "browse": browse_catalog,
+    "login": login,
+    "order": place_order,
+    "chat": chat,
+}
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse ``name=weight,...`` into a weight mapping."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
@@ -3,7 +3,7 @@
 set -euo pipefail
 
 # This script pings the health endpoint of the API to ensure it is responding.
-URL="${HEALTH_URL:-http://localhost:8000/health}"
+URL="${HEALTH_URL:-http://localhost:8000/api/v1/health/ready}"
 
 echo "Checking health at $URL"
 if curl -fsS "$URL" > /dev/null; then